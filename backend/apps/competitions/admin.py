@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Competition
+from .models import Competition, MetricDistribution
 
 # Create an interface for the Competition model.
 admin.site.register(Competition)
+admin.site.register(MetricDistribution)
@@ -1,7 +1,14 @@
 # apps/competitions/models.py
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.conf import settings
 
+from apps.core.cache_utils import CacheManager
+
+# Cache namespace of competition listings
+COMPETITIONS_NAMESPACE = "competitions"
+
 
 class Competition(models.Model):
     name = models.CharField(max_length=255, unique=True)
@@ -37,3 +44,40 @@ class Competition(models.Model):
 
     def __str__(self):
         return f"{self.name} ({self.season})"
+
+
+class MetricDistribution(models.Model):
+    """
+    Sorted values of one season metric across a competition's players,
+    players of one position, or teams. Percentile lookups are a binary
+    search over ``values``.
+    """
+
+    class Scope(models.TextChoices):
+        PLAYER = "PLAYER", "Player"
+        POSITION = "POSITION", "Position"
+        TEAM = "TEAM", "Team"
+
+    competition = models.ForeignKey(
+        Competition, on_delete=models.CASCADE, related_name="metric_distributions"
+    )
+    scope = models.CharField(max_length=10, choices=Scope.choices)
+    group = models.CharField(
+        max_length=10, blank=True, default="", help_text="Position code for POSITION"
+    )
+    metric = models.CharField(max_length=50)
+    values = models.JSONField(default=list)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("competition", "scope", "group", "metric")
+
+    def __str__(self):
+        return f"{self.competition} {self.scope} {self.group} {self.metric}"
+
+
+@receiver([post_save, post_delete], sender=Competition)
+def invalidate_competition_lookups(sender, instance, **kwargs):
+    """Invalidate cached competition listings when a competition changes"""
+    CacheManager.bump_generation(COMPETITIONS_NAMESPACE)
+    CacheManager.invalidate_competition_cache(instance.pk)
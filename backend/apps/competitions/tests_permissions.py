@@ -60,6 +60,24 @@ class CompetitionPermissionsTests(APITestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data["count"], 2)
 
+    def test_cached_listing_follows_team_and_roster_changes(self):
+        """Renamed teams and roster changes show up in the cached listing."""
+        self.team.competition = self.competition
+        self.team.save()
+        self.auth(self.player)
+        self.client.get(self.url)
+
+        self.team.name = "Renamed Team"
+        self.team.save()
+        self.team.players.remove(self.player)
+
+        res = self.client.get(self.url)
+        competition = next(
+            item for item in res.data["results"] if item["id"] == self.competition.id
+        )
+        self.assertEqual(competition["teams"][0]["name"], "Renamed Team")
+        self.assertEqual(competition["teams"][0]["players"], [])
+
     def test_anyone_can_view_competition_detail(self):
         """Anyone can view competition details."""
         self.auth(self.player)
@@ -6,9 +6,12 @@ from rest_framework import (  # pyright: ignore[reportMissingImports]
 from django_filters.rest_framework import (  # pyright: ignore[reportMissingImports]
     DjangoFilterBackend,
 )  # pyright: ignore[reportMissingImports]
-from .models import Competition
+from rest_framework.response import Response  # pyright: ignore[reportMissingImports]
+from .models import COMPETITIONS_NAMESPACE, Competition
 from .serializers import CompetitionSerializer
 from .filters import CompetitionFilter
+from apps.core.cache_utils import CacheManager, local_cache, render_payload
+from apps.teams.models import MEMBERSHIPS_NAMESPACE, TEAMS_NAMESPACE
 from apps.users.permissions import IsTeamScopedObject
 
 
@@ -21,3 +24,19 @@ class CompetitionViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
+
+    def list(self, request, *args, **kwargs):
+        """Same listing for every user, served from the per-process cache"""
+        # Pagination links are absolute, so the key includes the host
+        key = CacheManager.generate_cache_key(
+            "competitions:list", request.build_absolute_uri()
+        )
+        payload = local_cache.get_or_set(
+            key,
+            lambda: render_payload(
+                super(CompetitionViewSet, self).list(request, *args, **kwargs).data
+            ),
+            # Teams and their rosters are nested in the listing
+            [COMPETITIONS_NAMESPACE, TEAMS_NAMESPACE, MEMBERSHIPS_NAMESPACE],
+        )
+        return Response(payload)
@@ -1,8 +1,16 @@
 # apps/core/apps.py
 
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.core'
+
+    def ready(self):
+        from .db_monitor import install_query_monitor
+
+        connection_created.connect(
+            install_query_monitor, dispatch_uid="core.query_monitor"
+        )
@@ -0,0 +1,167 @@
+# apps/core/cache_codec.py
+"""
+Cache value codec for django-redis: orjson (falling back to json) with
+type tags for values JSON cannot represent, and compression only for
+values above a size threshold.
+"""
+
+import datetime
+import json
+import uuid
+import zlib
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django_redis.compressors.base import BaseCompressor
+from django_redis.exceptions import CompressorError
+from django_redis.serializers.base import BaseSerializer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional speedup
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # pragma: no cover - optional speedup
+    lz4_frame = None
+
+TYPE_TAG = "__type__"
+_TYPE_TAG_BYTES = f'"{TYPE_TAG}"'.encode()
+
+# One leading byte tells how a value was stored. None of them can start a
+# JSON document, so values written by the old zlib/JSON codec stay readable.
+RAW, ZLIB, ZSTD, LZ4 = b"\x00", b"\x01", b"\x02", b"\x03"
+ZLIB_STREAM_START = 0x78
+
+
+def _tag(value: Any) -> Dict[str, Any]:
+    """Tagged JSON form of the values plain JSON would lose or reject"""
+    if isinstance(value, datetime.datetime):
+        return {TYPE_TAG: "datetime", "value": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {TYPE_TAG: "date", "value": value.isoformat()}
+    if isinstance(value, datetime.time):
+        return {TYPE_TAG: "time", "value": value.isoformat()}
+    if isinstance(value, datetime.timedelta):
+        return {TYPE_TAG: "timedelta", "value": value.total_seconds()}
+    if isinstance(value, Decimal):
+        return {TYPE_TAG: "decimal", "value": str(value)}
+    if isinstance(value, (set, frozenset)):
+        return {TYPE_TAG: "set", "value": list(value)}
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not cacheable")
+
+
+_UNTAG = {
+    "datetime": datetime.datetime.fromisoformat,
+    "date": datetime.date.fromisoformat,
+    "time": datetime.time.fromisoformat,
+    "timedelta": lambda seconds: datetime.timedelta(seconds=seconds),
+    "decimal": Decimal,
+    "set": set,
+}
+
+
+def _untag(value: Any) -> Any:
+    if isinstance(value, dict):
+        if len(value) == 2 and value.get(TYPE_TAG) in _UNTAG:
+            return _UNTAG[value[TYPE_TAG]](_untag(value["value"]))
+        return {key: _untag(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_untag(item) for item in value]
+    return value
+
+
+def dumps(value: Any, use_orjson: bool = True) -> bytes:
+    if use_orjson and orjson is not None:
+        return orjson.dumps(
+            value,
+            default=_tag,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        )
+    return json.dumps(value, default=_tag, separators=(",", ":")).encode()
+
+
+def loads(value: bytes, use_orjson: bool = True) -> Any:
+    data = (
+        orjson.loads(value) if use_orjson and orjson is not None else json.loads(value)
+    )
+    # Only walk values that contain tagged objects
+    return _untag(data) if _TYPE_TAG_BYTES in value else data
+
+
+def available_algorithms():
+    """Compression algorithms usable in this environment, fastest first"""
+    algorithms = []
+    if lz4_frame is not None:
+        algorithms.append("lz4")
+    if zstandard is not None:
+        algorithms.append("zstd")
+    algorithms.append("zlib")
+    return algorithms
+
+
+def compress(value: bytes, algorithm: str, min_length: int) -> bytes:
+    if len(value) < min_length:
+        return RAW + value
+    if algorithm == "zstd" and zstandard is not None:
+        return ZSTD + zstandard.ZstdCompressor(level=3).compress(value)
+    if algorithm == "lz4" and lz4_frame is not None:
+        return LZ4 + lz4_frame.compress(value)
+    return ZLIB + zlib.compress(value, 6)
+
+
+def decompress(value: bytes) -> bytes:
+    header = value[:1]
+    try:
+        if header == RAW:
+            return value[1:]
+        if header == ZLIB:
+            return zlib.decompress(value[1:])
+        if header == ZSTD and zstandard is not None:
+            return zstandard.ZstdDecompressor().decompress(value[1:])
+        if header == LZ4 and lz4_frame is not None:
+            return lz4_frame.decompress(value[1:])
+        if value and value[0] == ZLIB_STREAM_START:
+            # Written by django-redis' ZlibCompressor
+            return zlib.decompress(value)
+    except Exception as e:
+        raise CompressorError(e) from e
+    # Small values the old codec stored uncompressed
+    raise CompressorError(f"Unknown cache value header {header!r}")
+
+
+class CacheSerializer(BaseSerializer):
+    """orjson serializer that round-trips datetimes, Decimals and sets"""
+
+    def dumps(self, value: Any) -> bytes:
+        return dumps(value)
+
+    def loads(self, value: bytes) -> Any:
+        return loads(value)
+
+
+class CacheCompressor(BaseCompressor):
+    """
+    Leaves values below CACHE_COMPRESS_MIN_BYTES uncompressed and compresses
+    the rest with CACHE_COMPRESSOR (zstd, lz4 or zlib, falling back to zlib).
+    """
+
+    def __init__(self, options: Dict[str, Any], algorithm: Optional[str] = None):
+        super().__init__(options)
+        self.algorithm = algorithm or getattr(settings, "CACHE_COMPRESSOR", "zstd")
+        self.min_length = getattr(settings, "CACHE_COMPRESS_MIN_BYTES", 1024)
+
+    def compress(self, value: bytes) -> bytes:
+        return compress(value, self.algorithm, self.min_length)
+
+    def decompress(self, value: bytes) -> bytes:
+        return decompress(value)
@@ -3,14 +3,78 @@
 import hashlib
 import json
 import functools
-from typing import Any, Callable, Optional, Dict, List
-from django.core.cache import cache
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, Dict, List, Tuple
+from django.core.cache import cache, caches
 from django.core.cache.utils import make_template_fragment_key
 from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from . import cache_codec
+from .metrics import timed
 import logging
+import math
+import random
+import time
+import uuid
 
 logger = logging.getLogger(__name__)
 
+# Query parameters that never change a cached view's payload
+IGNORED_QUERY_PARAMS = {"force_refresh", "format", "_"}
+
+# Per-prefix counters shared by all workers, and the prefixes they exist for
+CACHE_STATS_KEY = "cache_stats:{prefix}:{field}"
+CACHE_STATS_PREFIXES_KEY = "cache_stats:prefixes"
+CACHE_STATS_FIELDS = (
+    "hits",
+    "misses",
+    "stale",
+    "errors",
+    "compute_ms",
+    "bytes",
+    "evictions",
+)
+
+# Values stored by get_or_set are wrapped with their compute time and
+# logical expiry, and kept STALE_GRACE seconds longer than that expiry
+CACHE_ENTRY_MARKER = "__cache_entry__"
+STALE_GRACE = 300
+
+# Single-flight recomputation: the worker holding the lock recomputes
+# an entry while the others serve the stale copy or wait for it briefly
+CACHE_LOCK_KEY = "{key}:lock"
+LOCK_TIMEOUT = 60
+LOCK_WAIT = 2.0
+LOCK_POLL_INTERVAL = 0.05
+
+# Stale-while-revalidate: the last value of a key, whatever its generation
+LATEST_KEY = "{key}:latest"
+_refresh_executor = None
+
+# Probabilistic early expiration: larger values recompute earlier
+EARLY_EXPIRATION_BETA = 1.0
+
+# Marks an object whose namespaces some worker will bump once the
+# debounce window has passed
+INVALIDATION_DIRTY_KEY = "cache_dirty:{name}"
+
+# Generation counter of a cache namespace such as "team:12", "game:40",
+# "competition:3", "dashboard" or "games" (data not scoped to one team)
+GENERATION_KEY = "cache_gen:{namespace}"
+GLOBAL_NAMESPACE = "games"
+
+# Query parameters naming the team, game or competition a view is scoped to
+SCOPE_QUERY_PARAMS = {
+    "team_id": "team",
+    "game_id": "game",
+    "competition_id": "competition",
+}
+
 
 class CacheManager:
     """Centralized cache management for the Basketball Analytics app"""
@@ -43,179 +107,854 @@ class CacheManager:
         key: str, 
         callable_func: Callable, 
         timeout: Optional[int] = None,
-        cache_alias: str = 'default'
+        cache_alias: str = "default",
+        beta: float = EARLY_EXPIRATION_BETA,
+        max_stale: Optional[int] = None,
     ) -> Any:
-        """Get from cache or set using callable function"""
+        """Get from cache or set using callable function (see ``fetch``)"""
+        return CacheManager.fetch(
+            key, callable_func, timeout, cache_alias, beta=beta, max_stale=max_stale
+        )[0]
+
+    @staticmethod
+    def fetch(
+        key: str,
+        callable_func: Callable,
+        timeout: Optional[int] = None,
+        cache_alias: str = "default",
+        beta: float = EARLY_EXPIRATION_BETA,
+        max_stale: Optional[int] = None,
+    ) -> Tuple[Any, str, int]:
+        """
+        Cached value of ``key``, how it was obtained ("HIT", "STALE" or
+        "MISS") and its age in seconds. Only one worker at a time recomputes
+        a missing or expired entry; entries are recomputed a little early
+        at random so hot keys don't all expire together. With ``max_stale``,
+        the last value computed for the key (even before an invalidation) is
+        served while no older than that, and refreshed in the background.
+        """
+        backend = caches[cache_alias]
+        prefix = key.rsplit(":", 1)[0]
         try:
             # Try to get from cache first
-            cached_value = cache.get(key, using=cache_alias)
-            if cached_value is not None:
-                logger.debug(f"Cache hit for key: {key}")
-                return cached_value
-            
-            # Cache miss - execute function and cache result
-            logger.debug(f"Cache miss for key: {key}")
-            result = callable_func()
-            
-            # Set cache with timeout
-            cache_timeout = timeout or CacheManager.CACHE_TIMEOUTS.get('analytics', 3600)
-            cache.set(key, result, timeout=cache_timeout, using=cache_alias)
-            
-            return result
-            
+            with timed("cache"):
+                entry = CacheManager._unwrap(backend.get(key))
         except Exception as e:
             logger.error(f"Cache error for key {key}: {e}")
+            cache_stats.record(prefix, errors=1)
             # Fallback to executing function without caching
-            return callable_func()
-    
+            return callable_func(), "MISS", 0
+
+        if entry is not None and not CacheManager._expires_early(entry, beta):
+            logger.debug(f"Cache hit for key: {key}")
+            CacheManager.record_access(prefix, hit=True)
+            return entry[CACHE_ENTRY_MARKER], "HIT", CacheManager._age(entry)
+
+        if max_stale is not None:
+            stale = entry or CacheManager._latest_entry(backend, key)
+            if stale is not None and CacheManager._age(stale) <= max_stale:
+                logger.debug(f"Cache stale hit for key: {key}")
+                CacheManager.record_access(prefix, hit=True, stale=True)
+                CacheManager._schedule_refresh(
+                    lambda: CacheManager._refresh(
+                        backend, key, callable_func, timeout, max_stale
+                    )
+                )
+                return stale[CACHE_ENTRY_MARKER], "STALE", CacheManager._age(stale)
+
+        lock_key = CACHE_LOCK_KEY.format(key=key)
+        token = CacheManager._acquire_lock(backend, lock_key)
+        if token is None:
+            if entry is not None:
+                # Another worker is recomputing; serve the stale value meanwhile
+                logger.debug(f"Cache stale hit for key: {key}")
+                CacheManager.record_access(prefix, hit=True, stale=True)
+                return entry[CACHE_ENTRY_MARKER], "STALE", CacheManager._age(entry)
+            entry = CacheManager._wait_for_entry(backend, key)
+            if entry is not None:
+                CacheManager.record_access(prefix, hit=True)
+                return entry[CACHE_ENTRY_MARKER], "HIT", CacheManager._age(entry)
+
+        # Cache miss - execute function and cache result
+        logger.debug(f"Cache miss for key: {key}")
+        CacheManager.record_access(prefix, hit=False)
+        try:
+            result = CacheManager._compute(
+                backend, key, callable_func, timeout, max_stale
+            )
+        finally:
+            if token is not None:
+                CacheManager._release_lock(backend, lock_key, token)
+
+        return result, "MISS", 0
+
     @staticmethod
-    def invalidate_pattern(pattern: str, cache_alias: str = 'default') -> int:
-        """Invalidate all cache keys matching a pattern"""
+    def _compute(backend, key: str, callable_func: Callable, timeout, max_stale) -> Any:
+        """Run ``callable_func`` and store its result under ``key``"""
+        started = time.monotonic()
+        result = callable_func()
+        delta = time.monotonic() - started
+        cache_timeout = timeout or CacheManager.CACHE_TIMEOUTS.get("analytics", 3600)
+        now = time.time()
+        entry = {
+            CACHE_ENTRY_MARKER: result,
+            "delta": delta,
+            "computed_at": now,
+            "expires": now + cache_timeout,
+        }
+        counts = {"compute_ms": int(delta * 1000)}
         try:
-            # For Redis backend, we can use pattern matching
-            if hasattr(cache, '_cache') and hasattr(cache._cache, 'delete_pattern'):
-                # Redis backend with pattern support
-                deleted_count = cache._cache.delete_pattern(pattern)
-                logger.info(f"Cache invalidation: deleted {deleted_count} keys matching pattern: {pattern}")
-                return deleted_count
-            else:
-                # Fallback: try to delete common cache keys
-                common_keys = [
-                    f"dashboard:dashboard_data",
-                    f"analytics:*",
-                    f"team_data:*",
-                    f"user_data:*",
-                ]
-                
-                deleted_count = 0
-                for key in common_keys:
-                    if pattern in key or key in pattern:
-                        if cache.delete(key, using=cache_alias):
-                            deleted_count += 1
-                
-                logger.info(f"Cache invalidation: deleted {deleted_count} keys for pattern: {pattern}")
-                return deleted_count
+            with timed("cache"):
+                counts["bytes"] = len(cache_codec.dumps(result))
+                backend.set(key, entry, timeout=cache_timeout + STALE_GRACE)
+                if max_stale is not None:
+                    backend.set(
+                        CacheManager._latest_key(key),
+                        entry,
+                        timeout=cache_timeout + max_stale,
+                    )
+        except Exception as e:
+            logger.error(f"Cache error for key {key}: {e}")
+            counts["errors"] = 1
+        cache_stats.record(key.rsplit(":", 1)[0], **counts)
+        return result
+
+    @staticmethod
+    def _refresh(
+        backend, key: str, callable_func: Callable, timeout, max_stale
+    ) -> None:
+        """Recompute a stale entry unless another worker already is"""
+        lock_key = CACHE_LOCK_KEY.format(key=key)
+        token = CacheManager._acquire_lock(backend, lock_key)
+        if token is None:
+            return
+        try:
+            CacheManager._compute(backend, key, callable_func, timeout, max_stale)
+        except Exception as e:
+            logger.warning(f"Cache refresh failed for key {key}: {e}")
+            cache_stats.record(key.rsplit(":", 1)[0], errors=1)
+        finally:
+            CacheManager._release_lock(backend, lock_key, token)
+
+    @staticmethod
+    def _schedule_refresh(refresh: Callable) -> None:
+        """Run a refresh on the background pool, or inline when that is disabled"""
+        global _refresh_executor
+
+        if not getattr(settings, "CACHE_BACKGROUND_REFRESH", True):
+            refresh()
+            return
+
+        def run():
+            try:
+                refresh()
+            finally:
+                connections.close_all()
+
+        if _refresh_executor is None:
+            _refresh_executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "CACHE_REFRESH_WORKERS", 2),
+                thread_name_prefix="cache-refresh",
+            )
+        _refresh_executor.submit(run)
+
+    @staticmethod
+    def _latest_key(key: str) -> str:
+        """Key of the last value computed for ``key``, ignoring its generations"""
+        return LATEST_KEY.format(key=key.rsplit(".", 1)[0])
+
+    @staticmethod
+    def _latest_entry(backend, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            return CacheManager._unwrap(backend.get(CacheManager._latest_key(key)))
         except Exception as e:
-            logger.error(f"Cache invalidation error for pattern {pattern}: {e}")
-            return 0
+            logger.error(f"Cache error for key {key}: {e}")
+            cache_stats.record(key.rsplit(":", 1)[0], errors=1)
+            return None
+
+    @staticmethod
+    def _age(entry: Dict[str, Any]) -> int:
+        """Seconds since the entry was computed"""
+        return max(0, int(time.time() - entry.get("computed_at", 0)))
+
+    @staticmethod
+    def _unwrap(cached: Any) -> Optional[Dict[str, Any]]:
+        """The stored entry, treating values cached before wrapping as fresh"""
+        if cached is None:
+            return None
+        if isinstance(cached, dict) and CACHE_ENTRY_MARKER in cached:
+            return cached
+        return {CACHE_ENTRY_MARKER: cached, "delta": 0, "expires": math.inf}
+
+    @staticmethod
+    def _expires_early(entry: Dict[str, Any], beta: float) -> bool:
+        """
+        Whether to recompute now: always once expired, and before that with
+        a probability that grows as expiry nears and with the compute time
+        """
+        jitter = -entry["delta"] * beta * math.log(1.0 - random.random())
+        return time.time() + jitter >= entry["expires"]
+
+    @staticmethod
+    def _acquire_lock(backend, lock_key: str) -> Optional[str]:
+        """Take the recompute lock (SET NX with a TTL), returning its token"""
+        token = uuid.uuid4().hex
+        try:
+            if backend.add(lock_key, token, LOCK_TIMEOUT):
+                return token
+            return None
+        except Exception as e:
+            logger.warning(f"Cache lock error for {lock_key}: {e}")
+            cache_stats.record(lock_key.rsplit(":", 2)[0], errors=1)
+            return token
+
+    @staticmethod
+    def _release_lock(backend, lock_key: str, token: str) -> None:
+        """Release the recompute lock unless it expired and was taken over"""
+        try:
+            if backend.get(lock_key) == token:
+                backend.delete(lock_key)
+        except Exception as e:
+            logger.warning(f"Cache lock error for {lock_key}: {e}")
+            cache_stats.record(lock_key.rsplit(":", 2)[0], errors=1)
+
+    @staticmethod
+    def _wait_for_entry(backend, key: str) -> Optional[Dict[str, Any]]:
+        """Poll briefly for the entry another worker is computing"""
+        deadline = time.monotonic() + LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            try:
+                entry = CacheManager._unwrap(backend.get(key))
+            except Exception:
+                return None
+            if entry is not None:
+                return entry
+        return None
+
+    @staticmethod
+    def user_scope(user) -> Dict[str, Any]:
+        """The part of a user's identity that cached views may vary on"""
+        if not user or not user.is_authenticated:
+            return {"teams": [], "role": None}
+
+        from apps.teams.models import MEMBERSHIPS_NAMESPACE, Team
+
+        def team_ids():
+            return sorted(
+                set(
+                    Team.objects.filter(
+                        Q(players=user) | Q(coaches=user) | Q(staff=user)
+                    )
+                    .values_list("id", flat=True)
+                    .distinct()
+                )
+            )
+
+        teams = local_cache.get_or_set(
+            f"memberships:user:{user.pk}", team_ids, [MEMBERSHIPS_NAMESPACE]
+        )
+        return {"teams": list(teams), "role": getattr(user, "role", None)}
+
+    @staticmethod
+    def generations(namespaces: List[str]) -> Dict[str, int]:
+        """Current generation of each namespace, starting any that are missing"""
+        keys = {GENERATION_KEY.format(namespace=ns): ns for ns in set(namespaces)}
+        try:
+            current = cache.get_many(list(keys))
+            for key in keys:
+                if key not in current:
+                    # Seeded from the clock so a flushed counter never reuses old keys
+                    cache.add(key, time.time_ns(), None)
+                    current[key] = cache.get(key)
+        except Exception as e:
+            logger.warning(f"Cache generation lookup failed: {e}")
+            current = {}
+        return {ns: current.get(key, 0) for key, ns in keys.items()}
+
+    @staticmethod
+    def versioned_key(
+        key: str, namespaces: List[str], generations: Optional[Dict[str, int]] = None
+    ) -> str:
+        """Embed the generations of ``namespaces`` in the last segment of ``key``"""
+        if generations is None:
+            generations = CacheManager.generations(namespaces)
+        version = ",".join(f"{ns}={generations[ns]}" for ns in sorted(generations))
+        return f"{key}.{hashlib.md5(version.encode()).hexdigest()[:12]}"
+
+    @staticmethod
+    def bump_generation(namespace: str) -> None:
+        """
+        Invalidate every entry keyed under ``namespace`` with a single INCR;
+        the old entries are never read again and expire on their own.
+        """
+        key = GENERATION_KEY.format(namespace=namespace)
+        try:
+            cache.add(key, time.time_ns(), None)
+            cache.incr(key)
+        except Exception as e:
+            logger.warning(f"Cache generation bump failed for {namespace}: {e}")
+        # This worker sees its own invalidations immediately
+        local_cache.forget_generation(namespace)
+
+    @staticmethod
+    def scope_namespaces(team_ids=(), game_ids=(), competition_ids=()) -> List[str]:
+        """Namespaces of the given teams, games and competitions, or the global one"""
+        namespaces = [f"team:{pk}" for pk in team_ids if pk]
+        namespaces += [f"game:{pk}" for pk in game_ids if pk]
+        namespaces += [f"competition:{pk}" for pk in competition_ids if pk]
+        return namespaces or [GLOBAL_NAMESPACE]
+
+    @staticmethod
+    def request_cache_key(
+        prefix: str,
+        request,
+        per_user: bool = False,
+        namespaces: Optional[List[str]] = None,
+    ) -> str:
+        """
+        Canonical cache key for a view request: path, normalized query
+        parameters and the user's team scope (or the user, if ``per_user``).
+        Identical requests from any worker map to the same key, which also
+        carries the generations of the teams, games and competitions involved.
+        """
+        params = {
+            name: sorted(
+                value for value in request.query_params.getlist(name) if value != ""
+            )
+            for name in request.query_params
+            if name not in IGNORED_QUERY_PARAMS
+        }
+        parts = {
+            "path": request.path,
+            "params": {
+                name: values for name, values in sorted(params.items()) if values
+            },
+        }
+        scoped = {"team": [], "game": [], "competition": []}
+        for name, kind in SCOPE_QUERY_PARAMS.items():
+            scoped[kind].extend(params.get(name, []))
+        namespaces = [prefix.split(":", 1)[0]] + list(namespaces or [])
+        if per_user:
+            parts["user"] = request.user.pk
+            namespaces.append(f"user:{request.user.pk}")
+        else:
+            parts["scope"] = CacheManager.user_scope(request.user)
+            # Without an explicit filter the view covers all of the user's teams
+            if not any(scoped.values()):
+                scoped["team"] = parts["scope"]["teams"]
+        namespaces += CacheManager.scope_namespaces(
+            scoped["team"], scoped["game"], scoped["competition"]
+        )
+
+        canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+        key = f"{prefix}:{hashlib.sha256(canonical.encode()).hexdigest()[:32]}"
+        return CacheManager.versioned_key(key, namespaces)
+
+    @staticmethod
+    def record_access(prefix: str, hit: bool, stale: bool = False) -> None:
+        """Count a cache hit (possibly of stale data) or miss for ``prefix``"""
+        if hit:
+            cache_stats.record(prefix, hits=1, stale=int(stale))
+        else:
+            cache_stats.record(prefix, misses=1)
+
+    @staticmethod
+    def hit_ratios() -> Dict[str, Dict[str, Any]]:
+        """Counters and hit ratio of every cache prefix seen so far, across all workers"""
+        return cache_stats.snapshot()
+    
+    @staticmethod
+    def invalidate_pattern(pattern: str, cache_alias: str = 'default') -> int:
+        """
+        Invalidate all cache keys under a pattern's namespace, e.g.
+        "analytics:*" or "team:12", by bumping its generation (no key scan)
+        """
+        namespace = pattern.rstrip("*").rstrip(":") or GLOBAL_NAMESPACE
+        CacheManager.bump_generation(namespace)
+        logger.info(
+            f"Cache invalidation: bumped generation of {namespace} for pattern: {pattern}"
+        )
+        return 1
     
     @staticmethod
     def invalidate_user_cache(user_id: int) -> None:
         """Invalidate all cache entries for a specific user"""
-        patterns = [
-            f"user_data:{user_id}",
-            f"dashboard:{user_id}",
-            f"teams:user:{user_id}",
-        ]
-        
-        for pattern in patterns:
-            CacheManager.invalidate_pattern(pattern)
+        CacheManager.bump_generation(f"user:{user_id}")
     
     @staticmethod
     def invalidate_team_cache(team_id: int) -> None:
         """Invalidate all cache entries for a specific team"""
-        patterns = [
-            f"team_data:{team_id}",
-            f"games:team:{team_id}",
-            f"analytics:team:{team_id}",
-        ]
-        
-        for pattern in patterns:
-            CacheManager.invalidate_pattern(pattern)
+        CacheManager.bump_generation(f"team:{team_id}")
+
+    @staticmethod
+    def invalidate_game_cache(game_id: int) -> None:
+        """Invalidate all cache entries for a specific game"""
+        CacheManager.bump_generation(f"game:{game_id}")
+
+    @staticmethod
+    def invalidate_competition_cache(competition_id: int) -> None:
+        """Invalidate all cache entries for a specific competition"""
+        CacheManager.bump_generation(f"competition:{competition_id}")
     
     @staticmethod
     def invalidate_dashboard_cache() -> None:
         """Invalidate all dashboard cache entries"""
-        patterns = [
-            "dashboard:*",
-            "dashboard_data:*",
-        ]
-        
-        for pattern in patterns:
-            CacheManager.invalidate_pattern(pattern)
-        
+        CacheManager.bump_generation("dashboard")
         logger.info("Dashboard cache invalidated")
 
 
-def cache_analytics_data(timeout: int = 3600):
+class LocalCache:
+    """
+    Per-process LRU cache in front of the shared Redis caches, for hot
+    lookups that rarely change. Entries are bounded in number and age and
+    are tagged with the generations of their namespaces; other workers'
+    invalidations are noticed within ``version_check_interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        timeout: int = 60,
+        version_check_interval: float = 2.0,
+    ):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.version_check_interval = version_check_interval
+        self._entries = OrderedDict()
+        self._generations: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_set(
+        self,
+        key: str,
+        callable_func: Callable,
+        namespaces: List[str],
+        timeout: Optional[int] = None,
+        cache_alias: str = "default",
+    ) -> Any:
+        """Get from this process, then from Redis, then by calling ``callable_func``"""
+        generations = self._current_generations(namespaces)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now and entry[2] == generations:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        value = CacheManager.get_or_set(
+            CacheManager.versioned_key(key, namespaces, generations),
+            callable_func,
+            timeout=timeout,
+            cache_alias=cache_alias,
+        )
+        with self._lock:
+            self._entries[key] = (value, now + self.timeout, generations)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                cache_stats.record(evicted.rsplit(":", 1)[0], evictions=1)
+        return value
+
+    def _current_generations(self, namespaces: List[str]) -> Dict[str, int]:
+        """Namespace generations, read from Redis at most once per check interval"""
+        now = time.monotonic()
+        known = self._generations
+        due = [
+            ns
+            for ns in namespaces
+            if ns not in known or now - known[ns][1] >= self.version_check_interval
+        ]
+        if due:
+            for ns, generation in CacheManager.generations(due).items():
+                known[ns] = (generation, now)
+        return {ns: known[ns][0] for ns in namespaces if ns in known}
+
+    def forget_generation(self, namespace: str) -> None:
+        """Re-read ``namespace``'s generation on its next use"""
+        self._generations.pop(namespace, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and hit ratio of this worker's local cache"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+local_cache = LocalCache(
+    max_entries=getattr(settings, "CACHE_LOCAL_MAX_ENTRIES", 1024),
+    timeout=getattr(settings, "CACHE_LOCAL_TIMEOUT", 60),
+    version_check_interval=getattr(settings, "CACHE_LOCAL_VERSION_CHECK_INTERVAL", 2.0),
+)
+
+
+class CacheStats:
+    """
+    Per-prefix cache counters. They are aggregated in-process and added to
+    the shared Redis counters at most every ``flush_interval`` seconds, so
+    counting costs no round trip per cache access.
+    """
+
+    def __init__(self, flush_interval: float = 10.0):
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def record(self, prefix: str, **counts: int) -> None:
+        with self._lock:
+            pending = self._pending.setdefault(prefix, {})
+            for field, value in counts.items():
+                pending[field] = pending.get(field, 0) + value
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        """Add this worker's pending counts to the shared counters"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        try:
+            for prefix, counts in pending.items():
+                for field, value in counts.items():
+                    if not value:
+                        continue
+                    key = CACHE_STATS_KEY.format(prefix=prefix, field=field)
+                    if cache.add(key, 0, None):
+                        # First count since the cache was last emptied
+                        prefixes = cache.get(CACHE_STATS_PREFIXES_KEY) or []
+                        if prefix not in prefixes:
+                            cache.set(
+                                CACHE_STATS_PREFIXES_KEY,
+                                sorted(prefixes + [prefix]),
+                                None,
+                            )
+                    cache.incr(key, value)
+        except Exception as e:
+            logger.debug(f"Cache stats flush failed: {e}")
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Shared counters of every prefix, with hit ratio and per-miss averages"""
+        self.flush()
+        try:
+            prefixes = cache.get(CACHE_STATS_PREFIXES_KEY) or []
+            counts = cache.get_many(
+                [
+                    CACHE_STATS_KEY.format(prefix=prefix, field=field)
+                    for prefix in prefixes
+                    for field in CACHE_STATS_FIELDS
+                ]
+            )
+        except Exception as e:
+            logger.error(f"Cache stats lookup failed: {e}")
+            return {}
+
+        stats = {}
+        for prefix in prefixes:
+            values = {
+                field: counts.get(CACHE_STATS_KEY.format(prefix=prefix, field=field), 0)
+                for field in CACHE_STATS_FIELDS
+            }
+            total = values["hits"] + values["misses"]
+            misses = values["misses"]
+            stats[prefix] = {
+                **values,
+                "hit_ratio": round(values["hits"] / total, 3) if total else 0.0,
+                "avg_compute_ms": round(values["compute_ms"] / misses, 1)
+                if misses
+                else 0.0,
+                "avg_bytes": round(values["bytes"] / misses) if misses else 0,
+            }
+        return stats
+
+
+cache_stats = CacheStats(
+    flush_interval=getattr(settings, "CACHE_STATS_FLUSH_INTERVAL", 10)
+)
+
+
+class DebouncedInvalidator:
+    """
+    Coalesces invalidations of objects that change many times a minute,
+    such as games during live tracking. The first change marks the object
+    dirty; once CACHE_INVALIDATION_DEBOUNCE seconds have passed a background
+    flusher bumps its namespaces a single time, covering every change any
+    worker made meanwhile.
+    """
+
+    def __init__(self):
+        self._dirty: Dict[str, Tuple[set, float]] = {}
+        self._condition = threading.Condition()
+        self._thread = None
+
+    @property
+    def window(self) -> float:
+        return getattr(settings, "CACHE_INVALIDATION_DEBOUNCE", 5)
+
+    def mark(self, name: str, namespaces: List[str]) -> None:
+        """Invalidate ``namespaces`` of object ``name`` within the debounce window"""
+        window = self.window
+        if window <= 0:
+            for namespace in namespaces:
+                CacheManager.bump_generation(namespace)
+            return
+
+        with self._condition:
+            if name in self._dirty:
+                self._dirty[name][0].update(namespaces)
+                return
+        try:
+            # Only one worker flushes each window; the marker outlives the
+            # window so a crashed worker's flush is taken over soon after
+            claimed = cache.add(
+                INVALIDATION_DIRTY_KEY.format(name=name), 1, int(window * 2) + 1
+            )
+        except Exception as e:
+            logger.warning(f"Cache dirty marker failed for {name}: {e}")
+            claimed = True
+        if not claimed:
+            return
+
+        with self._condition:
+            namespaces = set(namespaces)
+            if name in self._dirty:
+                namespaces |= self._dirty[name][0]
+            self._dirty[name] = (namespaces, time.monotonic() + window)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="cache-invalidation", daemon=True
+                )
+                self._thread.start()
+            self._condition.notify()
+
+    def flush(self, name: Optional[str] = None, due_only: bool = False) -> int:
+        """Bump the namespaces of dirty objects now; returns how many were flushed"""
+        now = time.monotonic()
+        with self._condition:
+            names = [
+                dirty
+                for dirty, (_, due) in self._dirty.items()
+                if (name is None or dirty == name) and (not due_only or due <= now)
+            ]
+            taken = {dirty: self._dirty.pop(dirty)[0] for dirty in names}
+
+        for dirty, namespaces in taken.items():
+            # Clear the marker first, so changes made from here on start a new window
+            try:
+                cache.delete(INVALIDATION_DIRTY_KEY.format(name=dirty))
+            except Exception as e:
+                logger.warning(f"Cache dirty marker failed for {dirty}: {e}")
+            for namespace in namespaces:
+                CacheManager.bump_generation(namespace)
+        return len(taken)
+
+    def pending(self) -> List[str]:
+        with self._condition:
+            return sorted(self._dirty)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._dirty:
+                    self._condition.wait()
+                wait = min(due for _, due in self._dirty.values()) - time.monotonic()
+                if wait > 0:
+                    self._condition.wait(wait)
+            try:
+                self.flush(due_only=True)
+            except Exception as e:
+                logger.error(f"Debounced cache invalidation failed: {e}")
+
+
+invalidation_debouncer = DebouncedInvalidator()
+
+
+def render_payload(data) -> Any:
+    """Response data as the plain JSON values a client receives"""
+    with timed("serialize"):
+        return json.loads(JSONRenderer().render(data))
+
+
+def _argument_namespaces(kwargs: Dict[str, Any]) -> List[str]:
+    """Namespaces a decorated function's result depends on, from its keyword arguments"""
+
+    def ids(*names):
+        values = []
+        for name in names:
+            value = kwargs.get(name)
+            if isinstance(value, (list, tuple, set)):
+                values.extend(value)
+            elif value is not None:
+                values.append(value)
+        return values
+
+    namespaces = [f"user:{pk}" for pk in ids("user_id")]
+    if not namespaces or ids("team_id", "game_id", "game_ids", "competition_id"):
+        namespaces += CacheManager.scope_namespaces(
+            ids("team_id"), ids("game_id", "game_ids"), ids("competition_id")
+        )
+    return namespaces
+
+
+def _decorated_cache_key(prefix: str, args, kwargs) -> str:
+    """Cache key of a decorated call, versioned by the namespaces it reads"""
+    cache_key = CacheManager.generate_cache_key(prefix, *args, **kwargs)
+    namespaces = [prefix.split(":", 1)[0]] + _argument_namespaces(kwargs)
+    return CacheManager.versioned_key(cache_key, namespaces)
+
+
+def cache_analytics_data(timeout: int = 3600, max_stale: Optional[int] = None):
     """Decorator for caching expensive analytics functions"""
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             # Generate cache key from function name and arguments
-            cache_key = CacheManager.generate_cache_key(
-                f"analytics:{func.__name__}", 
-                *args, 
-                **kwargs
-            )
+            cache_key = _decorated_cache_key(f"analytics:{func.__name__}", args, kwargs)
             
             return CacheManager.get_or_set(
                 cache_key, 
                 lambda: func(*args, **kwargs),
                 timeout=timeout,
-                cache_alias='analytics'
+                cache_alias="analytics",
+                max_stale=max_stale,
             )
         return wrapper
     return decorator
 
 
-def cache_user_data(timeout: int = 1800):
+def cache_user_data(timeout: int = 1800, max_stale: Optional[int] = None):
     """Decorator for caching user-related data"""
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            cache_key = CacheManager.generate_cache_key(
-                f"user_data:{func.__name__}", 
-                *args, 
-                **kwargs
-            )
+            cache_key = _decorated_cache_key(f"user_data:{func.__name__}", args, kwargs)
             
             return CacheManager.get_or_set(
                 cache_key, 
                 lambda: func(*args, **kwargs),
                 timeout=timeout,
-                cache_alias='default'
+                cache_alias="default",
+                max_stale=max_stale,
             )
         return wrapper
     return decorator
 
 
-def cache_team_data(timeout: int = 1800):
+def cache_team_data(timeout: int = 1800, max_stale: Optional[int] = None):
     """Decorator for caching team-related data"""
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            cache_key = CacheManager.generate_cache_key(
-                f"team_data:{func.__name__}", 
-                *args, 
-                **kwargs
-            )
+            cache_key = _decorated_cache_key(f"team_data:{func.__name__}", args, kwargs)
             
             return CacheManager.get_or_set(
                 cache_key, 
                 lambda: func(*args, **kwargs),
                 timeout=timeout,
-                cache_alias='default'
+                cache_alias="default",
+                max_stale=max_stale,
             )
         return wrapper
     return decorator
 
 
-def cache_dashboard_data(timeout: int = 300):
+def cache_dashboard_data(timeout: int = 300, max_stale: Optional[int] = None):
     """Decorator for caching dashboard data"""
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            cache_key = CacheManager.generate_cache_key(
-                f"dashboard:{func.__name__}", 
-                *args, **kwargs
-            )
+            cache_key = _decorated_cache_key(f"dashboard:{func.__name__}", args, kwargs)
             
             return CacheManager.get_or_set(
                 cache_key, 
                 lambda: func(*args, **kwargs),
                 timeout=timeout,
-                cache_alias='default'
+                cache_alias="default",
+                max_stale=max_stale,
             )
         return wrapper
     return decorator
+
+
+class _UncachedResponse(Exception):
+    """Carries a view response that must not be cached out of ``fetch``"""
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+def cache_view_response(
+    prefix: str,
+    timeout: int = 300,
+    cache_alias: str = "default",
+    per_user: bool = False,
+    max_stale: Optional[int] = None,
+    namespaces: Optional[List[str]] = None,
+):
+    """
+    Decorator for caching DRF view methods under a canonical request key.
+    Only the rendered JSON payload of successful responses is stored, so a
+    hit returns exactly what a miss would have sent. With ``max_stale``
+    the last payload is served (``X-Cache: STALE`` with its ``Age``) while
+    it is refreshed in the background. ``namespaces`` lists further
+    generations the payload depends on, beyond the request's scope.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(self, request, *args, **kwargs):
+            try:
+                cache_key = CacheManager.request_cache_key(
+                    prefix, request, per_user=per_user, namespaces=namespaces
+                )
+            except Exception as e:
+                logger.error(f"Cache error for view {prefix}: {e}")
+                cache_stats.record(prefix, errors=1)
+                return func(self, request, *args, **kwargs)
+
+            def render():
+                response = func(self, request, *args, **kwargs)
+                if getattr(response, "status_code", None) == 200 and hasattr(
+                    response, "data"
+                ):
+                    return render_payload(response.data)
+                raise _UncachedResponse(response)
+
+            try:
+                payload, outcome, age = CacheManager.fetch(
+                    cache_key,
+                    render,
+                    timeout=timeout,
+                    cache_alias=cache_alias,
+                    max_stale=max_stale,
+                )
+            except _UncachedResponse as uncached:
+                response = uncached.response
+                response["X-Cache"] = "MISS"
+                return response
+
+            response = Response(payload)
+            response["X-Cache"] = outcome
+            if outcome == "STALE":
+                response["Age"] = str(age)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,168 @@
+# apps/core/db_monitor.py
+"""
+Query instrumentation that works with DEBUG off.
+
+A ``connection.execute_wrapper`` is installed on every database connection
+as it is opened, so statements from views, services, background threads and
+management commands all pass through it. It times each statement, adds it
+to the ``track_queries()`` blocks that are open in the current context and
+logs slow statements with their SQL normalized.
+
+With ``NPLUSONE_THRESHOLD`` set, the outermost block also counts each
+normalized SELECT and reports those repeated more often than that, with the
+line of project code that issued them; ``NPLUSONE_RAISE`` turns the report
+into an error, for running the test suite strictly.
+"""
+
+import contextvars
+import logging
+import os
+import re
+import time
+import traceback
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+slow_logger = logging.getLogger("db.slow")
+repeat_logger = logging.getLogger("db.nplusone")
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql: str) -> str:
+    """SQL with literals and parameter lists collapsed, so equal statements match"""
+    sql = _LITERALS.sub("?", sql)
+    sql = _IN_LISTS.sub("(...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+class RepeatedQueryError(Exception):
+    """A SELECT ran more than NPLUSONE_THRESHOLD times in one tracked block"""
+
+
+def call_site() -> str:
+    """file:line of the innermost project frame outside this module"""
+    root = str(settings.BASE_DIR) + os.sep
+    for frame in reversed(traceback.extract_stack()):
+        if (
+            frame.filename.startswith(root)
+            and frame.filename != __file__
+            and "site-packages" not in frame.filename
+        ):
+            return f"{os.path.relpath(frame.filename, root)}:{frame.lineno}"
+    return "unknown"
+
+
+class QueryStats:
+    """Query count, database time and slow statements of one tracked block"""
+
+    def __init__(self, label: str = "", parent: Optional["QueryStats"] = None):
+        self.label = label
+        self.parent = parent
+        self.count = 0
+        self.duration_ms = 0.0
+        self.slow: List[Tuple[float, str]] = []
+        # Repeat counts per SELECT fingerprint, kept by the outermost block only
+        self.threshold = (
+            getattr(settings, "NPLUSONE_THRESHOLD", 0) if parent is None else 0
+        )
+        self.repeats: Dict[str, int] = {}
+        self.call_sites: Dict[str, str] = {}
+
+    def record(self, sql: str, duration_ms: float, slow: bool) -> None:
+        stats = self
+        while stats is not None:
+            stats.count += 1
+            stats.duration_ms += duration_ms
+            if slow:
+                stats.slow.append((duration_ms, sql))
+            if stats.threshold and sql.lstrip()[:6].upper() == "SELECT":
+                stats.count_repeat(sql)
+            stats = stats.parent
+
+    def count_repeat(self, sql: str) -> None:
+        fingerprint = normalize_sql(sql)
+        count = self.repeats.get(fingerprint, 0) + 1
+        self.repeats[fingerprint] = count
+        if count == self.threshold + 1:
+            # Only the statement that crosses the threshold pays for the stack walk
+            self.call_sites[fingerprint] = call_site()
+
+    def check_repeats(self) -> None:
+        """Report the SELECTs repeated more than the threshold"""
+        repeated = {
+            fingerprint: count
+            for fingerprint, count in self.repeats.items()
+            if count > self.threshold
+        }
+        for fingerprint, count in repeated.items():
+            repeat_logger.warning(
+                "repeated query",
+                extra={
+                    "sql": fingerprint,
+                    "query_count": count,
+                    "call_site": self.call_sites[fingerprint],
+                    "source": self.label,
+                },
+            )
+        if repeated and getattr(settings, "NPLUSONE_RAISE", False):
+            fingerprint, count = max(repeated.items(), key=lambda item: item[1])
+            where = self.call_sites[fingerprint]
+            raise RepeatedQueryError(
+                f"{count} x {fingerprint} at {where} in {self.label}"
+            )
+
+
+_current: contextvars.ContextVar[Optional[QueryStats]] = contextvars.ContextVar(
+    "query_stats", default=None
+)
+
+
+@contextmanager
+def track_queries(label: str = ""):
+    """Collect the queries run in this block, including those of nested blocks"""
+    stats = QueryStats(label, parent=_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+    if stats.threshold:
+        stats.check_repeats()
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+def monitor_query(execute, sql, params, many, context):
+    """``execute_wrapper`` that times a statement and reports it"""
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration_ms = (time.perf_counter() - start) * 1000
+        slow = duration_ms >= getattr(settings, "SLOW_QUERY_MS", 200)
+        stats = _current.get()
+        if stats is not None:
+            stats.record(sql, duration_ms, slow)
+        if slow:
+            slow_logger.warning(
+                "slow query",
+                extra={
+                    "duration_ms": int(duration_ms),
+                    "sql": normalize_sql(sql),
+                    "alias": context["connection"].alias,
+                    "source": stats.label if stats is not None else "",
+                },
+            )
+
+
+def install_query_monitor(sender, connection, **kwargs):
+    """``connection_created`` receiver adding the monitor to a new connection"""
+    if monitor_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, monitor_query)
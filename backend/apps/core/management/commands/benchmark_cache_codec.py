@@ -0,0 +1,155 @@
+"""
+Management command to benchmark cache value codecs on real analytics payloads.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q
+from django_redis.compressors.zlib import ZlibCompressor
+from django_redis.exceptions import CompressorError
+from django_redis.serializers.json import JSONSerializer
+
+from apps.core import cache_codec
+from apps.games.models import Game
+from apps.games.services import GameAnalyticsService
+from apps.teams.models import Team
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure encode/decode time and stored size of cache codecs "
+        "on analytics payloads"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--team",
+            type=int,
+            action="append",
+            dest="teams",
+            help="Benchmark this team's analytics (can be given several times)",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=3,
+            help="Number of teams with the most games to use when no --team is given",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=50,
+            help="Encode/decode rounds per payload",
+        )
+
+    def handle(self, *args, **options):
+        payloads = self.payloads(options["teams"], options["limit"])
+        if not payloads:
+            self.stdout.write(self.style.WARNING("No games to build payloads from"))
+            return
+
+        for name, payload in payloads:
+            self.stdout.write(f"\n{name}")
+            self.stdout.write(
+                f"  {'codec':<24}{'bytes':>10}{'encode ms':>12}{'decode ms':>12}"
+            )
+            for codec, encode, decode in self.codecs():
+                try:
+                    stored = encode(payload)
+                    intact = decode(stored) == payload
+                except Exception as e:
+                    self.stdout.write(f"  {codec:<24}fails: {e}")
+                    continue
+
+                started = time.perf_counter()
+                for _ in range(options["iterations"]):
+                    encode(payload)
+                encoded = time.perf_counter() - started
+                started = time.perf_counter()
+                for _ in range(options["iterations"]):
+                    decode(stored)
+                decoded = time.perf_counter() - started
+
+                self.stdout.write(
+                    f"  {codec:<24}{len(stored):>10}"
+                    f"{encoded * 1000 / options['iterations']:>12.3f}"
+                    f"{decoded * 1000 / options['iterations']:>12.3f}"
+                    + ("" if intact else "  (does not round-trip)")
+                )
+
+        self.stdout.write(self.style.SUCCESS("\nBenchmark complete"))
+
+    def payloads(self, team_ids, limit):
+        """Uncached analytics and post-game report payloads of the chosen teams"""
+        teams = Team.objects.all()
+        if team_ids:
+            teams = teams.filter(id__in=team_ids)
+        else:
+            teams = teams.annotate(
+                games=Count("home_games", distinct=True)
+                + Count("away_games", distinct=True)
+            ).order_by("-games")[:limit]
+
+        analytics = GameAnalyticsService.get_comprehensive_analytics.__wrapped__
+        payloads = []
+        for team in teams:
+            self.stdout.write(f"Building payloads for {team.name}...")
+            payloads.append(
+                (f"{team.name}: comprehensive analytics", analytics(team_id=team.id))
+            )
+            game = (
+                Game.objects.filter(Q(home_team=team) | Q(away_team=team))
+                .order_by("-game_date")
+                .first()
+            )
+            if game is not None:
+                payloads.append(
+                    (
+                        f"{team.name}: post-game report",
+                        GameAnalyticsService.get_post_game_report(game.id, team.id),
+                    )
+                )
+        return payloads
+
+    def codecs(self):
+        """(name, encode, decode) of the previous codec and each available new one"""
+        json_serializer = JSONSerializer({})
+        zlib_compressor = ZlibCompressor({})
+
+        def legacy_decode(value):
+            try:
+                value = zlib_compressor.decompress(value)
+            except CompressorError:
+                pass
+            return json_serializer.loads(value)
+
+        codecs = [
+            (
+                "json + zlib (previous)",
+                lambda value: zlib_compressor.compress(json_serializer.dumps(value)),
+                legacy_decode,
+            ),
+            (
+                "json, uncompressed",
+                lambda value: cache_codec.dumps(value, use_orjson=False),
+                lambda value: cache_codec.loads(value, use_orjson=False),
+            ),
+        ]
+        if cache_codec.orjson is not None:
+            codecs.append(
+                ("orjson, uncompressed", cache_codec.dumps, cache_codec.loads)
+            )
+        min_length = getattr(settings, "CACHE_COMPRESS_MIN_BYTES", 1024)
+        for algorithm in cache_codec.available_algorithms():
+            codecs.append(
+                (
+                    f"{'orjson' if cache_codec.orjson else 'json'} + {algorithm}",
+                    lambda value, algorithm=algorithm: cache_codec.compress(
+                        cache_codec.dumps(value), algorithm, min_length
+                    ),
+                    lambda value: cache_codec.loads(cache_codec.decompress(value)),
+                )
+            )
+        return codecs
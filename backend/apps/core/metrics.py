@@ -0,0 +1,221 @@
+# apps/core/metrics.py
+"""
+Per-endpoint latency histograms shared by all workers.
+
+Each request's total, database, cache and serialization time is added to
+in-process histograms keyed by URL name and method. Like the cache
+counters, they are added to shared Redis counters at most every
+``flush_interval`` seconds and rendered in Prometheus text format.
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the histogram buckets, in milliseconds
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Timed components of a request and the metric each is exported as
+SERIES = {
+    "request": "http_request_duration_seconds",
+    "db": "http_request_db_seconds",
+    "cache": "http_request_cache_seconds",
+    "serialize": "http_request_serialization_seconds",
+}
+SERIES_HELP = {
+    "request": "Time spent handling the request",
+    "db": "Time spent in database queries",
+    "cache": "Time spent reading and writing the cache",
+    "serialize": "Time spent rendering the response body",
+}
+
+METRICS_KEY = "metrics:{route}:{method}:{series}:{field}"
+METRICS_ROUTES_KEY = "metrics:routes"
+# Histogram fields: one counter per bucket, then +Inf, count and sum
+FIELDS = [f"le_{bound}" for bound in BUCKETS_MS] + ["le_inf", "count", "sum_us"]
+
+_timings: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+
+@contextmanager
+def track_timings():
+    """Collect the component timings reported in this block"""
+    timings: Dict[str, float] = {}
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+@contextmanager
+def timed(component: str):
+    """Add the time spent in this block to ``component`` of the current request"""
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[component] = (
+            timings.get(component, 0.0) + (time.perf_counter() - started) * 1000
+        )
+
+
+def _bucket(duration_ms: float) -> str:
+    for bound in BUCKETS_MS:
+        if duration_ms <= bound:
+            return f"le_{bound}"
+    return "le_inf"
+
+
+class RequestMetrics:
+    """Latency histograms per (URL name, method) and timed component"""
+
+    def __init__(self, flush_interval: float = 10.0):
+        self.flush_interval = flush_interval
+        self._pending: Dict[Tuple[str, str, str], Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def observe(self, route: str, method: str, timings: Dict[str, float]) -> None:
+        with self._lock:
+            for series, duration_ms in timings.items():
+                if series not in SERIES:
+                    continue
+                pending = self._pending.setdefault((route, method, series), {})
+                for field, value in (
+                    (_bucket(duration_ms), 1),
+                    ("count", 1),
+                    ("sum_us", int(duration_ms * 1000)),
+                ):
+                    pending[field] = pending.get(field, 0) + value
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        """Add this worker's pending observations to the shared counters"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        try:
+            for (route, method, series), counts in pending.items():
+                for field, value in counts.items():
+                    key = METRICS_KEY.format(
+                        route=route, method=method, series=series, field=field
+                    )
+                    if cache.add(key, 0, None):
+                        # First observation since the cache was last emptied
+                        routes = cache.get(METRICS_ROUTES_KEY) or []
+                        if [route, method] not in routes:
+                            cache.set(
+                                METRICS_ROUTES_KEY,
+                                sorted(routes + [[route, method]]),
+                                None,
+                            )
+                    cache.incr(key, value)
+        except Exception as e:
+            logger.debug(f"Request metrics flush failed: {e}")
+
+    def snapshot(self) -> Dict[Tuple[str, str], Dict[str, Dict[str, int]]]:
+        """Shared histograms of every route, by series"""
+        self.flush()
+        try:
+            routes = [tuple(route) for route in cache.get(METRICS_ROUTES_KEY) or []]
+            counts = cache.get_many(
+                [
+                    METRICS_KEY.format(
+                        route=route, method=method, series=series, field=field
+                    )
+                    for route, method in routes
+                    for series in SERIES
+                    for field in FIELDS
+                ]
+            )
+        except Exception as e:
+            logger.error(f"Request metrics lookup failed: {e}")
+            return {}
+
+        return {
+            (route, method): {
+                series: {
+                    field: counts.get(
+                        METRICS_KEY.format(
+                            route=route, method=method, series=series, field=field
+                        ),
+                        0,
+                    )
+                    for field in FIELDS
+                }
+                for series in SERIES
+            }
+            for route, method in routes
+        }
+
+
+request_metrics = RequestMetrics(
+    flush_interval=getattr(settings, "REQUEST_METRICS_FLUSH_INTERVAL", 10)
+)
+
+
+def _labels(**labels: Any) -> str:
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+    return (
+        "{"
+        + ",".join(f'{name}="{escape(value)}"' for name, value in labels.items())
+        + "}"
+    )
+
+
+def render_prometheus(histograms, cache_prefixes: Dict[str, Dict[str, Any]]) -> str:
+    """Prometheus text exposition of the request histograms and cache counters"""
+    lines: List[str] = []
+    for series, metric in SERIES.items():
+        lines.append(f"# HELP {metric} {SERIES_HELP[series]}")
+        lines.append(f"# TYPE {metric} histogram")
+        for (route, method), by_series in histograms.items():
+            counts = by_series[series]
+            if not counts["count"]:
+                continue
+            cumulative = 0
+            for bound in BUCKETS_MS:
+                cumulative += counts[f"le_{bound}"]
+                labels = _labels(route=route, method=method, le=bound / 1000)
+                lines.append(f"{metric}_bucket{labels} {cumulative}")
+            labels = _labels(route=route, method=method, le="+Inf")
+            lines.append(f"{metric}_bucket{labels} {cumulative + counts['le_inf']}")
+            labels = _labels(route=route, method=method)
+            lines.append(f"{metric}_sum{labels} {counts['sum_us'] / 1e6}")
+            lines.append(f"{metric}_count{labels} {counts['count']}")
+
+    lines.append("# HELP cache_requests_total Cache lookups by key prefix and result")
+    lines.append("# TYPE cache_requests_total counter")
+    for prefix, stats in cache_prefixes.items():
+        for result in ("hits", "misses", "stale", "errors"):
+            labels = _labels(prefix=prefix, result=result)
+            lines.append(f"cache_requests_total{labels} {stats.get(result, 0)}")
+    return "\n".join(lines) + "\n"
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer whose rendering time counts as the request's serialization time"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed("serialize"):
+            return super().render(data, accepted_media_type, renderer_context)
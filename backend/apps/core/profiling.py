@@ -0,0 +1,69 @@
+# apps/core/profiling.py
+"""
+Sampling profiler for single requests.
+
+A background thread samples the stack of the profiled thread at a fixed
+interval and counts identical stacks, which is the collapsed format that
+flamegraph.pl, speedscope and similar tools read.
+"""
+
+import os
+import sys
+import threading
+from collections import Counter
+from typing import Optional
+
+from django.conf import settings
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    root = str(settings.BASE_DIR) + os.sep
+    if filename.startswith(root):
+        filename = filename[len(root) :]
+    elif "site-packages" + os.sep in filename:
+        filename = filename.split("site-packages" + os.sep, 1)[1]
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{frame.f_lineno})".replace(";", ":")
+
+
+class StackSampler:
+    """Counts the stacks of one thread, sampled every ``interval`` seconds"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._target: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start sampling the calling thread"""
+        self._target = threading.get_ident()
+        self._thread = threading.Thread(
+            target=self._run, name="stack-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        """One ``root;...;leaf count`` line per distinct stack"""
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.samples.most_common()
+        )
@@ -0,0 +1,81 @@
+# apps/core/spans.py
+"""
+Named timing spans for the sections of expensive requests.
+
+``span(name)`` works as a context manager or a decorator. Inside a request
+tracked by ``track_spans()`` it records the wall time and query count of the
+block; PerformanceMonitoringMiddleware sends them in the ``Server-Timing``
+header and the request log. Elsewhere, a span does nothing.
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from .db_monitor import track_queries
+
+
+class SpanRecorder:
+    """Wall time, query count and calls per span name, in first-seen order"""
+
+    def __init__(self):
+        self.spans: Dict[str, Dict[str, float]] = {}
+
+    def entry(self, name: str) -> Dict[str, float]:
+        """Totals of ``name``, listed from the moment the span first starts"""
+        return self.spans.setdefault(
+            name, {"duration_ms": 0.0, "queries": 0, "calls": 0}
+        )
+
+    def header(self) -> str:
+        """``Server-Timing`` value; ``desc`` carries the query count"""
+        return ", ".join(
+            f'{name};dur={span["duration_ms"]:.1f};desc="{span["queries"]} queries"'
+            for name, span in self.spans.items()
+        )
+
+    def fields(self) -> Dict[str, Dict[str, float]]:
+        """Structured request log fields"""
+        return {
+            name: {
+                "duration_ms": round(span["duration_ms"], 1),
+                "queries": span["queries"],
+                "calls": span["calls"],
+            }
+            for name, span in self.spans.items()
+        }
+
+
+_recorder: contextvars.ContextVar[Optional[SpanRecorder]] = contextvars.ContextVar(
+    "span_recorder", default=None
+)
+
+
+@contextmanager
+def track_spans():
+    """Collect the spans that run in this block"""
+    recorder = SpanRecorder()
+    token = _recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _recorder.reset(token)
+
+
+@contextmanager
+def span(name: str):
+    """Time a section of a request under ``name``"""
+    recorder = _recorder.get()
+    if recorder is None:
+        yield
+        return
+    entry = recorder.entry(name)
+    started = time.perf_counter()
+    with track_queries(name) as queries:
+        try:
+            yield
+        finally:
+            entry["duration_ms"] += (time.perf_counter() - started) * 1000
+            entry["queries"] += queries.count
+            entry["calls"] += 1
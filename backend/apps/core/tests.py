@@ -0,0 +1,628 @@
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import time
+import zlib
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django_redis.exceptions import CompressorError
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework.request import Request
+
+from apps.competitions.models import Competition
+from apps.core import cache_codec, cache_utils
+from apps.core.db_monitor import RepeatedQueryError, normalize_sql, track_queries
+from apps.core.profiling import StackSampler
+from apps.core.spans import span, track_spans
+from apps.core.cache_utils import (
+    CACHE_LOCK_KEY,
+    GENERATION_KEY,
+    CacheManager,
+    LocalCache,
+)
+from apps.games.models import Game
+from apps.teams.models import Team
+from basketball_analytics.middleware import PerformanceMonitoringMiddleware
+
+User = get_user_model()
+
+
+class RequestCacheTests(APITestCase):
+    def setUp(self):
+        self.coach = User.objects.create_user(
+            username="coach", password="password", role=User.Role.COACH
+        )
+        self.other_coach = User.objects.create_user(
+            username="other", password="password", role=User.Role.COACH
+        )
+        self.team = Team.objects.create(name="Team A", created_by=self.coach)
+        self.team.coaches.add(self.coach, self.other_coach)
+
+    def make_request(self, user, query):
+        request = Request(APIRequestFactory().get(f"/api/games/x/?{query}"))
+        request.user = user
+        return request
+
+    def test_request_key_is_canonical(self):
+        """
+        Ensure parameter order, blank values and cache-busting parameters do
+        not change the key, while real filters and team scope do.
+        """
+        key = CacheManager.request_cache_key(
+            "analytics:x", self.make_request(self.coach, "team_id=1&quarter=2")
+        )
+        same = CacheManager.request_cache_key(
+            "analytics:x",
+            self.make_request(
+                self.other_coach, "quarter=2&outcome=&team_id=1&force_refresh=1"
+            ),
+        )
+        self.assertEqual(key, same)
+
+        other_filter = CacheManager.request_cache_key(
+            "analytics:x", self.make_request(self.coach, "team_id=1&quarter=3")
+        )
+        self.assertNotEqual(key, other_filter)
+
+        outsider = User.objects.create_user(
+            username="outsider", password="password", role=User.Role.COACH
+        )
+        other_scope = CacheManager.request_cache_key(
+            "analytics:x", self.make_request(outsider, "team_id=1&quarter=2")
+        )
+        self.assertNotEqual(key, other_scope)
+
+    def test_view_payload_is_shared_and_counted(self):
+        """
+        Ensure identical analytics requests hit the stored payload and are
+        reported in the hit ratios.
+        """
+        url = reverse("game-comprehensive-analytics")
+
+        self.client.force_authenticate(user=self.coach)
+        first = self.client.get(url, {"team_id": self.team.id, "quarter": 1})
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(first["X-Cache"], "MISS")
+
+        self.client.force_authenticate(user=self.other_coach)
+        second = self.client.get(url, {"quarter": 1, "team_id": self.team.id})
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.json(), first.json())
+
+        stats = CacheManager.hit_ratios()["analytics:comprehensive_analytics"]
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["hit_ratio"], 0.5)
+
+
+class CacheGenerationTests(APITestCase):
+    def setUp(self):
+        self.coach = User.objects.create_user(
+            username="coach", password="password", role=User.Role.COACH
+        )
+        self.competition = Competition.objects.create(
+            name="L", season="S", created_by=self.coach
+        )
+        self.team1, self.team2, self.team3 = [
+            Team.objects.create(
+                name=f"Team {name}", competition=self.competition, created_by=self.coach
+            )
+            for name in "ABC"
+        ]
+        for team in (self.team1, self.team2, self.team3):
+            team.coaches.add(self.coach)
+        self.client.force_authenticate(user=self.coach)
+        self.url = reverse("game-comprehensive-analytics")
+
+    def fetch(self, team):
+        return self.client.get(self.url, {"team_id": team.id})["X-Cache"]
+
+    def test_bump_changes_only_that_namespace(self):
+        """Ensure a generation bump re-keys its namespace and leaves others alone."""
+        self.assertEqual(
+            (self.fetch(self.team1), self.fetch(self.team2)), ("MISS", "MISS")
+        )
+        self.assertEqual(
+            (self.fetch(self.team1), self.fetch(self.team2)), ("HIT", "HIT")
+        )
+
+        CacheManager.invalidate_team_cache(self.team1.id)
+        self.assertEqual(self.fetch(self.team1), "STALE")
+        self.assertEqual(self.fetch(self.team2), "HIT")
+
+    def test_game_changes_invalidate_its_teams(self):
+        """Ensure saving or deleting a game invalidates its teams' entries only."""
+        self.fetch(self.team1)
+        self.fetch(self.team3)
+
+        game = Game.objects.create(
+            competition=self.competition,
+            home_team=self.team1,
+            away_team=self.team2,
+            game_date=datetime.date.today(),
+        )
+        # The last payload is served while it is recomputed
+        self.assertEqual(self.fetch(self.team1), "STALE")
+        self.assertEqual(self.fetch(self.team1), "HIT")
+        self.assertEqual(self.fetch(self.team3), "HIT")
+
+        game.delete()
+        self.assertEqual(self.fetch(self.team1), "STALE")
+        self.assertEqual(self.fetch(self.team3), "HIT")
+
+    def test_live_score_invalidations_are_coalesced(self):
+        """Ensure score-only saves mark the game dirty and are flushed as one bump."""
+        game = Game.objects.create(
+            competition=self.competition,
+            home_team=self.team1,
+            away_team=self.team2,
+            game_date=datetime.date.today(),
+        )
+        namespace = f"game:{game.pk}"
+        generation = CacheManager.generations([namespace])[namespace]
+
+        with self.settings(CACHE_INVALIDATION_DEBOUNCE=60):
+            for score in (2, 5, 7):
+                game.home_team_score = score
+                game.save(update_fields=["home_team_score"])
+            self.assertEqual(
+                CacheManager.generations([namespace])[namespace], generation
+            )
+            self.assertEqual(cache_utils.invalidation_debouncer.pending(), [namespace])
+
+            self.assertEqual(cache_utils.invalidation_debouncer.flush(), 1)
+            self.assertEqual(
+                CacheManager.generations([namespace])[namespace], generation + 1
+            )
+
+            # Quarter end is a full save and invalidates pending changes at once
+            game.home_team_score = 9
+            game.save(update_fields=["home_team_score"])
+            game.quarter = 2
+            game.save()
+            self.assertEqual(cache_utils.invalidation_debouncer.pending(), [])
+            self.assertGreater(
+                CacheManager.generations([namespace])[namespace], generation + 1
+            )
+
+    def test_dashboard_invalidation_is_a_single_bump(self):
+        """Ensure dashboard invalidation bumps one counter instead of scanning keys."""
+        key = CacheManager.versioned_key("dashboard:dashboard_data:x", ["dashboard"])
+        generation = CacheManager.generations(["dashboard"])["dashboard"]
+
+        CacheManager.invalidate_dashboard_cache()
+        self.assertEqual(
+            CacheManager.generations(["dashboard"])["dashboard"], generation + 1
+        )
+        self.assertNotEqual(
+            CacheManager.versioned_key("dashboard:dashboard_data:x", ["dashboard"]), key
+        )
+
+
+class GetOrSetTests(SimpleTestCase):
+    def setUp(self):
+        self.backend = caches["default"]
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return {"value": self.calls}
+
+    def test_single_flight_serves_stale_while_locked(self):
+        """Ensure only the lock holder recomputes; others get the stale value."""
+        CacheManager.get_or_set("tests:flight:k", self.compute, timeout=60)
+        entry = self.backend.get("tests:flight:k")
+        entry["expires"] = 0
+        self.backend.set("tests:flight:k", entry)
+
+        self.backend.add(CACHE_LOCK_KEY.format(key="tests:flight:k"), "other", 30)
+        self.assertEqual(
+            CacheManager.get_or_set("tests:flight:k", self.compute, timeout=60),
+            {"value": 1},
+        )
+        self.assertEqual(self.calls, 1)
+
+        self.backend.delete(CACHE_LOCK_KEY.format(key="tests:flight:k"))
+        self.assertEqual(
+            CacheManager.get_or_set("tests:flight:k", self.compute, timeout=60),
+            {"value": 2},
+        )
+
+    def test_waits_for_lock_holder_without_stale_value(self):
+        """Ensure a worker with nothing to serve computes once the wait runs out."""
+        self.backend.add(CACHE_LOCK_KEY.format(key="tests:flight:w"), "other", 30)
+        original = cache_utils.LOCK_WAIT
+        cache_utils.LOCK_WAIT = 0.1
+        try:
+            value = CacheManager.get_or_set("tests:flight:w", self.compute, timeout=60)
+        finally:
+            cache_utils.LOCK_WAIT = original
+        self.assertEqual((value, self.calls), ({"value": 1}, 1))
+
+    def test_early_expiration_scales_with_beta(self):
+        """Ensure entries are recomputed early only when beta allows it."""
+        CacheManager.get_or_set("tests:early:k", self.compute, timeout=60)
+        entry = self.backend.get("tests:early:k")
+        entry["delta"] = 100.0
+        self.backend.set("tests:early:k", entry)
+
+        CacheManager.get_or_set("tests:early:k", self.compute, timeout=60, beta=0)
+        self.assertEqual(self.calls, 1)
+        CacheManager.get_or_set("tests:early:k", self.compute, timeout=60, beta=1e6)
+        self.assertEqual(self.calls, 2)
+
+    def test_stale_while_revalidate(self):
+        """Ensure stale values are served within max_stale, then refreshed."""
+        CacheManager.get_or_set("tests:swr:k", self.compute, timeout=60, max_stale=300)
+        CacheManager.invalidate_pattern("tests:*")
+        key = CacheManager.versioned_key("tests:swr:k", ["tests"])
+
+        value, outcome, _ = CacheManager.fetch(
+            key, self.compute, timeout=60, max_stale=300
+        )
+        self.assertEqual((value, outcome), ({"value": 1}, "STALE"))
+        # The refresh already ran (inline under tests) and stored the new value
+        value, outcome, _ = CacheManager.fetch(
+            key, self.compute, timeout=60, max_stale=300
+        )
+        self.assertEqual((value, outcome), ({"value": 2}, "HIT"))
+        self.assertEqual(CacheManager.hit_ratios()["tests:swr"]["stale"], 1)
+
+    def test_stale_values_are_bounded_by_max_stale(self):
+        """Ensure values older than max_stale are recomputed before responding."""
+        CacheManager.get_or_set(
+            "tests:swr:old", self.compute, timeout=60, max_stale=300
+        )
+        entry = self.backend.get("tests:swr:old")
+        entry.update(expires=0, computed_at=0)
+        self.backend.set("tests:swr:old", entry)
+
+        value, outcome, _ = CacheManager.fetch(
+            "tests:swr:old", self.compute, timeout=60, max_stale=300
+        )
+        self.assertEqual((value, outcome), ({"value": 2}, "MISS"))
+
+
+class LocalCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return self.calls
+
+    def test_least_recently_used_entries_are_evicted(self):
+        """Ensure the local cache keeps at most max_entries, dropping the oldest."""
+        local = LocalCache(max_entries=2, timeout=60)
+        for key in ("a", "b", "a", "c"):
+            local.get_or_set(f"tests:lru:{key}", self.compute, ["tests"])
+        self.assertEqual(local.stats()["entries"], 2)
+        self.assertEqual((local.hits, local.misses), (1, 3))
+
+        # "b" was evicted locally but is still in Redis
+        self.assertEqual(local.get_or_set("tests:lru:b", self.compute, ["tests"]), 2)
+        self.assertEqual(local.misses, 4)
+
+    def test_other_workers_invalidations_apply_after_check_interval(self):
+        """Ensure a generation bumped elsewhere is seen on the next version check."""
+        local = LocalCache(timeout=60, version_check_interval=60)
+        local.get_or_set("tests:l1:k", self.compute, ["tests"])
+        # Another worker bumps the namespace without touching this process
+        cache.incr(GENERATION_KEY.format(namespace="tests"))
+
+        self.assertEqual(local.get_or_set("tests:l1:k", self.compute, ["tests"]), 1)
+        local.version_check_interval = 0
+        self.assertEqual(local.get_or_set("tests:l1:k", self.compute, ["tests"]), 2)
+
+
+class CacheCodecTests(TestCase):
+    def test_round_trips_values_json_cannot_represent(self):
+        """Ensure datetimes, dates, Decimals and sets survive encoding, even nested."""
+        value = {
+            "at": datetime.datetime(2025, 3, 1, 19, 30, tzinfo=datetime.timezone.utc),
+            "games": [{"date": datetime.date(2025, 3, 1), "ppp": Decimal("1.125")}],
+            "ids": {1, 2},
+            "count": 3,
+        }
+        serializer = cache_codec.CacheSerializer({})
+        self.assertEqual(serializer.loads(serializer.dumps(value)), value)
+        self.assertEqual(
+            cache_codec.loads(
+                cache_codec.dumps(value, use_orjson=False), use_orjson=False
+            ),
+            value,
+        )
+
+    def test_compresses_only_above_threshold(self):
+        """Ensure small values are stored as is and large ones compressed."""
+        compressor = cache_codec.CacheCompressor({}, algorithm="zlib")
+        small = cache_codec.dumps({"hits": 1})
+        large = cache_codec.dumps({"rows": list(range(2000))})
+
+        self.assertEqual(compressor.compress(small), cache_codec.RAW + small)
+        self.assertLess(len(compressor.compress(large)), len(large))
+        for value in (small, large):
+            self.assertEqual(compressor.decompress(compressor.compress(value)), value)
+
+    def test_reads_values_written_by_previous_codec(self):
+        """Ensure zlib-compressed and plain JSON values from before stay readable."""
+        compressor = cache_codec.CacheCompressor({})
+        legacy = json.dumps({"rows": list(range(100))}).encode()
+        self.assertEqual(compressor.decompress(zlib.compress(legacy)), legacy)
+        with self.assertRaises(CompressorError):
+            compressor.decompress(b'{"hits": 1}')
+
+    def test_benchmark_command(self):
+        """Ensure the benchmark runs on real payloads and reports every codec."""
+        coach = User.objects.create_user(username="coach", password="password")
+        competition = Competition.objects.create(name="L", season="S", created_by=coach)
+        home, away = [
+            Team.objects.create(name=name, competition=competition, created_by=coach)
+            for name in ("Home", "Away")
+        ]
+        Game.objects.create(
+            competition=competition,
+            home_team=home,
+            away_team=away,
+            game_date=datetime.date.today(),
+        )
+
+        out = StringIO()
+        call_command("benchmark_cache_codec", team=[home.id], iterations=1, stdout=out)
+        self.assertIn("json + zlib (previous)", out.getvalue())
+        self.assertIn("Benchmark complete", out.getvalue())
+
+
+class CacheStatsTests(APITestCase):
+    def test_counters_per_prefix(self):
+        """Ensure hits, misses, bytes, errors and evictions are counted per prefix."""
+        CacheManager.get_or_set(
+            "tests:stats:k", lambda: {"rows": [1, 2, 3]}, timeout=60
+        )
+        CacheManager.get_or_set(
+            "tests:stats:k", lambda: {"rows": [1, 2, 3]}, timeout=60
+        )
+        local = LocalCache(max_entries=1)
+        local.get_or_set("tests:evict:a", lambda: 1, ["tests"])
+        local.get_or_set("tests:evict:b", lambda: 2, ["tests"])
+
+        stats = CacheManager.hit_ratios()
+        self.assertEqual(
+            (stats["tests:stats"]["hits"], stats["tests:stats"]["misses"]), (1, 1)
+        )
+        self.assertEqual(stats["tests:stats"]["bytes"], len(b'{"rows":[1,2,3]}'))
+        self.assertEqual(stats["tests:stats"]["errors"], 0)
+        self.assertEqual(stats["tests:evict"]["evictions"], 1)
+
+    def test_counts_are_flushed_in_batches(self):
+        """Ensure counts stay in-process until the flush interval passes."""
+        key = cache_utils.CACHE_STATS_KEY.format(prefix="tests:batch", field="hits")
+        stats = cache_utils.CacheStats(flush_interval=60)
+        stats.record("tests:batch", hits=2)
+        self.assertIsNone(cache.get(key))
+        stats.flush()
+        self.assertEqual(cache.get(key), 2)
+
+    def test_metrics_endpoint_is_admin_only(self):
+        """Ensure only staff users can read the cache metrics."""
+        url = reverse("cache_metrics")
+        coach = User.objects.create_user(
+            username="coach", password="password", role=User.Role.COACH
+        )
+        admin = User.objects.create_user(
+            username="admin", password="password", is_staff=True
+        )
+        CacheManager.record_access("tests:endpoint", hit=True)
+
+        self.client.force_authenticate(user=coach)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=admin)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["prefixes"]["tests:endpoint"]["hits"], 1)
+
+
+class QueryMonitorTests(TestCase):
+    def test_counts_queries_without_debug(self):
+        """Ensure tracked blocks count queries, including those of nested blocks."""
+        with track_queries("outer") as outer:
+            User.objects.count()
+            with track_queries("inner") as inner:
+                User.objects.count()
+                User.objects.exists()
+        self.assertEqual((outer.count, inner.count), (3, 2))
+        self.assertGreater(outer.duration_ms, 0)
+
+    def test_slow_queries_are_logged_normalized(self):
+        """Ensure slow statements are logged once, with literals collapsed."""
+        self.assertEqual(
+            normalize_sql(
+                "SELECT *  FROM t WHERE id IN (%s, %s, %s) AND name = 'bob' LIMIT 21"
+            ),
+            "SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?",
+        )
+        with self.settings(SLOW_QUERY_MS=0), track_queries("tests") as queries:
+            with self.assertLogs("db.slow", level="WARNING") as logs:
+                list(User.objects.filter(id__in=[1, 2, 3]))
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn("IN (...)", logs.records[0].sql)
+        self.assertEqual(logs.records[0].source, "tests")
+        self.assertEqual(len(queries.slow), 1)
+
+    @override_settings(NPLUSONE_THRESHOLD=2)
+    def test_repeated_selects_are_reported_with_call_site(self):
+        """Ensure a SELECT repeated past the threshold is reported with its caller."""
+        users = [
+            User.objects.create_user(username=f"user{i}", password="password")
+            for i in range(4)
+        ]
+        with self.assertLogs("db.nplusone", level="WARNING") as logs:
+            with track_queries("tests"):
+                for user in users:
+                    User.objects.filter(pk=user.pk).first()
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(logs.records[0].query_count, 4)
+        self.assertRegex(logs.records[0].call_site, r"^apps/core/tests\.py:\d+$")
+
+        with self.settings(NPLUSONE_RAISE=True), self.assertRaises(RepeatedQueryError):
+            with track_queries("tests"):
+                for user in users:
+                    User.objects.filter(pk=user.pk).first()
+
+    @override_settings(MAX_QUERIES_PER_REQUEST=2)
+    def test_middleware_logs_high_query_count(self):
+        """Ensure the middleware reports query count and database time per request."""
+
+        def view(request):
+            for _ in range(3):
+                User.objects.count()
+            return HttpResponse("OK")
+
+        request = RequestFactory().get("/api/test/")
+        with self.assertLogs("request", level="WARNING") as logs:
+            PerformanceMonitoringMiddleware(view)(request)
+        self.assertEqual(logs.records[0].getMessage(), "high query count")
+        self.assertEqual(logs.records[0].query_count, 3)
+        self.assertEqual(request.query_stats.count, 3)
+
+
+class RequestMetricsTests(APITestCase):
+    def test_histograms_per_route_in_prometheus_format(self):
+        """Ensure requests are counted per URL name and exposed to admins only."""
+        url = reverse("prometheus_metrics")
+        coach = User.objects.create_user(
+            username="coach", password="password", role=User.Role.COACH
+        )
+        admin = User.objects.create_user(
+            username="admin", password="password", is_staff=True
+        )
+        for _ in range(2):
+            self.client.get(reverse("liveness_check"))
+
+        self.client.force_authenticate(user=coach)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=admin)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+
+        body = response.content.decode()
+        self.assertIn("# TYPE http_request_duration_seconds histogram", body)
+        self.assertIn(
+            'http_request_duration_seconds_count{route="liveness_check",method="GET"} 2',
+            body,
+        )
+        self.assertIn(
+            'http_request_duration_seconds_bucket{route="liveness_check",method="GET",le="+Inf"} 2',
+            body,
+        )
+        self.assertIn(
+            'http_request_serialization_seconds_count{route="liveness_check"', body
+        )
+
+
+class ProfilerTests(TestCase):
+    def setUp(self):
+        self.profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profile_dir)
+        self.url = reverse("liveness_check")
+
+    def test_sampler_collapses_stacks(self):
+        """Ensure sampled stacks are written root first with a count per stack."""
+        sampler = StackSampler(interval=0.001)
+        sampler.start()
+        time.sleep(0.05)
+        sampler.stop()
+        lines = sampler.collapsed().splitlines()
+        self.assertTrue(lines)
+        stack, count = lines[0].rsplit(" ", 1)
+        self.assertGreater(int(count), 0)
+        self.assertIn("test_sampler_collapses_stacks (apps/core/tests.py:", stack)
+
+    def test_only_superusers_are_profiled(self):
+        """Ensure X-Profile is ignored unless a superuser sends it."""
+        coach = User.objects.create_user(username="coach", password="password")
+        admin = User.objects.create_superuser(username="admin", password="password")
+
+        with self.settings(PROFILE_DIR=self.profile_dir):
+            self.client.force_login(coach)
+            response = self.client.get(self.url, HTTP_X_PROFILE="1")
+            self.assertNotIn("X-Profile-Id", response)
+
+            self.client.force_login(admin)
+            response = self.client.get(
+                self.url, HTTP_X_PROFILE="1", HTTP_X_REQUEST_ID="abc-123"
+            )
+        self.assertEqual(response["X-Profile-Id"], "abc-123")
+        self.assertEqual(os.listdir(self.profile_dir), ["abc-123.collapsed"])
+
+
+class SpanTests(TestCase):
+    def test_spans_record_time_and_queries(self):
+        """Ensure spans add up per name, nested spans are listed in start order."""
+
+        @span("count")
+        def count_users():
+            return User.objects.count()
+
+        with track_spans() as recorder:
+            with span("outer"):
+                count_users()
+                count_users()
+        self.assertEqual(list(recorder.spans), ["outer", "count"])
+        self.assertEqual(recorder.fields()["count"]["queries"], 2)
+        self.assertEqual(recorder.fields()["count"]["calls"], 2)
+        self.assertEqual(recorder.fields()["outer"]["queries"], 2)
+        self.assertRegex(
+            recorder.header(),
+            r'^outer;dur=[\d.]+;desc="2 queries", count;dur=[\d.]+;desc="2 queries"$',
+        )
+
+        # Outside a tracked request a span is a no-op
+        self.assertEqual(count_users(), 0)
+
+    def test_sections_in_server_timing_header(self):
+        """Ensure the middleware sends the spans of a request as Server-Timing."""
+        coach = User.objects.create_user(
+            username="coach", password="password", role=User.Role.COACH
+        )
+        competition = Competition.objects.create(name="L", season="S", created_by=coach)
+        team, opponent = [
+            Team.objects.create(name=name, competition=competition, created_by=coach)
+            for name in ("Team A", "Team B")
+        ]
+        team.coaches.add(coach)
+        game = Game.objects.create(
+            competition=competition,
+            home_team=team,
+            away_team=opponent,
+            game_date=datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc),
+        )
+        self.client.force_login(coach)
+
+        response = self.client.get(
+            reverse("game-post-game-report", kwargs={"pk": game.pk}),
+            {"team_id": team.id},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        sections = [
+            entry.split(";")[0] for entry in response["Server-Timing"].split(", ")
+        ]
+        self.assertEqual(
+            sections,
+            [
+                "report.possessions",
+                "report.offence",
+                "report.defence",
+                "report.summary",
+            ],
+        )
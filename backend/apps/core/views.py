@@ -1,12 +1,22 @@
 # apps/core/views.py
 
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.authentication import BasicAuthentication
+from rest_framework.decorators import (
+    api_view,
+    authentication_classes,
+    permission_classes,
+)
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework import status
 from django.db import connection
 from django.core.cache import cache
 from django.conf import settings
+from django.http import HttpResponse
+from .cache_utils import CacheManager, local_cache
+from .metrics import render_prometheus, request_metrics
+from django_redis import get_redis_connection
 import redis
 import logging
 
@@ -44,6 +54,11 @@ def health_check(request):
         health_status['status'] = 'unhealthy'
         logger.error(f"Redis health check failed: {e}")
     
+    # Cache effectiveness per key prefix, across all workers
+    health_status["cache_hit_ratios"] = CacheManager.hit_ratios()
+    # In-process cache of the worker that answered
+    health_status["local_cache"] = local_cache.stats()
+
     # Check if we're in debug mode (should be False in production)
     if settings.DEBUG:
         health_status['checks']['debug_mode'] = 'warning: debug mode enabled'
@@ -83,3 +98,43 @@ def liveness_check(request):
     Liveness check endpoint for Kubernetes
     """
     return Response({'status': 'alive'}, status=status.HTTP_200_OK)
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def cache_metrics(request):
+    """
+    Cache counters per key prefix across all workers, this worker's local
+    cache, and Redis-wide memory and evictions (admin only)
+    """
+    metrics = {
+        "prefixes": CacheManager.hit_ratios(),
+        "local_cache": local_cache.stats(),
+    }
+    try:
+        info = get_redis_connection("default").info()
+        metrics["redis"] = {
+            "used_memory": info.get("used_memory"),
+            "maxmemory": info.get("maxmemory"),
+            "evicted_keys": info.get("evicted_keys"),
+            "expired_keys": info.get("expired_keys"),
+        }
+    except Exception as e:
+        metrics["redis"] = f"unavailable: {str(e)}"
+    return Response(metrics)
+
+
+@api_view(["GET"])
+@authentication_classes(
+    api_settings.DEFAULT_AUTHENTICATION_CLASSES + [BasicAuthentication]
+)
+@permission_classes([IsAdminUser])
+def prometheus_metrics(request):
+    """
+    Latency histograms per URL name and method, and cache counters, of all
+    workers in Prometheus text format (admin only; scrapers can use basic auth)
+    """
+    return HttpResponse(
+        render_prometheus(request_metrics.snapshot(), CacheManager.hit_ratios()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -0,0 +1,43 @@
+"""
+Management command to rebuild the per-game team totals from possessions.
+"""
+
+from django.core.management.base import BaseCommand
+from apps.games.models import Game, TeamGameStats
+
+
+class Command(BaseCommand):
+    help = "Rebuild TeamGameStats rows from possessions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--game",
+            type=int,
+            action="append",
+            dest="games",
+            help="Only rebuild this game (can be given several times)",
+        )
+        parser.add_argument(
+            "--team",
+            type=int,
+            help="Only rebuild games involving this team",
+        )
+
+    def handle(self, *args, **options):
+        game_ids = options["games"]
+        team_id = options["team"]
+
+        if team_id:
+            team_games = Game.objects.filter(
+                home_team_id=team_id
+            ) | Game.objects.filter(away_team_id=team_id)
+            if game_ids:
+                team_games = team_games.filter(id__in=game_ids)
+            game_ids = list(team_games.values_list("id", flat=True))
+
+        scope = "all games" if game_ids is None else f"{len(game_ids)} game(s)"
+        self.stdout.write(f"Rebuilding team game stats for {scope}...")
+
+        rows = TeamGameStats.rebuild(game_ids)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} team game stats row(s)"))
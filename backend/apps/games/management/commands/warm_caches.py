@@ -0,0 +1,227 @@
+"""
+Management command to precompute analytics, post-game reports and
+dashboards into the cache after a deploy or a Redis flush.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.core.cache_utils import CacheManager
+from apps.core.db_monitor import track_queries
+from apps.games.models import Game
+from apps.games.views import GameViewSet
+from apps.teams.models import Team
+
+# Filter combinations coaches use most on the analytics page
+ANALYTICS_FILTERS = [
+    {},
+    {"last_games": 5},
+    {"last_games": 10},
+    {"home_away": "Home"},
+    {"home_away": "Away"},
+    {"outcome": "W"},
+    {"outcome": "L"},
+]
+
+
+class Command(BaseCommand):
+    help = "Warm the analytics, post-game report and dashboard caches of active teams"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=30,
+            help="Teams with a game in this many past days are active (default 30)",
+        )
+        parser.add_argument(
+            "--games",
+            type=int,
+            default=3,
+            help="Post-game reports to warm per team, most recent first (default 3)",
+        )
+        parser.add_argument(
+            "--team",
+            type=int,
+            action="append",
+            dest="teams",
+            help="Only warm this team (can be given several times)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Requests computed in parallel (default 4)",
+        )
+        parser.add_argument(
+            "--budget",
+            type=float,
+            default=300,
+            help="Stop starting new work after this many seconds (default 300)",
+        )
+
+    def handle(self, *args, **options):
+        since = timezone.now().date() - timedelta(days=options["days"])
+        teams = Team.objects.filter(
+            Q(home_games__game_date__gte=since) | Q(away_games__game_date__gte=since)
+        ).distinct()
+        if options["teams"]:
+            teams = teams.filter(id__in=options["teams"])
+        teams = list(teams)
+
+        tasks = self.plan(teams, since, options["games"])
+        if not tasks:
+            self.stdout.write(
+                self.style.WARNING("No active teams with coaches to warm")
+            )
+            return
+        self.stdout.write(
+            f"Warming {len(tasks)} cache entries for {len(teams)} team(s)..."
+        )
+
+        deadline = time.monotonic() + options["budget"]
+        counts = {"warmed": 0, "cached": 0, "failed": 0, "skipped": 0}
+        totals = {"queries": 0, "db_ms": 0.0}
+
+        def run(task):
+            label, view, path, params, user, kwargs = task
+            if time.monotonic() > deadline:
+                return label, None, 0, None
+            started = time.monotonic()
+            request = APIRequestFactory().get(path, params)
+            force_authenticate(request, user=user)
+            with track_queries(label) as queries:
+                response = view(request, **kwargs)
+            return label, response, time.monotonic() - started, queries
+
+        def report(done, result):
+            label, response, elapsed, queries = result
+            if response is None:
+                counts["skipped"] += 1
+                return
+            totals["queries"] += queries.count
+            totals["db_ms"] += queries.duration_ms
+            if response.status_code != 200:
+                counts["failed"] += 1
+                outcome = f"failed ({response.status_code})"
+            elif response.get("X-Cache") == "MISS":
+                counts["warmed"] += 1
+                outcome = "warmed"
+            else:
+                counts["cached"] += 1
+                outcome = "already cached"
+            self.stdout.write(
+                f"[{done}/{len(tasks)}] {label}: {outcome} in {elapsed * 1000:.0f}ms"
+                f" ({queries.count} queries, {queries.duration_ms:.0f}ms in the db)"
+            )
+
+        if options["workers"] <= 1:
+            for done, task in enumerate(tasks, start=1):
+                try:
+                    report(done, run(task))
+                except Exception as e:
+                    counts["failed"] += 1
+                    self.stdout.write(self.style.ERROR(f"[{done}/{len(tasks)}] {e}"))
+        else:
+
+            def run_in_worker(task):
+                try:
+                    return run(task)
+                finally:
+                    connections.close_all()
+
+            with ThreadPoolExecutor(
+                max_workers=options["workers"], thread_name_prefix="warm-caches"
+            ) as pool:
+                futures = [pool.submit(run_in_worker, task) for task in tasks]
+                for done, future in enumerate(as_completed(futures), start=1):
+                    try:
+                        report(done, future.result())
+                    except Exception as e:
+                        counts["failed"] += 1
+                        self.stdout.write(
+                            self.style.ERROR(f"[{done}/{len(tasks)}] {e}")
+                        )
+
+        summary = ", ".join(f"{count} {name}" for name, count in counts.items())
+        summary += (
+            f"; {totals['queries']} queries, {totals['db_ms']:.0f}ms in the database"
+        )
+        if counts["skipped"]:
+            self.stdout.write(self.style.WARNING(f"Time budget exhausted: {summary}"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Cache warmup complete: {summary}"))
+
+    def plan(self, teams, since, games_per_team):
+        """
+        One request per cache entry, made as a coach of the team. Coaches
+        who share a cache scope share entries, so each scope is warmed once.
+        """
+        analytics = GameViewSet.as_view({"get": "comprehensive_analytics"})
+        report = GameViewSet.as_view({"get": "post_game_report"})
+        dashboard = GameViewSet.as_view({"get": "dashboard_data"})
+
+        tasks = []
+        dashboards = set()
+        for team in teams:
+            coaches = list(team.coaches.all())
+            scopes = {}
+            for coach in coaches:
+                scope = CacheManager.user_scope(coach)
+                scopes.setdefault((tuple(scope["teams"]), scope["role"]), coach)
+
+            for scope, coach in scopes.items():
+                for filters in ANALYTICS_FILTERS:
+                    label = ", ".join(
+                        f"{name}={value}" for name, value in filters.items()
+                    )
+                    tasks.append(
+                        (
+                            f"{team.name} analytics ({label or 'all games'})",
+                            analytics,
+                            reverse("game-comprehensive-analytics"),
+                            {"team_id": team.id, **filters},
+                            coach,
+                            {},
+                        )
+                    )
+
+                recent = (
+                    Game.objects.filter(Q(home_team=team) | Q(away_team=team))
+                    .filter(game_date__gte=since)
+                    .order_by("-game_date")
+                    .values_list("id", flat=True)[:games_per_team]
+                )
+                for game_id in recent:
+                    tasks.append(
+                        (
+                            f"{team.name} post-game report of game {game_id}",
+                            report,
+                            reverse("game-post-game-report", kwargs={"pk": game_id}),
+                            {"team_id": team.id},
+                            coach,
+                            {"pk": game_id},
+                        )
+                    )
+
+                if scope not in dashboards:
+                    dashboards.add(scope)
+                    tasks.append(
+                        (
+                            f"dashboard of {coach.username}",
+                            dashboard,
+                            reverse("game-dashboard-data"),
+                            {},
+                            coach,
+                            {},
+                        )
+                    )
+        return tasks
@@ -1,9 +1,11 @@
 # apps/games/models.py
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, Count, F, Sum, Value, When
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
 from apps.teams.models import Team
 from apps.competitions.models import Competition
-from apps.core.cache_utils import CacheManager
+from apps.core.cache_utils import CacheManager, GLOBAL_NAMESPACE, invalidation_debouncer
 
 User = get_user_model()
 
@@ -47,6 +49,9 @@ class Game(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True)
     updated_at = models.DateTimeField(auto_now=True, null=True, blank=True)
 
+    # Saves touching only these fields come from live possession tracking
+    SCORE_FIELDS = {"home_team_score", "away_team_score"}
+
     class Meta:
         ordering = ["-game_date"]
         indexes = [
@@ -60,29 +65,43 @@ class Game(models.Model):
     def save(self, *args, **kwargs):
         """Override save to invalidate cache when game data changes"""
         super().save(*args, **kwargs)
-        # Invalidate cache for both teams
-        CacheManager.invalidate_team_cache(self.home_team.id)
-        CacheManager.invalidate_team_cache(self.away_team.id)
-        # Invalidate analytics cache
-        CacheManager.invalidate_pattern("analytics:*")
-        # Invalidate dashboard cache to show new/updated games immediately
-        CacheManager.invalidate_dashboard_cache()
+        update_fields = kwargs.get("update_fields")
+        self.invalidate_caches(
+            debounce=bool(update_fields) and set(update_fields) <= self.SCORE_FIELDS
+        )
+
+    def cache_namespaces(self):
+        """Cache namespaces holding data derived from this game"""
+        return (
+            [f"game:{self.pk}"]
+            + CacheManager.scope_namespaces(
+                [self.home_team_id, self.away_team_id], [], [self.competition_id]
+            )
+            + [GLOBAL_NAMESPACE]
+        )
+
+    def invalidate_caches(self, namespaces=None, debounce=False):
+        """
+        Invalidate cached data derived from this game, at once or, with
+        ``debounce``, coalesced with other changes within a short window
+        """
+        namespaces = namespaces or self.cache_namespaces()
+        if debounce:
+            invalidation_debouncer.mark(f"game:{self.pk}", namespaces)
+            return
+        # Other changes (quarter end, edits, deletion) also flush pending ones
+        invalidation_debouncer.flush(f"game:{self.pk}")
+        # A single generation bump per namespace; cached analytics and
+        # dashboards keyed under the old generations are never read again
+        for namespace in namespaces:
+            CacheManager.bump_generation(namespace)
 
     def delete(self, *args, **kwargs):
         """Override delete to invalidate cache when game is deleted"""
-        # Store team IDs before deletion
-        home_team_id = self.home_team.id
-        away_team_id = self.away_team.id
-        
+        # Collect namespaces while the game still has its primary key
+        namespaces = self.cache_namespaces()
         super().delete(*args, **kwargs)
-        
-        # Invalidate cache for both teams
-        CacheManager.invalidate_team_cache(home_team_id)
-        CacheManager.invalidate_team_cache(away_team_id)
-        # Invalidate analytics cache
-        CacheManager.invalidate_pattern("analytics:*")
-        # Invalidate dashboard cache to remove deleted games immediately
-        CacheManager.invalidate_dashboard_cache()
+        self.invalidate_caches(namespaces)
 
     @property
     def home_team_roster(self):
@@ -241,3 +260,194 @@ class GameRoster(models.Model):
     def is_valid(self):
         """Ensures exactly 12 players total and 5 starting five"""
         return self.players.count() == 12 and self.starting_five.count() == 5
+
+
+class TeamGameStats(models.Model):
+    """
+    Per-game team totals rolled up from possessions.
+
+    Kept current on every possession write (see ``apps.possessions.models``)
+    so season and last-N-games views read one row per game instead of
+    re-aggregating raw possessions.
+    """
+
+    # Counter fields, in the order they are reported
+    COUNTERS = [
+        "possessions",
+        "points",
+        "scoring_possessions",
+        "made_2pts",
+        "missed_2pts",
+        "made_3pts",
+        "missed_3pts",
+        "made_fts",
+        "missed_fts",
+        "turnovers",
+        "offensive_rebounds",
+        "paint_touches",
+        "kick_outs",
+        "extra_passes",
+        "after_timeout_possessions",
+        "assists",
+        "times_stolen",
+        "times_blocked",
+    ]
+    # Counters that mirror a single possession outcome
+    OUTCOME_COUNTERS = {
+        "made_2pts": "MADE_2PTS",
+        "missed_2pts": "MISSED_2PTS",
+        "made_3pts": "MADE_3PTS",
+        "missed_3pts": "MISSED_3PTS",
+        "made_fts": "MADE_FTS",
+        "missed_fts": "MISSED_FTS",
+        "turnovers": "TURNOVER",
+    }
+    # Counters that mirror a boolean possession field
+    FLAG_COUNTERS = {
+        "offensive_rebounds": "is_offensive_rebound",
+        "paint_touches": "has_paint_touch",
+        "kick_outs": "has_kick_out",
+        "extra_passes": "has_extra_pass",
+        "after_timeout_possessions": "after_timeout",
+    }
+    # Counters that mirror an optional player on the possession
+    PLAYER_COUNTERS = {
+        "assists": "assisted_by",
+        "times_stolen": "stolen_by",
+        "times_blocked": "blocked_by",
+    }
+
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name="team_stats")
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name="game_stats")
+
+    possessions = models.PositiveIntegerField(default=0)
+    points = models.IntegerField(default=0)
+    scoring_possessions = models.PositiveIntegerField(default=0)
+    made_2pts = models.PositiveIntegerField(default=0)
+    missed_2pts = models.PositiveIntegerField(default=0)
+    made_3pts = models.PositiveIntegerField(default=0)
+    missed_3pts = models.PositiveIntegerField(default=0)
+    made_fts = models.PositiveIntegerField(default=0)
+    missed_fts = models.PositiveIntegerField(default=0)
+    turnovers = models.PositiveIntegerField(default=0)
+    offensive_rebounds = models.PositiveIntegerField(default=0)
+    paint_touches = models.PositiveIntegerField(default=0)
+    kick_outs = models.PositiveIntegerField(default=0)
+    extra_passes = models.PositiveIntegerField(default=0)
+    after_timeout_possessions = models.PositiveIntegerField(default=0)
+    assists = models.PositiveIntegerField(default=0)
+    times_stolen = models.PositiveIntegerField(default=0)
+    times_blocked = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ["game", "team"]
+        ordering = ["game", "team"]
+        indexes = [
+            models.Index(fields=["team", "game"]),
+        ]
+
+    def __str__(self):
+        return f"{self.team} totals for {self.game}"
+
+    @property
+    def ppp(self):
+        """Points per possession"""
+        return self.points / self.possessions if self.possessions else 0.0
+
+    @classmethod
+    def counters_for(cls, possession):
+        """What a single possession contributes to its team's totals"""
+        counters = {
+            "possessions": 1,
+            "points": possession.points_scored,
+            "scoring_possessions": int(possession.points_scored > 0),
+        }
+        for counter, outcome in cls.OUTCOME_COUNTERS.items():
+            counters[counter] = int(possession.outcome == outcome)
+        for counter, field in cls.FLAG_COUNTERS.items():
+            counters[counter] = int(bool(getattr(possession, field)))
+        for counter, field in cls.PLAYER_COUNTERS.items():
+            counters[counter] = int(getattr(possession, f"{field}_id") is not None)
+        return counters
+
+    @classmethod
+    def counter_fields(cls):
+        """Model fields the contribution of a possession is computed from"""
+        return (
+            ["outcome", "points_scored"]
+            + list(cls.FLAG_COUNTERS.values())
+            + [f"{field}_id" for field in cls.PLAYER_COUNTERS.values()]
+        )
+
+    @classmethod
+    def apply_deltas(cls, game_id, team_id, deltas):
+        """
+        Add signed counter deltas to a (game, team) row. A missing row means
+        the game's totals were never built, so the whole game is rebuilt from
+        its possessions instead; returns True in that case.
+        """
+        deltas = {counter: delta for counter, delta in deltas.items() if delta}
+        if not deltas:
+            return False
+        row, created = cls.objects.get_or_create(game_id=game_id, team_id=team_id)
+        if created:
+            cls.rebuild([game_id])
+            return True
+        cls.objects.filter(pk=row.pk).update(
+            **{counter: F(counter) + delta for counter, delta in deltas.items()}
+        )
+        return False
+
+    @classmethod
+    def totals(cls, **filters):
+        """Sum every counter over the rows matching ``filters``"""
+        return cls.objects.filter(**filters).aggregate(
+            games=Count("game", distinct=True),
+            **{counter: Coalesce(Sum(counter), 0) for counter in cls.COUNTERS},
+        )
+
+    @classmethod
+    def rebuild(cls, game_ids=None):
+        """Recompute rows from possessions, for all games or the given ones"""
+        from apps.possessions.models import Possession
+
+        possessions = Possession.objects.all()
+        rows = cls.objects.all()
+        if game_ids is not None:
+            possessions = possessions.filter(game_id__in=game_ids)
+            rows = rows.filter(game_id__in=game_ids)
+
+        aggregates = {
+            "possessions": Count("id"),
+            "points": Coalesce(Sum("points_scored"), 0),
+            "scoring_possessions": Count(
+                Case(When(points_scored__gt=0, then=Value(1)))
+            ),
+        }
+        for counter, outcome in cls.OUTCOME_COUNTERS.items():
+            aggregates[counter] = Count(Case(When(outcome=outcome, then=Value(1))))
+        for counter, field in cls.FLAG_COUNTERS.items():
+            aggregates[counter] = Count(Case(When(**{field: True}, then=Value(1))))
+        for counter, field in cls.PLAYER_COUNTERS.items():
+            aggregates[counter] = Count(
+                Case(When(**{f"{field}__isnull": False}, then=Value(1)))
+            )
+
+        totals = (
+            possessions.values("game_id", "team__team_id")
+            .annotate(**aggregates)
+            .order_by()
+        )
+        with transaction.atomic():
+            rows.delete()
+            created = cls.objects.bulk_create(
+                cls(
+                    game_id=total.pop("game_id"),
+                    team_id=total.pop("team__team_id"),
+                    **total,
+                )
+                for total in totals
+            )
+        return len(created)
@@ -0,0 +1,245 @@
+# apps/games/play_matching.py
+"""
+Play vocabulary used by the post-game report and a compiled multi-keyword
+matcher that classifies possession sequences into play types in one pass.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+
+from django.core.cache import cache
+
+from apps.plays.models import PLAY_DEFINITIONS_VERSION_KEY, PlayDefinition
+
+logger = logging.getLogger(__name__)
+
+
+# Keywords that identify each play type inside a possession sequence
+PLAY_TYPE_KEYWORDS = {
+    # Transition plays
+    "Fast Break": ["FastBreak", "fast break", "fastbreak", "break"],
+    "Transition": ["Transit", "transition", "BoB", "SoB", "Special"],
+    "Early Off": ["<14s", "early off", "early offense", "quick shot"],
+    # Offensive sets (Set 1-20)
+    "Set 0": ["Set 1", "set 1"],
+    "Set 1": ["Set 2", "set 2"],
+    "Set 2": ["Set 3", "set 3"],
+    # PnR plays
+    "Ball Handler": ["PnR", "pnr", "pick and roll", "ball handler"],
+    "Roll Man": ["Big Guy", "big guy", "roll man", "roll"],
+    "3rd Guy": ["3rd Guy", "third guy", "3rd guy"],
+    # VS PnR Coverage
+    "Switch": ["SWITCH", "switch", "switched"],
+    "Hedge": ["HEDGE", "hedge", "hedging", "show"],
+    "Drop": ["DROP", "drop", "drop coverage", "sag"],
+    "Trap": ["TRAP", "trap", "trapping", "double team"],
+    # Other offensive parts
+    "Closeout": ["Attack CloseOut", "closeout", "close out", "contest"],
+    "Cuts": ["Cuts", "cut", "cutting", "backdoor"],
+    "Kick Out": ["After Kick Out", "Kick Out", "kick out", "kickout", "kick"],
+    "Extra Pass": [
+        "After Ext Pass",
+        "Extra Pass",
+        "extra pass",
+        "ball movement",
+        "pass",
+    ],
+    "After OffReb": ["After Off Reb", "offensive rebound", "off reb", "putback"],
+    # Defense coverage
+    "Switch Low Post": ["SWITCH", "LowPost", "switch", "low post", "post"],
+    "Switch Isolation": ["SWITCH", "ISO", "switch", "isolation", "iso"],
+    "Switch 3rd Guy": ["SWITCH", "3rd Guy", "switch", "3rd guy", "third guy"],
+    "Drop/Weak": ["DROP", "WEAK", "drop", "weak", "sag"],
+    "Drop Ball Handler": ["DROP", "drop", "ball handler", "handler"],
+    "Drop Big Guy": ["DROP", "Big Guy", "drop", "big guy", "center", "post"],
+    "Drop 3rd Guy": ["DROP", "3rd Guy", "drop", "3rd guy", "third guy"],
+    "Isolation": ["ISO", "isolation", "iso", "one on one"],
+    "Isolation High Post": ["ISO", "HighPost", "isolation", "high post", "iso"],
+    "Isolation Low Post": ["ISO", "LowPost", "isolation", "low post", "post"],
+}
+
+
+def play_type_keywords(play_type):
+    """Keywords for a play type, defaulting to its own (lower-cased) name"""
+    return PLAY_TYPE_KEYWORDS.get(play_type, [play_type.lower()])
+
+
+# Post-game report layout: section -> {response key: play type}
+OFFENSIVE_REPORT_SECTIONS = {
+    "transition": {
+        "fast_break": "Fast Break",
+        "transition": "Transition",
+        "early_off": "Early Off",
+    },
+    # Offensive sets analytics (Sets 1-20 based on play definitions)
+    "offensive_sets": {f"set_{i}": f"Set {i}" for i in range(1, 21)},
+    "pnr": {
+        "ball_handler": "Ball Handler",
+        "roll_man": "Roll Man",
+        "third_guy": "3rd Guy",
+    },
+    "vs_pnr_coverage": {
+        "switch": "Switch",
+        "hedge": "Hedge",
+        "drop": "Drop",
+        "trap": "Trap",
+    },
+    "other_offensive": {
+        "closeout": "Closeout",
+        "cuts": "Cuts",
+        "kick_out": "Kick Out",
+        "extra_pass": "Extra Pass",
+        "after_off_reb": "After OffReb",
+    },
+}
+
+DEFENSIVE_REPORT_SECTIONS = {
+    "coverage": {
+        "switch": "Switch",
+        "switch_low_post": "Switch Low Post",
+        "switch_isolation": "Switch Isolation",
+        "switch_third_guy": "Switch 3rd Guy",
+        "hedge": "Hedge",
+        "drop_weak": "Drop/Weak",
+        "drop_ball_handler": "Drop Ball Handler",
+        "drop_big_guy": "Drop Big Guy",
+        "drop_third_guy": "Drop 3rd Guy",
+        "isolation": "Isolation",
+        "isolation_high_post": "Isolation High Post",
+        "isolation_low_post": "Isolation Low Post",
+    },
+}
+
+# Sequence keywords marking a paint touch in the report summary
+PAINT_TOUCH = "paint_touch"
+PAINT_TOUCH_KEYWORDS = ["Paint Touch", "paint", "post", "Lay Up"]
+
+# Compiled matchers kept per process, least recently used dropped first
+MATCHER_CACHE_SIZE = 64
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over case-folded keywords. ``labels_in`` scans a
+    text once and returns the labels of every keyword occurring in it,
+    equivalent to OR-ing one ``icontains`` test per keyword.
+    """
+
+    def __init__(self, keywords):
+        self._goto = [{}]
+        self._fail = [0]
+        self._labels = [set()]
+
+        for keyword, label in keywords:
+            keyword = keyword.casefold()
+            if not keyword:
+                continue
+            node = 0
+            for char in keyword:
+                child = self._goto[node].get(char)
+                if child is None:
+                    child = len(self._goto)
+                    self._goto[node][char] = child
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._labels.append(set())
+                node = child
+            self._labels[node].add(label)
+
+        # Breadth-first pass wiring failure links and inherited labels
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._labels[child] |= self._labels[self._fail[child]]
+
+        self._labels = [frozenset(labels) for labels in self._labels]
+
+    def labels_in(self, text):
+        """Labels of all keywords found anywhere in ``text``"""
+        found = set()
+        if not text:
+            return found
+        goto, fail, labels = self._goto, self._fail, self._labels
+        node = 0
+        for char in text.casefold():
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if labels[node]:
+                found |= labels[node]
+        return found
+
+
+def _report_keywords(definitions):
+    """(keyword, label) pairs for every play type of the report layouts"""
+    play_types = {
+        play_type
+        for sections in (OFFENSIVE_REPORT_SECTIONS, DEFENSIVE_REPORT_SECTIONS)
+        for entries in sections.values()
+        for play_type in entries.values()
+    }
+    by_name = {play_type.casefold(): play_type for play_type in play_types}
+
+    keywords = [
+        (keyword, play_type)
+        for play_type in play_types
+        for keyword in play_type_keywords(play_type)
+    ]
+    keywords += [(keyword, PAINT_TOUCH) for keyword in PAINT_TOUCH_KEYWORDS]
+
+    # A team's play definitions filed under a report play type (by their own
+    # name, parent or UI sub-category) also identify that play type
+    for name, parent_name, subcategory in definitions:
+        for candidate in (name, parent_name, subcategory):
+            play_type = by_name.get((candidate or "").casefold())
+            if play_type:
+                keywords.append((name, play_type))
+    return keywords
+
+
+_matchers: "OrderedDict[int, tuple]" = OrderedDict()
+_matchers_lock = threading.Lock()
+
+
+def _definitions_version():
+    try:
+        cache.add(PLAY_DEFINITIONS_VERSION_KEY, time.time_ns(), None)
+        return cache.get(PLAY_DEFINITIONS_VERSION_KEY)
+    except Exception as e:
+        logger.warning(f"Play definitions version lookup failed: {e}")
+        return None
+
+
+def get_play_type_matcher(team_id):
+    """
+    Compiled matcher for a team's report, cached per process and rebuilt
+    only after play definitions change.
+    """
+    version = _definitions_version()
+    if version is not None:
+        with _matchers_lock:
+            cached = _matchers.get(team_id)
+            if cached and cached[0] == version:
+                _matchers.move_to_end(team_id)
+                return cached[1]
+
+    definitions = PlayDefinition.objects.filter(team_id=team_id).values_list(
+        "name", "parent__name", "subcategory"
+    )
+    matcher = KeywordAutomaton(_report_keywords(definitions))
+
+    if version is not None:
+        with _matchers_lock:
+            _matchers[team_id] = (version, matcher)
+            _matchers.move_to_end(team_id)
+            while len(_matchers) > MATCHER_CACHE_SIZE:
+                _matchers.popitem(last=False)
+    return matcher
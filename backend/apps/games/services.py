@@ -1,12 +1,31 @@
 import json
 from typing import Dict, List, Any, Optional
 from django.db.models import Q, Count, Avg, Sum, F, Case, When, Value, IntegerField
-from django.db.models.functions import Coalesce
+from django.db.models.functions import Coalesce, Trim
 from apps.games.models import Game
-from apps.possessions.models import Possession
+from apps.possessions.models import Possession, PossessionTag
 from apps.teams.models import Team
 from apps.users.models import User
 from apps.core.cache_utils import cache_analytics_data
+from apps.core.spans import span
+from apps.games.play_matching import (
+    DEFENSIVE_REPORT_SECTIONS,
+    OFFENSIVE_REPORT_SECTIONS,
+    PAINT_TOUCH,
+    get_play_type_matcher,
+)
+
+# Possession columns needed to build a post-game report
+REPORT_POSSESSION_FIELDS = (
+    "id",
+    "team__team_id",
+    "opponent__team_id",
+    "quarter",
+    "points_scored",
+    "offensive_sequence",
+    "defensive_sequence",
+    "has_paint_touch",
+)
 
 
 class GameAnalyticsService:
@@ -189,29 +208,34 @@ class GameAnalyticsService:
         ).exclude(defensive_sequence="")
 
         # Summary statistics
-        summary_stats = GameAnalyticsService._calculate_summary_stats(
-            possessions, offensive_possessions, defensive_possessions, team_id
-        )
+        with span("analytics.summary"):
+            summary_stats = GameAnalyticsService._calculate_summary_stats(
+                possessions, offensive_possessions, defensive_possessions, team_id
+            )
 
         # Offensive analysis
-        offensive_analysis = GameAnalyticsService._analyze_offensive_possessions(
-            offensive_possessions, team_id
-        )
+        with span("analytics.offense"):
+            offensive_analysis = GameAnalyticsService._analyze_offensive_possessions(
+                offensive_possessions, team_id
+            )
 
         # Defensive analysis
-        defensive_analysis = GameAnalyticsService._analyze_defensive_possessions(
-            defensive_possessions, team_id
-        )
+        with span("analytics.defense"):
+            defensive_analysis = GameAnalyticsService._analyze_defensive_possessions(
+                defensive_possessions, team_id
+            )
 
         # Player analysis
-        player_analysis = GameAnalyticsService._analyze_player_performance(
-            possessions, team_id, min_possessions
-        )
+        with span("analytics.players"):
+            player_analysis = GameAnalyticsService._analyze_player_performance(
+                possessions, team_id, min_possessions
+            )
 
         # Detailed breakdown
-        detailed_breakdown = GameAnalyticsService._get_detailed_breakdown(
-            possessions, team_id
-        )
+        with span("analytics.breakdown"):
+            detailed_breakdown = GameAnalyticsService._get_detailed_breakdown(
+                possessions, team_id
+            )
 
         return {
             "summary": summary_stats,
@@ -236,28 +260,33 @@ class GameAnalyticsService:
     ):
         """Calculate summary statistics."""
 
-        # Basic counts
-        total_possessions = possessions.count()
-        offensive_count = offensive_possessions.count()
-        defensive_count = defensive_possessions.count()
-
-        # Points analysis
-        total_points = sum(p.points_scored for p in possessions if p.points_scored)
-        offensive_points = sum(
-            p.points_scored for p in offensive_possessions if p.points_scored
+        # Basic counts and points, aggregated in the database
+        totals = possessions.aggregate(
+            total_possessions=Count("id"),
+            total_points=Coalesce(Sum("points_scored"), 0),
+            avg_time=Avg("duration_seconds"),
+        )
+        offensive_totals = offensive_possessions.aggregate(
+            count=Count("id"), points=Coalesce(Sum("points_scored"), 0)
         )
-        defensive_points = sum(
-            p.points_scored for p in defensive_possessions if p.points_scored
+        defensive_totals = defensive_possessions.aggregate(
+            count=Count("id"), points=Coalesce(Sum("points_scored"), 0)
         )
+        total_possessions = totals["total_possessions"]
+        offensive_count = offensive_totals["count"]
+        defensive_count = defensive_totals["count"]
+
+        # Points analysis
+        total_points = totals["total_points"]
+        offensive_points = offensive_totals["points"]
+        defensive_points = defensive_totals["points"]
 
         # PPP calculations
         offensive_ppp = offensive_points / offensive_count if offensive_count > 0 else 0
         defensive_ppp = defensive_points / defensive_count if defensive_count > 0 else 0
 
         # Time analysis
-        avg_possession_time = (
-            possessions.aggregate(avg_time=Avg("duration_seconds"))["avg_time"] or 0
-        )
+        avg_possession_time = totals["avg_time"] or 0
 
         # Game results analysis
         games = Game.objects.filter(
@@ -385,10 +414,8 @@ class GameAnalyticsService:
         """Analyze PnR offensive performance."""
 
         # Filter PnR possessions
-        pnr_possessions = possessions.filter(
-            Q(offensive_sequence__icontains="PnR")
-            | Q(offensive_sequence__icontains="Pick")
-            | Q(offensive_sequence__icontains="Roll")
+        pnr_possessions = PossessionTag.filter_possessions(
+            possessions, ["PnR", "Pick", "Roll"], side=PossessionTag.SideChoices.OFFENSE
         )
 
         if not pnr_possessions.exists():
@@ -420,9 +447,10 @@ class GameAnalyticsService:
     def _analyze_paint_touches(possessions):
         """Analyze paint touch performance."""
 
-        paint_touch_possessions = possessions.filter(
-            Q(offensive_sequence__icontains="Paint Touch")
-            | Q(offensive_sequence__icontains="Paint")
+        paint_touch_possessions = PossessionTag.filter_possessions(
+            possessions,
+            ["Paint Touch", "Paint"],
+            side=PossessionTag.SideChoices.OFFENSE,
         )
 
         if not paint_touch_possessions.exists():
@@ -446,8 +474,8 @@ class GameAnalyticsService:
     def _analyze_kick_outs(possessions):
         """Analyze kick out performance."""
 
-        kick_out_possessions = possessions.filter(
-            offensive_sequence__icontains="Kick Out"
+        kick_out_possessions = PossessionTag.filter_possessions(
+            possessions, ["Kick Out"], side=PossessionTag.SideChoices.OFFENSE
         )
 
         if not kick_out_possessions.exists():
@@ -469,9 +497,8 @@ class GameAnalyticsService:
     def _analyze_extra_passes(possessions):
         """Analyze extra pass performance."""
 
-        extra_pass_possessions = possessions.filter(
-            Q(offensive_sequence__icontains="Extra Pass")
-            | Q(offensive_sequence__icontains="Extra")
+        extra_pass_possessions = PossessionTag.filter_possessions(
+            possessions, ["Extra Pass", "Extra"], side=PossessionTag.SideChoices.OFFENSE
         )
 
         if not extra_pass_possessions.exists():
@@ -495,10 +522,10 @@ class GameAnalyticsService:
     def _analyze_offensive_rebounds(possessions):
         """Analyze offensive rebound performance."""
 
-        off_reb_possessions = possessions.filter(
-            Q(offensive_sequence__icontains="Off Reb")
-            | Q(offensive_sequence__icontains="Offensive Rebound")
-            | Q(offensive_sequence__icontains="TOR")
+        off_reb_possessions = PossessionTag.filter_possessions(
+            possessions,
+            ["Off Reb", "Offensive Rebound", "TOR"],
+            side=PossessionTag.SideChoices.OFFENSE,
         )
 
         if not off_reb_possessions.exists():
@@ -586,10 +613,10 @@ class GameAnalyticsService:
     def _analyze_after_timeout(possessions):
         """Analyze after timeout performance."""
 
-        ato_possessions = possessions.filter(
-            Q(offensive_sequence__icontains="ATO")
-            | Q(offensive_sequence__icontains="After Timeout")
-            | Q(offensive_sequence__icontains="Timeout")
+        ato_possessions = PossessionTag.filter_possessions(
+            possessions,
+            ["ATO", "After Timeout", "Timeout"],
+            side=PossessionTag.SideChoices.OFFENSE,
         )
 
         if not ato_possessions.exists():
@@ -609,11 +636,10 @@ class GameAnalyticsService:
     def _analyze_pnr_defense(defensive_possessions):
         """Analyze PnR defensive performance."""
 
-        pnr_defense = defensive_possessions.filter(
-            Q(defensive_sequence__icontains="PnR")
-            | Q(defensive_sequence__icontains="Switch")
-            | Q(defensive_sequence__icontains="Drop")
-            | Q(defensive_sequence__icontains="Blitz")
+        pnr_defense = PossessionTag.filter_possessions(
+            defensive_possessions,
+            ["PnR", "Switch", "Drop", "Blitz"],
+            side=PossessionTag.SideChoices.DEFENSE,
         )
 
         if not pnr_defense.exists():
@@ -639,8 +665,8 @@ class GameAnalyticsService:
     def _analyze_box_outs(defensive_possessions):
         """Analyze box out performance."""
 
-        box_out_possessions = defensive_possessions.filter(
-            defensive_sequence__icontains="BoxOut"
+        box_out_possessions = PossessionTag.filter_possessions(
+            defensive_possessions, ["BoxOut"], side=PossessionTag.SideChoices.DEFENSE
         )
 
         if not box_out_possessions.exists():
@@ -664,9 +690,10 @@ class GameAnalyticsService:
     def _analyze_defensive_rebounds(defensive_possessions):
         """Analyze defensive rebound performance."""
 
-        def_reb_possessions = defensive_possessions.filter(
-            Q(defensive_sequence__icontains="DefReb")
-            | Q(defensive_sequence__icontains="Defensive Rebound")
+        def_reb_possessions = PossessionTag.filter_possessions(
+            defensive_possessions,
+            ["DefReb", "Defensive Rebound"],
+            side=PossessionTag.SideChoices.DEFENSE,
         )
 
         if not def_reb_possessions.exists():
@@ -680,36 +707,39 @@ class GameAnalyticsService:
     def _analyze_player_performance(possessions, team_id, min_possessions):
         """Analyze individual player performance."""
 
-        # Get all players involved in possessions
-        player_stats = {}
+        # One grouped pass over the players-on-court links of the filter
+        rows = (
+            Possession.players_on_court.through.objects.filter(
+                possession__in=possessions
+            )
+            .alias(
+                offensive_text=Trim("possession__offensive_sequence"),
+                defensive_text=Trim("possession__defensive_sequence"),
+            )
+            .values("user_id", "user__first_name", "user__last_name")
+            .annotate(
+                possession_count=Count("id"),
+                points=Coalesce(Sum("possession__points_scored"), 0),
+                offensive_possessions=Count(
+                    Case(When(offensive_text__gt="", then=Value(1)))
+                ),
+                defensive_possessions=Count(
+                    Case(When(defensive_text__gt="", then=Value(1)))
+                ),
+            )
+            .order_by("user_id")
+        )
 
-        for possession in possessions:
-            # Analyze players on court
-            for player in possession.players_on_court.all():
-                if player.id not in player_stats:
-                    player_stats[player.id] = {
-                        "player_name": f"{player.first_name} {player.last_name}",
-                        "possessions": 0,
-                        "points": 0,
-                        "offensive_possessions": 0,
-                        "defensive_possessions": 0,
-                    }
-
-                player_stats[player.id]["possessions"] += 1
-                if possession.points_scored:
-                    player_stats[player.id]["points"] += possession.points_scored
-
-                # Determine if offensive or defensive possession
-                if (
-                    possession.offensive_sequence
-                    and possession.offensive_sequence.strip()
-                ):
-                    player_stats[player.id]["offensive_possessions"] += 1
-                if (
-                    possession.defensive_sequence
-                    and possession.defensive_sequence.strip()
-                ):
-                    player_stats[player.id]["defensive_possessions"] += 1
+        player_stats = {
+            row["user_id"]: {
+                "player_name": f"{row['user__first_name']} {row['user__last_name']}",
+                "possessions": row["possession_count"],
+                "points": row["points"],
+                "offensive_possessions": row["offensive_possessions"],
+                "defensive_possessions": row["defensive_possessions"],
+            }
+            for row in rows
+        }
 
         # Filter by minimum possessions and calculate PPP
         qualified_players = {}
@@ -791,210 +821,129 @@ class GameAnalyticsService:
         Returns data structured exactly like the UI requirements.
         """
         try:
-            game = Game.objects.get(id=game_id)
-            team_possessions = Possession.objects.filter(
-                game=game, team__team_id=team_id
-            ).prefetch_related("team", "opponent")
-
-            opponent_possessions = Possession.objects.filter(
-                game=game, opponent__team_id=team_id
-            ).prefetch_related("team", "opponent")
-
-            return {
-                "game_info": {
-                    "id": game.id,
-                    "home_team": {
-                        "id": game.home_team.id,
-                        "name": game.home_team.name,
-                        "logo_url": game.home_team.logo_url,
-                    },
-                    "away_team": {
-                        "id": game.away_team.id,
-                        "name": game.away_team.name,
-                        "logo_url": game.away_team.logo_url,
-                    },
-                    "home_score": game.home_team_score,
-                    "away_score": game.away_team_score,
-                    "game_date": game.game_date,
-                },
-                "offence": GameAnalyticsService._calculate_offensive_analytics(
-                    team_possessions
-                ),
-                "defence": GameAnalyticsService._calculate_defensive_analytics(
-                    opponent_possessions
-                ),
-                "summary": GameAnalyticsService._calculate_summary_stats_legacy(
-                    game, team_possessions, opponent_possessions
-                ),
-            }
+            game = Game.objects.select_related("home_team", "away_team").get(id=game_id)
         except Game.DoesNotExist:
             return None
 
-    @staticmethod
-    def _calculate_offensive_analytics(possessions):
-        """Calculate offensive possession analytics."""
-        offensive_possessions = possessions.filter(
-            offensive_sequence__isnull=False
-        ).exclude(offensive_sequence="")
-
-        # Transition analytics
-        transition_data = {
-            "fast_break": GameAnalyticsService._calculate_play_type_stats(
-                offensive_possessions, "Fast Break"
-            ),
-            "transition": GameAnalyticsService._calculate_play_type_stats(
-                offensive_possessions, "Transition"
-            ),
-            "early_off": GameAnalyticsService._calculate_play_type_stats(
-                offensive_possessions, "Early Off"
-            ),
-        }
-
-        # Offensive sets analytics (Sets 1-20 based on play definitions)
-        offensive_sets = {}
-        for i in range(1, 21):  # Sets 1-20
-            offensive_sets[f"set_{i}"] = (
-                GameAnalyticsService._calculate_play_type_stats(
-                    offensive_possessions, f"Set {i}"
+        # Both sides of the report come from a single pass over the game
+        possessions = Possession.objects.filter(
+            Q(team__team_id=team_id) | Q(opponent__team_id=team_id), game=game
+        ).values(*REPORT_POSSESSION_FIELDS)
+
+        with span("report.possessions"):
+            matcher = get_play_type_matcher(team_id)
+            team_rows, opponent_rows = [], []
+            for row in possessions:
+                row["points"] = row["points_scored"] or 0
+                row["offensive_labels"] = matcher.labels_in(row["offensive_sequence"])
+                row["labels"] = row["offensive_labels"] | matcher.labels_in(
+                    row["defensive_sequence"]
                 )
-            )
+                if row["team__team_id"] == team_id:
+                    team_rows.append(row)
+                if row["opponent__team_id"] == team_id:
+                    opponent_rows.append(row)
 
-        # Pick and Roll analytics
-        pnr_data = {
-            "ball_handler": GameAnalyticsService._calculate_play_type_stats(
-                offensive_possessions, "Ball Handler"
-            ),
-            "roll_man": GameAnalyticsService._calculate_play_type_stats(
-                offensive_possessions, "Roll Man"
-            ),
-            "third_guy": GameAnalyticsService._calculate_play_type_stats(
-                offensive_possessions, "3rd Guy"
-            ),
-        }
-
-        # VS PnR Coverage analytics
-        vs_pnr_coverage = {
-            "switch": GameAnalyticsService._calculate_play_type_stats(
-                offensive_possessions, "Switch"
-            ),
-            "hedge": GameAnalyticsService._calculate_play_type_stats(
-                offensive_possessions, "Hedge"
-            ),
-            "drop": GameAnalyticsService._calculate_play_type_stats(
-                offensive_possessions, "Drop"
-            ),
-            "trap": GameAnalyticsService._calculate_play_type_stats(
-                offensive_possessions, "Trap"
-            ),
-        }
-
-        # Other offensive parts
-        other_offensive = {
-            "closeout": GameAnalyticsService._calculate_play_type_stats(
-                offensive_possessions, "Closeout"
-            ),
-            "cuts": GameAnalyticsService._calculate_play_type_stats(
-                offensive_possessions, "Cuts"
-            ),
-            "kick_out": GameAnalyticsService._calculate_play_type_stats(
-                offensive_possessions, "Kick Out"
-            ),
-            "extra_pass": GameAnalyticsService._calculate_play_type_stats(
-                offensive_possessions, "Extra Pass"
+        return {
+            "game_info": {
+                "id": game.id,
+                "home_team": {
+                    "id": game.home_team.id,
+                    "name": game.home_team.name,
+                    "logo_url": game.home_team.logo_url,
+                },
+                "away_team": {
+                    "id": game.away_team.id,
+                    "name": game.away_team.name,
+                    "logo_url": game.away_team.logo_url,
+                },
+                "home_score": game.home_team_score,
+                "away_score": game.away_team_score,
+                "game_date": game.game_date,
+            },
+            "offence": GameAnalyticsService._calculate_offensive_analytics(team_rows),
+            "defence": GameAnalyticsService._calculate_defensive_analytics(
+                opponent_rows
             ),
-            "after_off_reb": GameAnalyticsService._calculate_play_type_stats(
-                offensive_possessions, "After OffReb"
+            "summary": GameAnalyticsService._calculate_summary_stats_legacy(
+                game, team_id, team_rows, opponent_rows
             ),
         }
 
-        return {
-            "transition": transition_data,
-            "offensive_sets": offensive_sets,
-            "pnr": pnr_data,
-            "vs_pnr_coverage": vs_pnr_coverage,
-            "other_offensive": other_offensive,
-        }
+    @staticmethod
+    @span("report.offence")
+    def _calculate_offensive_analytics(team_rows):
+        """Calculate offensive possession analytics."""
+        return GameAnalyticsService._calculate_report_sections(
+            [row for row in team_rows if row["offensive_sequence"]],
+            OFFENSIVE_REPORT_SECTIONS,
+        )
 
     @staticmethod
-    def _calculate_defensive_analytics(opponent_possessions):
+    @span("report.defence")
+    def _calculate_defensive_analytics(opponent_rows):
         """Calculate defensive analytics based on opponent possessions."""
-        defensive_possessions = opponent_possessions.filter(
-            defensive_sequence__isnull=False
-        ).exclude(defensive_sequence="")
+        return GameAnalyticsService._calculate_report_sections(
+            [row for row in opponent_rows if row["defensive_sequence"]],
+            DEFENSIVE_REPORT_SECTIONS,
+        )
 
-        # Coverage analytics
-        coverage_data = {
-            "switch": GameAnalyticsService._calculate_play_type_stats(
-                defensive_possessions, "Switch"
-            ),
-            "switch_low_post": GameAnalyticsService._calculate_play_type_stats(
-                defensive_possessions, "Switch Low Post"
-            ),
-            "switch_isolation": GameAnalyticsService._calculate_play_type_stats(
-                defensive_possessions, "Switch Isolation"
-            ),
-            "switch_third_guy": GameAnalyticsService._calculate_play_type_stats(
-                defensive_possessions, "Switch 3rd Guy"
-            ),
-            "hedge": GameAnalyticsService._calculate_play_type_stats(
-                defensive_possessions, "Hedge"
-            ),
-            "drop_weak": GameAnalyticsService._calculate_play_type_stats(
-                defensive_possessions, "Drop/Weak"
-            ),
-            "drop_ball_handler": GameAnalyticsService._calculate_play_type_stats(
-                defensive_possessions, "Drop Ball Handler"
-            ),
-            "drop_big_guy": GameAnalyticsService._calculate_play_type_stats(
-                defensive_possessions, "Drop Big Guy"
-            ),
-            "drop_third_guy": GameAnalyticsService._calculate_play_type_stats(
-                defensive_possessions, "Drop 3rd Guy"
-            ),
-            "isolation": GameAnalyticsService._calculate_play_type_stats(
-                defensive_possessions, "Isolation"
-            ),
-            "isolation_high_post": GameAnalyticsService._calculate_play_type_stats(
-                defensive_possessions, "Isolation High Post"
-            ),
-            "isolation_low_post": GameAnalyticsService._calculate_play_type_stats(
-                defensive_possessions, "Isolation Low Post"
-            ),
-        }
+    @staticmethod
+    def _calculate_report_sections(rows, sections):
+        """Calculate every play type of a report layout from classified rows."""
+        counts, points = {}, {}
+        for row in rows:
+            for label in row["labels"]:
+                counts[label] = counts.get(label, 0) + 1
+                points[label] = points.get(label, 0) + row["points"]
 
         return {
-            "coverage": coverage_data,
+            section: {
+                key: GameAnalyticsService._format_play_type_stats(
+                    counts.get(play_type, 0), points.get(play_type, 0)
+                )
+                for key, play_type in entries.items()
+            }
+            for section, entries in sections.items()
         }
 
     @staticmethod
-    def _calculate_summary_stats_legacy(game, team_possessions, opponent_possessions):
+    @span("report.summary")
+    def _calculate_summary_stats_legacy(game, team_id, team_rows, opponent_rows):
         """Calculate summary statistics for the report with enhanced player analytics."""
+        from apps.games.models import GameRoster
+
+        total_possessions = len(team_rows)
+
         # Tagging up (player offensive rebounds) - Enhanced with real player data
         tagging_up = {}
-        
-        # Get players from game rosters
-        from apps.games.models import GameRoster
-        try:
-            team_roster = GameRoster.objects.get(game=game, team_id=team_possessions.first().team.team.id if team_possessions.exists() else None)
-            players = team_roster.players.all()[:6]  # Top 6 players
-            
+        roster = (
+            GameRoster.objects.filter(game=game, team_id=team_id).first()
+            if team_rows
+            else None
+        )
+        if roster:
+            players = list(roster.players.all()[:6])  # Top 6 players
+            rebounds = dict(
+                Possession.offensive_rebound_players.through.objects.filter(
+                    possession__game=game,
+                    possession__team__team_id=team_id,
+                    possession__is_offensive_rebound=True,
+                    user__in=players,
+                )
+                .values("user_id")
+                .annotate(count=Count("id"))
+                .values_list("user_id", "count")
+            )
+
             for i, player in enumerate(players):
-                # Count offensive rebounds for this player
-                player_rebounds = team_possessions.filter(
-                    is_offensive_rebound=True,
-                    offensive_rebound_players=player
-                ).count()
-                
+                player_rebounds = rebounds.get(player.id, 0)
                 tagging_up[f"player_{i}"] = {
                     "player_no": player.jersey_number or (i + 1),
                     "count": player_rebounds,
-                    "percentage": (
-                        (player_rebounds / team_possessions.count() * 100)
-                        if team_possessions.count() > 0
-                        else 0
-                    ),
+                    "percentage": player_rebounds / total_possessions * 100,
                 }
-        except GameRoster.DoesNotExist:
+        else:
             # Fallback to placeholder data
             for i in range(6):
                 tagging_up[f"player_{i}"] = {
@@ -1004,57 +953,64 @@ class GameAnalyticsService:
                 }
 
         # Paint touch analytics - Enhanced with proper play definition matching
-        paint_touches = team_possessions.filter(
-            Q(has_paint_touch=True) | 
-            Q(offensive_sequence__icontains="Paint Touch") |
-            Q(offensive_sequence__icontains="paint") |
-            Q(offensive_sequence__icontains="post") |
-            Q(offensive_sequence__icontains="Lay Up")
-        )
+        paint_touches = [
+            row
+            for row in team_rows
+            if row["has_paint_touch"] or PAINT_TOUCH in row["offensive_labels"]
+        ]
         paint_touch_stats = {
-            "count": paint_touches.count(),
-            "points": paint_touches.aggregate(total=Sum("points_scored"))["total"] or 0,
-            "possessions": paint_touches.count(),
+            "count": len(paint_touches),
+            "points": sum(row["points"] for row in paint_touches),
+            "possessions": len(paint_touches),
             "percentage": (
-                (paint_touches.count() / team_possessions.count() * 100)
-                if team_possessions.count() > 0
+                (len(paint_touches) / total_possessions * 100)
+                if total_possessions > 0
                 else 0
             ),
         }
 
         # Best offensive 5 - Enhanced with real player performance
         best_offensive_5 = GameAnalyticsService._calculate_best_players(
-            team_possessions, "offensive", 5
+            Possession.objects.filter(game=game, team__team_id=team_id),
+            "offensive",
+            5,
         )
 
-        # Best defensive 5 - Enhanced with real player performance  
+        # Best defensive 5 - Enhanced with real player performance
         best_defensive_5 = GameAnalyticsService._calculate_best_players(
-            opponent_possessions, "defensive", 5
+            Possession.objects.filter(game=game, opponent__team_id=team_id),
+            "defensive",
+            5,
         )
 
         # Quarters breakdown
+        def quarter_ppp(rows, in_quarter):
+            rows = [row for row in rows if in_quarter(row["quarter"])]
+            if not rows:
+                return 0.0
+            return round(sum(row["points"] for row in rows) / len(rows), 2)
+
+        def in_overtime(value):
+            return value is not None and value > 4
+
         quarters_data = {}
         for quarter in [1, 2, 3, 4]:
-            quarter_team_possessions = team_possessions.filter(quarter=quarter)
-            quarter_opponent_possessions = opponent_possessions.filter(quarter=quarter)
 
-            off_ppp = GameAnalyticsService._calculate_ppp(quarter_team_possessions)
-            def_ppp = GameAnalyticsService._calculate_ppp(quarter_opponent_possessions)
+            def in_quarter(value, quarter=quarter):
+                return value == quarter
 
             quarters_data[f"quarter_{quarter}"] = {
                 "quarter": f'{quarter}{"ST" if quarter == 1 else "ND" if quarter == 2 else "RD" if quarter == 3 else "TH"}',
-                "off_ppp": off_ppp,
-                "def_ppp": def_ppp,
+                "off_ppp": quarter_ppp(team_rows, in_quarter),
+                "def_ppp": quarter_ppp(opponent_rows, in_quarter),
             }
 
         # Add OT if exists
-        ot_possessions = team_possessions.filter(quarter__gt=4)
-        if ot_possessions.exists():
-            ot_opponent_possessions = opponent_possessions.filter(quarter__gt=4)
+        if any(in_overtime(row["quarter"]) for row in team_rows):
             quarters_data["overtime"] = {
                 "quarter": "OT",
-                "off_ppp": GameAnalyticsService._calculate_ppp(ot_possessions),
-                "def_ppp": GameAnalyticsService._calculate_ppp(ot_opponent_possessions),
+                "off_ppp": quarter_ppp(team_rows, in_overtime),
+                "def_ppp": quarter_ppp(opponent_rows, in_overtime),
             }
 
         return {
@@ -1066,31 +1022,16 @@ class GameAnalyticsService:
         }
 
     @staticmethod
-    def _calculate_play_type_stats(possessions, play_type):
-        """Calculate statistics for a specific play type with enhanced sequence parsing."""
-        # Enhanced play type matching with keyword detection
-        play_type_keywords = GameAnalyticsService._get_play_type_keywords(play_type)
-        
-        filtered_possessions = possessions.none()
-        for keyword in play_type_keywords:
-            filtered_possessions |= possessions.filter(
-                Q(offensive_sequence__icontains=keyword)
-                | Q(defensive_sequence__icontains=keyword)
-            )
-
-        if not filtered_possessions.exists():
+    def _format_play_type_stats(total_possessions, total_points):
+        """Shape possession and point totals into play type stats."""
+        if not total_possessions:
             return {
                 "possessions": 0,
                 "ppp": 0.0,
                 "adjusted_sq": 0.0,
             }
 
-        total_possessions = filtered_possessions.count()
-        total_points = (
-            filtered_possessions.aggregate(total=Sum("points_scored"))["total"] or 0
-        )
-
-        ppp = total_points / total_possessions if total_possessions > 0 else 0
+        ppp = total_points / total_possessions
 
         # Adjusted Shot Quality (simplified calculation - using points per possession as proxy)
         adjusted_sq = ppp  # Use PPP as a proxy for shot quality
@@ -1101,111 +1042,60 @@ class GameAnalyticsService:
             "adjusted_sq": round(adjusted_sq, 2),
         }
 
-    @staticmethod
-    def _get_play_type_keywords(play_type):
-        """Get relevant keywords for play type matching based on actual play definitions."""
-        keyword_map = {
-            # Transition plays
-            "Fast Break": ["FastBreak", "fast break", "fastbreak", "break"],
-            "Transition": ["Transit", "transition", "BoB", "SoB", "Special"],
-            "Early Off": ["<14s", "early off", "early offense", "quick shot"],
-            
-            # Offensive sets (Set 1-20)
-            "Set 0": ["Set 1", "set 1"],
-            "Set 1": ["Set 2", "set 2"],
-            "Set 2": ["Set 3", "set 3"],
-            
-            # PnR plays
-            "Ball Handler": ["PnR", "pnr", "pick and roll", "ball handler"],
-            "Roll Man": ["Big Guy", "big guy", "roll man", "roll"],
-            "3rd Guy": ["3rd Guy", "third guy", "3rd guy"],
-            
-            # VS PnR Coverage
-            "Switch": ["SWITCH", "switch", "switched"],
-            "Hedge": ["HEDGE", "hedge", "hedging", "show"],
-            "Drop": ["DROP", "drop", "drop coverage", "sag"],
-            "Trap": ["TRAP", "trap", "trapping", "double team"],
-            
-            # Other offensive parts
-            "Closeout": ["Attack CloseOut", "closeout", "close out", "contest"],
-            "Cuts": ["Cuts", "cut", "cutting", "backdoor"],
-            "Kick Out": ["After Kick Out", "Kick Out", "kick out", "kickout", "kick"],
-            "Extra Pass": ["After Ext Pass", "Extra Pass", "extra pass", "ball movement", "pass"],
-            "After OffReb": ["After Off Reb", "offensive rebound", "off reb", "putback"],
-            
-            # Defense coverage
-            "Switch Low Post": ["SWITCH", "LowPost", "switch", "low post", "post"],
-            "Switch Isolation": ["SWITCH", "ISO", "switch", "isolation", "iso"],
-            "Switch 3rd Guy": ["SWITCH", "3rd Guy", "switch", "3rd guy", "third guy"],
-            "Drop/Weak": ["DROP", "WEAK", "drop", "weak", "sag"],
-            "Drop Ball Handler": ["DROP", "drop", "ball handler", "handler"],
-            "Drop Big Guy": ["DROP", "Big Guy", "drop", "big guy", "center", "post"],
-            "Drop 3rd Guy": ["DROP", "3rd Guy", "drop", "3rd guy", "third guy"],
-            "Isolation": ["ISO", "isolation", "iso", "one on one"],
-            "Isolation High Post": ["ISO", "HighPost", "isolation", "high post", "iso"],
-            "Isolation Low Post": ["ISO", "LowPost", "isolation", "low post", "post"],
-        }
-        
-        return keyword_map.get(play_type, [play_type.lower()])
-
     @staticmethod
     def _calculate_best_players(possessions, performance_type, limit=5):
         """Calculate best performing players based on possessions."""
-        from apps.users.models import User
-        
-        # Get all players involved in possessions
-        player_stats = {}
-        
         if performance_type == "offensive":
             # For offensive performance, look at players who scored or were involved in successful plays
-            for possession in possessions.filter(points_scored__gt=0):
-                # Get players on court for this possession
-                players_on_court = possession.players_on_court.all()
-                for player in players_on_court:
-                    if player.id not in player_stats:
-                        player_stats[player.id] = {
-                            "player": player,
-                            "points": 0,
-                            "possessions": 0,
-                            "efficiency": 0.0
-                        }
-                    player_stats[player.id]["points"] += possession.points_scored
-                    player_stats[player.id]["possessions"] += 1
+            links = Possession.players_on_court.through.objects.filter(
+                possession__in=possessions.filter(points_scored__gt=0)
+            )
         else:
             # For defensive performance, look at possessions where opponent didn't score
-            for possession in possessions.filter(points_scored=0):
-                players_on_court = possession.defensive_players_on_court.all()
-                for player in players_on_court:
-                    if player.id not in player_stats:
-                        player_stats[player.id] = {
-                            "player": player,
-                            "points": 0,
-                            "possessions": 0,
-                            "efficiency": 0.0
-                        }
-                    player_stats[player.id]["possessions"] += 1
-        
-        # Calculate efficiency and sort
-        for player_id, stats in player_stats.items():
-            if stats["possessions"] > 0:
-                stats["efficiency"] = stats["points"] / stats["possessions"]
-        
+            links = Possession.defensive_players_on_court.through.objects.filter(
+                possession__in=possessions.filter(points_scored=0)
+            )
+
+        rows = (
+            links.values(
+                "user_id", "user__first_name", "user__last_name", "user__jersey_number"
+            )
+            .annotate(
+                possession_count=Count("id"),
+                points=Coalesce(Sum("possession__points_scored"), 0),
+            )
+            .order_by("-possession_count", "user_id")
+        )
+
+        player_stats = []
+        for row in rows:
+            # Stops carry no points, so defensive efficiency stays at zero
+            points = row["points"] if performance_type == "offensive" else 0
+            player_stats.append(
+                {
+                    "row": row,
+                    "efficiency": points / row["possession_count"],
+                }
+            )
+
         # Sort by efficiency and get top players
         sorted_players = sorted(
-            player_stats.values(),
-            key=lambda x: x["efficiency"],
-            reverse=True
+            player_stats, key=lambda x: x["efficiency"], reverse=True
         )[:limit]
-        
+
         # Format for response
         players_data = []
         for stats in sorted_players:
-            players_data.append({
-                "id": stats["player"].jersey_number or stats["player"].id,  # Use jersey number if available, fallback to ID
-                "name": f"{stats['player'].first_name} {stats['player'].last_name}".strip(),
-                "stats": round(stats["efficiency"], 2)
-            })
-        
+            row = stats["row"]
+            players_data.append(
+                {
+                    # Use jersey number if available, fallback to ID
+                    "id": row["user__jersey_number"] or row["user_id"],
+                    "name": f"{row['user__first_name']} {row['user__last_name']}".strip(),
+                    "stats": round(stats["efficiency"], 2),
+                }
+            )
+
         # Fill remaining slots with placeholder if needed
         while len(players_data) < limit:
             players_data.append({
@@ -1215,13 +1105,3 @@ class GameAnalyticsService:
             })
         
         return {"players": players_data}
-
-    @staticmethod
-    def _calculate_ppp(possessions):
-        """Calculate Points Per Possession."""
-        if not possessions.exists():
-            return 0.0
-
-        total_points = possessions.aggregate(total=Sum("points_scored"))["total"] or 0
-
-        return round(total_points / possessions.count(), 2)
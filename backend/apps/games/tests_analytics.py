@@ -0,0 +1,262 @@
+import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from apps.competitions.models import Competition
+from apps.games.models import Game, GameRoster
+from apps.games.play_matching import KeywordAutomaton
+from apps.games.services import GameAnalyticsService
+from apps.plays.models import PlayDefinition
+from apps.possessions.models import Possession
+from apps.teams.models import Team
+
+User = get_user_model()
+
+
+class PostGameReportTests(APITestCase):
+    def setUp(self):
+        self.coach = User.objects.create_user(
+            username="coach", password="password", role=User.Role.COACH
+        )
+        self.competition = Competition.objects.create(
+            name="L", season="S", created_by=self.coach
+        )
+        self.team1 = Team.objects.create(
+            name="Team A", competition=self.competition, created_by=self.coach
+        )
+        self.team2 = Team.objects.create(
+            name="Team B", competition=self.competition, created_by=self.coach
+        )
+        self.game = Game.objects.create(
+            competition=self.competition,
+            home_team=self.team1,
+            away_team=self.team2,
+            game_date=datetime.date.today(),
+        )
+        self.home_roster = GameRoster.objects.create(game=self.game, team=self.team1)
+        self.away_roster = GameRoster.objects.create(game=self.game, team=self.team2)
+
+    def create_possession(self, offense, defense, outcome, offensive, defensive=""):
+        return Possession.objects.create(
+            game=self.game,
+            team=offense,
+            opponent=defense,
+            quarter=1,
+            start_time_in_game="10:00",
+            outcome=outcome,
+            offensive_sequence=offensive,
+            defensive_sequence=defensive,
+            created_by=self.coach,
+        )
+
+    def test_play_type_stats(self):
+        """
+        Ensure post-game play type buckets match possessions by sequence keywords.
+        """
+        home, away = self.home_roster, self.away_roster
+        self.create_possession(home, away, "MADE_3PTS", "Set 3 / PnR / Kick Out")
+        self.create_possession(home, away, "MISSED_2PTS", "Set 12 / FastBreak")
+        self.create_possession(home, away, "MADE_2PTS", "Set 1 / Cuts", "SWITCH")
+        self.create_possession(away, home, "MADE_2PTS", "Set 2", "Drop / ISO")
+        self.create_possession(away, home, "TURNOVER", "Set 4", "SWITCH / LowPost")
+
+        report = GameAnalyticsService.get_post_game_report(self.game.id, self.team1.id)
+
+        offence = report["offence"]
+        self.assertEqual(
+            offence["offensive_sets"]["set_3"],
+            {"possessions": 1, "ppp": 3.0, "adjusted_sq": 3.0},
+        )
+        self.assertEqual(offence["offensive_sets"]["set_12"]["possessions"], 1)
+        self.assertEqual(offence["offensive_sets"]["set_12"]["ppp"], 0.0)
+        self.assertEqual(offence["transition"]["fast_break"]["possessions"], 1)
+        self.assertEqual(offence["pnr"]["ball_handler"]["possessions"], 1)
+        self.assertEqual(offence["other_offensive"]["kick_out"]["possessions"], 1)
+        self.assertEqual(offence["vs_pnr_coverage"]["switch"]["possessions"], 1)
+        self.assertEqual(offence["offensive_sets"]["set_20"]["possessions"], 0)
+
+        coverage = report["defence"]["coverage"]
+        self.assertEqual(
+            coverage["switch"], {"possessions": 1, "ppp": 0.0, "adjusted_sq": 0.0}
+        )
+        self.assertEqual(coverage["switch_low_post"]["possessions"], 1)
+        self.assertEqual(coverage["isolation"]["possessions"], 1)
+        self.assertEqual(coverage["drop_weak"]["ppp"], 2.0)
+
+    def test_report_possessions_are_read_once(self):
+        """
+        Ensure the report classifies possessions without per-play-type queries.
+        """
+        home, away = self.home_roster, self.away_roster
+        for _ in range(3):
+            self.create_possession(home, away, "MADE_2PTS", "Set 3 / PnR")
+            self.create_possession(away, home, "MISSED_3PTS", "Set 2", "SWITCH")
+        GameAnalyticsService.get_post_game_report(self.game.id, self.team1.id)
+
+        with CaptureQueriesContext(connection) as queries:
+            GameAnalyticsService.get_post_game_report(self.game.id, self.team1.id)
+        possession_reads = [
+            query
+            for query in queries.captured_queries
+            if 'FROM "possessions_possession"' in query["sql"]
+        ]
+        # One read for the whole report plus one per best-five ranking
+        self.assertEqual(len(possession_reads), 3)
+
+    def test_play_definitions_extend_play_types(self):
+        """
+        Ensure team play definitions filed under a play type are matched, and
+        the compiled matcher picks up definition changes.
+        """
+        home, away = self.home_roster, self.away_roster
+        self.create_possession(home, away, "MADE_2PTS", "Horns Flare")
+
+        report = GameAnalyticsService.get_post_game_report(self.game.id, self.team1.id)
+        self.assertEqual(report["offence"]["offensive_sets"]["set_7"]["possessions"], 0)
+
+        PlayDefinition.objects.create(
+            name="Horns Flare",
+            play_type="OFFENSIVE",
+            team=self.team1,
+            subcategory="Set 7",
+        )
+        report = GameAnalyticsService.get_post_game_report(self.game.id, self.team1.id)
+        self.assertEqual(report["offence"]["offensive_sets"]["set_7"]["possessions"], 1)
+
+    def test_cached_report_follows_play_definition_changes(self):
+        """
+        Ensure a cached post-game report is recomputed once the team's play
+        definitions change.
+        """
+        self.team1.coaches.add(self.coach)
+        self.client.force_authenticate(user=self.coach)
+        self.create_possession(
+            self.home_roster, self.away_roster, "MADE_2PTS", "Horns Flare"
+        )
+        url = reverse("game-post-game-report", kwargs={"pk": self.game.id})
+        self.client.get(url, {"team_id": self.team1.id})
+
+        PlayDefinition.objects.create(
+            name="Horns Flare",
+            play_type="OFFENSIVE",
+            team=self.team1,
+            subcategory="Set 7",
+        )
+        response = self.client.get(url, {"team_id": self.team1.id})
+        self.assertEqual(response["X-Cache"], "MISS")
+        sets = response.data["offence"]["offensive_sets"]
+        self.assertEqual(sets["set_7"]["possessions"], 1)
+
+    def test_player_aggregates_use_constant_queries(self):
+        """
+        Ensure player performance and best-five rankings are grouped in the
+        database, costing the same number of queries for any filter size.
+        """
+        players = [
+            User.objects.create_user(
+                username=f"player{i}",
+                password="password",
+                first_name="Player",
+                last_name=str(i),
+                jersey_number=i + 10,
+            )
+            for i in range(3)
+        ]
+
+        def add_possessions(count):
+            for _ in range(count):
+                scored = self.create_possession(
+                    self.home_roster, self.away_roster, "MADE_3PTS", "Set 1"
+                )
+                scored.players_on_court.set(players[:2])
+                stopped = self.create_possession(
+                    self.away_roster, self.home_roster, "TURNOVER", "", "Drop"
+                )
+                stopped.defensive_players_on_court.set(players[1:])
+
+        def measure():
+            possessions = Possession.objects.filter(game=self.game)
+            with CaptureQueriesContext(connection) as queries:
+                performance = GameAnalyticsService._analyze_player_performance(
+                    possessions, self.team1.id, 1
+                )
+                offensive = GameAnalyticsService._calculate_best_players(
+                    possessions, "offensive", 5
+                )
+                defensive = GameAnalyticsService._calculate_best_players(
+                    possessions, "defensive", 5
+                )
+            return len(queries.captured_queries), performance, offensive, defensive
+
+        add_possessions(2)
+        small_cost = measure()[0]
+        add_possessions(8)
+        cost, performance, offensive, defensive = measure()
+
+        self.assertEqual(cost, small_cost)
+        self.assertEqual(
+            performance["players"][players[0].id],
+            {
+                "player_name": "Player 0",
+                "possessions": 10,
+                "points": 30,
+                "offensive_possessions": 10,
+                "defensive_possessions": 0,
+                "ppp": 3.0,
+                "offensive_ppp": 3.0,
+            },
+        )
+        self.assertNotIn(players[2].id, performance["players"])
+        self.assertEqual(
+            offensive["players"][:2],
+            [
+                {"id": 10, "name": "Player 0", "stats": 3.0},
+                {"id": 11, "name": "Player 1", "stats": 3.0},
+            ],
+        )
+        self.assertEqual(
+            [player["id"] for player in defensive["players"][:2]], [11, 12]
+        )
+        self.assertEqual(defensive["players"][2]["name"], "Player 3")
+
+    def test_warm_caches_precomputes_coach_views(self):
+        """
+        Ensure warm_caches fills the analytics, post-game report and
+        dashboard caches that the team's coaches then hit.
+        """
+        self.team1.coaches.add(self.coach)
+        out = StringIO()
+        call_command("warm_caches", team=[self.team1.id], workers=1, stdout=out)
+        self.assertIn("Cache warmup complete: 9 warmed", out.getvalue())
+
+        self.client.force_authenticate(user=self.coach)
+        analytics = self.client.get(
+            reverse("game-comprehensive-analytics"),
+            {"team_id": self.team1.id, "last_games": 5},
+        )
+        self.assertEqual(analytics["X-Cache"], "HIT")
+        report = self.client.get(
+            reverse("game-post-game-report", kwargs={"pk": self.game.id}),
+            {"team_id": self.team1.id},
+        )
+        self.assertEqual(report["X-Cache"], "HIT")
+        self.assertEqual(
+            self.client.get(reverse("game-dashboard-data"))["X-Cache"], "HIT"
+        )
+
+
+class KeywordAutomatonTests(TestCase):
+    def test_labels_match_case_insensitive_substrings(self):
+        automaton = KeywordAutomaton(
+            [("he", "a"), ("she", "b"), ("his", "c"), ("hers", "d")]
+        )
+        self.assertEqual(automaton.labels_in("uSHErs"), {"a", "b", "d"})
+        self.assertEqual(automaton.labels_in("hi"), set())
+        self.assertEqual(automaton.labels_in(None), set())
@@ -12,6 +12,7 @@ from django.http import HttpRequest
 
 from .models import Game, ScoutingReport, GameRoster
 from apps.teams.models import Team
+from apps.plays.models import PLAYS_NAMESPACE
 from .serializers import GameReadSerializer, GameWriteSerializer, GameListSerializer
 from .roster_serializers import GameRosterSerializer
 from .filters import GameFilter
@@ -25,7 +26,7 @@ from rest_framework.permissions import BasePermission
 from .serializers import GameReadLightweightSerializer  # New import
 from apps.possessions.models import Possession
 from apps.events.models import CalendarEvent
-from apps.core.cache_utils import cache_analytics_data, cache_dashboard_data, CacheManager
+from apps.core.cache_utils import cache_view_response, CacheManager
 
 
 class IsGameRosterPermission(BasePermission):
@@ -181,6 +182,13 @@ class GameViewSet(viewsets.ModelViewSet):
         return serializer.save()
 
     @action(detail=True, methods=["get"], url_path="post-game-report")
+    @cache_view_response(
+        "analytics:post_game_report",
+        timeout=1800,
+        cache_alias="analytics",
+        # Play types are matched against the team's play definitions
+        namespaces=[PLAYS_NAMESPACE],
+    )  # Cache for 30 minutes; keyed by path, so per game
     def post_game_report(self, request, pk=None):
         """
         Get comprehensive post-game analytics report for a specific game and team.
@@ -281,7 +289,12 @@ class GameViewSet(viewsets.ModelViewSet):
             )
 
     @action(detail=False, methods=["get"])
-    @cache_analytics_data(timeout=1800)  # Cache for 30 minutes
+    @cache_view_response(
+        "analytics:comprehensive_analytics",
+        timeout=1800,
+        cache_alias="analytics",
+        max_stale=900,
+    )  # Cache for 30 minutes, serving up to 15 minute old data while refreshing
     def comprehensive_analytics(self, request):
         """
         Get comprehensive analytics with extensive filtering options.
@@ -759,8 +772,9 @@ class GameViewSet(viewsets.ModelViewSet):
         else:
             # Use cached data
             return self._get_dashboard_data_cached(request)
-    
-    @cache_dashboard_data(timeout=60)  # Cache for 1 minute for more real-time updates
+
+    # Cache for 1 minute for more real-time updates; force_refresh skips stale data
+    @cache_view_response("dashboard:dashboard_data", timeout=60, max_stale=300)
     def _get_dashboard_data_cached(self, request):
         """Cached version of dashboard data"""
         return self._get_dashboard_data(request)
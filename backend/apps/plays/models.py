@@ -1,11 +1,20 @@
 # apps/plays/models.py
 
 from django.db import models  # pyright: ignore[reportMissingImports]
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.conf import settings  # pyright: ignore[reportMissingImports]
 from django.utils.translation import (  # pyright: ignore[reportMissingImports]
     gettext_lazy as _,
 )  # pyright: ignore[reportMissingImports]
 
+from apps.core.cache_utils import GENERATION_KEY, CacheManager
+
+# Cache namespace bumped whenever any play definition changes, so cached
+# templates and compiled play matchers in other processes are rebuilt
+PLAYS_NAMESPACE = "plays"
+PLAY_DEFINITIONS_VERSION_KEY = GENERATION_KEY.format(namespace=PLAYS_NAMESPACE)
+
 
 class PlayCategory(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -83,3 +92,10 @@ class PlayDefinition(models.Model):
         if self.parent:
             return f"{self.parent.name} -> {self.name}"
         return self.name
+
+
+@receiver([post_save, post_delete], sender=PlayDefinition)
+@receiver([post_save, post_delete], sender=PlayCategory)
+def bump_play_definitions_version(sender, instance, **kwargs):
+    """Invalidate cached templates and play matchers when a play definition changes"""
+    CacheManager.bump_generation(PLAYS_NAMESPACE)
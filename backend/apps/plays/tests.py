@@ -57,3 +57,26 @@ class PlayAPITests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]["name"], "Horns")
+
+    def test_templates_are_cached_until_plays_change(self):
+        """
+        Ensure play templates are served from the local cache and refreshed
+        when a template play is added.
+        """
+        templates = Team.objects.create(
+            name="Default Play Templates", created_by=self.coach
+        )
+        PlayDefinition.objects.create(
+            name="Horns", team=templates, play_type="OFFENSIVE"
+        )
+
+        self.client.force_authenticate(user=self.coach)
+        url = reverse("play-templates")
+        self.assertEqual(len(self.client.get(url).data), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.client.get(url).data), 1)
+
+        PlayDefinition.objects.create(
+            name="Flex", team=templates, play_type="OFFENSIVE"
+        )
+        self.assertEqual(len(self.client.get(url).data), 2)
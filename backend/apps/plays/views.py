@@ -1,8 +1,9 @@
 # apps/plays/views.py
 
-from .models import PlayDefinition
+from .models import PLAYS_NAMESPACE, PlayDefinition
 from .serializers import PlayDefinitionSerializer, PlayCategory, PlayCategorySerializer
-from apps.teams.models import Team
+from apps.core.cache_utils import local_cache, render_payload
+from apps.teams.models import TEAMS_NAMESPACE, Team
 from apps.users.models import User
 from django.db.models import Q  # pyright: ignore[reportMissingImports]
 from rest_framework import (  # pyright: ignore[reportMissingImports]
@@ -20,6 +21,22 @@ from django_filters.rest_framework import (  # pyright: ignore[reportMissingImpo
 from .filters import PlayCategoryFilter, PlayDefinitionFilter
 from apps.users.permissions import IsTeamScopedObject  # New import
 
+DEFAULT_TEMPLATES_TEAM_NAME = "Default Play Templates"
+
+
+def default_templates_team_id():
+    """Id of the "Default Play Templates" team (None if missing), cached per process"""
+    lookup = local_cache.get_or_set(
+        "teams:default_templates",
+        lambda: {
+            "id": Team.objects.filter(name=DEFAULT_TEMPLATES_TEAM_NAME)
+            .values_list("id", flat=True)
+            .first()
+        },
+        [TEAMS_NAMESPACE],
+    )
+    return lookup["id"]
+
 
 class PlayCategoryViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -54,10 +71,7 @@ class PlayDefinitionViewSet(viewsets.ModelViewSet):
         user_teams = Team.objects.filter(Q(coaches=user) | Q(players=user))
 
         # 2. Get the "Default Play Templates" team.
-        try:
-            default_team = Team.objects.get(name="Default Play Templates")
-        except Team.DoesNotExist:
-            default_team = None
+        default_team = default_templates_team_id()
 
         # 3. Build the final query.
         # A user can see plays that belong to their teams.
@@ -65,7 +79,7 @@ class PlayDefinitionViewSet(viewsets.ModelViewSet):
 
         # If the user is a COACH, they can ALSO see the default templates.
         if user.role == User.Role.COACH and default_team:
-            allowed_plays_query |= Q(team=default_team)
+            allowed_plays_query |= Q(team_id=default_team)
 
         return self.queryset.filter(allowed_plays_query).distinct()
 
@@ -75,17 +89,23 @@ class PlayDefinitionViewSet(viewsets.ModelViewSet):
         Returns the master list of all generic play definitions used for the
         live tracking screen buttons.
         """
-        try:
-            # Find the template team by its specific name
-            template_team = Team.objects.get(name="Default Play Templates")
-            # Filter plays belonging only to that team
-            template_plays = PlayDefinition.objects.filter(team=template_team)
-            serializer = self.get_serializer(template_plays, many=True)
-            return Response(serializer.data)
-        except Team.DoesNotExist:
+        # Find the template team by its specific name
+        template_team = default_templates_team_id()
+        if template_team is None:
             return Response(
                 {
                     "error": "The 'Default Play Templates' team was not found in the database."
                 },
                 status=status.HTTP_404_NOT_FOUND,
             )
+        # Plays belonging only to that team, serialized once per change
+        data = local_cache.get_or_set(
+            f"plays:templates:{template_team}",
+            lambda: render_payload(
+                self.get_serializer(
+                    PlayDefinition.objects.filter(team_id=template_team), many=True
+                ).data
+            ),
+            [PLAYS_NAMESPACE, TEAMS_NAMESPACE],
+        )
+        return Response(data)
@@ -0,0 +1,35 @@
+"""
+Management command to rebuild the canonical lineup keys of possessions.
+"""
+
+from django.core.management.base import BaseCommand
+from apps.possessions.models import Possession
+
+
+class Command(BaseCommand):
+    help = "Recompute offensive/defensive lineup keys from the players on court"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--game",
+            type=int,
+            action="append",
+            dest="games",
+            help="Only rebuild possessions of this game (can be given several times)",
+        )
+
+    def handle(self, *args, **options):
+        possessions = Possession.objects.all()
+        if options["games"]:
+            possessions = possessions.filter(game_id__in=options["games"])
+
+        possession_ids = list(possessions.values_list("id", flat=True))
+        self.stdout.write(
+            f"Rebuilding lineups of {len(possession_ids)} possession(s)..."
+        )
+
+        updated = 0
+        for start in range(0, len(possession_ids), 1000):
+            updated += Possession.sync_lineups(possession_ids[start : start + 1000])
+
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} possession(s)"))
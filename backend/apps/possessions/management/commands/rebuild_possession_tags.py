@@ -0,0 +1,30 @@
+"""
+Management command to rebuild the possession tag index from sequences.
+"""
+
+from django.core.management.base import BaseCommand
+from apps.possessions.models import Possession, PossessionTag
+
+
+class Command(BaseCommand):
+    help = "Re-tokenize offensive/defensive sequences into PossessionTag rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--game",
+            type=int,
+            action="append",
+            dest="games",
+            help="Only rebuild possessions of this game (can be given several times)",
+        )
+
+    def handle(self, *args, **options):
+        possessions = Possession.objects.all()
+        if options["games"]:
+            possessions = possessions.filter(game_id__in=options["games"])
+
+        self.stdout.write(f"Tokenizing {possessions.count()} possession(s)...")
+
+        tags = PossessionTag.rebuild(possessions)
+
+        self.stdout.write(self.style.SUCCESS(f"Created {tags} possession tag(s)"))
@@ -1,13 +1,32 @@
 # backend/apps/possessions/models.py
 
-from django.db import models
+import threading
+from contextlib import contextmanager
+from functools import partial
+
+from django.db import models, transaction
+from django.db.models import F
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
-from django.db.models.signals import post_save, post_delete
+from django.core.cache import cache
+from django.db.models.signals import (
+    post_save,
+    post_delete,
+    pre_save,
+    pre_delete,
+    m2m_changed,
+)
 from django.dispatch import receiver
-from apps.games.models import Game, GameRoster
+from apps.games.models import Game, GameRoster, TeamGameStats
 from apps.users.models import User
+from .splits import (
+    apply_split_deltas,
+    contribution_of,
+    invalidate_all_splits,
+    invalidate_team_splits,
+    next_ticket,
+)
 
 
 class Possession(models.Model):
@@ -260,6 +279,13 @@ class Possession(models.Model):
     defensive_players_on_court = models.ManyToManyField(
         "users.User", related_name="defensive_possessions_on_court", blank=True
     )
+    # Canonical lineup keys (sorted player ids), kept in sync with the above
+    offensive_lineup = models.CharField(
+        max_length=255, blank=True, default="", editable=False
+    )
+    defensive_lineup = models.CharField(
+        max_length=255, blank=True, default="", editable=False
+    )
 
     # Sequence fields for tracking possession actions
     offensive_sequence = models.TextField(
@@ -303,11 +329,32 @@ class Possession(models.Model):
             models.Index(fields=["is_offensive_rebound", "offensive_rebound_count"]),
             models.Index(fields=["shoot_quality", "shoot_time"]),
             models.Index(fields=["after_timeout"]),
+            models.Index(fields=["team", "offensive_lineup"]),
+            models.Index(fields=["opponent", "defensive_lineup"]),
         ]
 
     def __str__(self):
         return f"{self.team} vs {self.opponent} - Q{self.quarter} {self.start_time_in_game} - {self.outcome}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_contribution()
+        return instance
+
+    def _remember_contribution(self):
+        """Remember what this row adds to its game's score, team totals and splits"""
+        self._split_contribution = contribution_of(self)
+        fields = ["game_id", "team_id"] + TeamGameStats.counter_fields()
+        if all(name in self.__dict__ for name in fields):
+            self._contribution = (
+                self.game_id,
+                self.team_id,
+                TeamGameStats.counters_for(self),
+            )
+        else:
+            self._contribution = None
+
     def save(self, *args, **kwargs):
         # Auto-calculate points based on outcome
         if self.outcome == self.OutcomeChoices.MADE_2PTS:
@@ -327,6 +374,55 @@ class Possession(models.Model):
 
         super().save(*args, **kwargs)
 
+    @staticmethod
+    def lineup_key(player_ids):
+        """Canonical key of a set of players: their sorted ids joined by dashes"""
+        return "-".join(str(player_id) for player_id in sorted(set(player_ids)))
+
+    @staticmethod
+    def lineup_players(key):
+        """Player ids encoded in a lineup key"""
+        return [int(player_id) for player_id in key.split("-")] if key else []
+
+    @classmethod
+    def sync_lineups(cls, possession_ids, instance=None):
+        """Recompute the lineup keys of the given possessions from their players"""
+        possession_ids = list(possession_ids)
+        players = {
+            possession_id: {"offensive_lineup": [], "defensive_lineup": []}
+            for possession_id in possession_ids
+        }
+        for field, through in (
+            ("offensive_lineup", cls.players_on_court.through),
+            ("defensive_lineup", cls.defensive_players_on_court.through),
+        ):
+            links = through.objects.filter(
+                possession_id__in=possession_ids
+            ).values_list("possession_id", "user_id")
+            for possession_id, user_id in links:
+                players[possession_id][field].append(user_id)
+
+        updated = [
+            cls(
+                id=possession_id,
+                offensive_lineup=cls.lineup_key(ids["offensive_lineup"]),
+                defensive_lineup=cls.lineup_key(ids["defensive_lineup"]),
+            )
+            for possession_id, ids in players.items()
+        ]
+        # Queryset-level update: no save signals, scores and tags are untouched
+        cls.objects.bulk_update(
+            updated, ["offensive_lineup", "defensive_lineup"], batch_size=500
+        )
+
+        if instance is not None:
+            # Keep the caller's copy current so a later save() does not revert it
+            for possession in updated:
+                if possession.id == instance.pk:
+                    instance.offensive_lineup = possession.offensive_lineup
+                    instance.defensive_lineup = possession.defensive_lineup
+        return len(updated)
+
     @property
     def ppp(self):
         """Points per possession"""
@@ -348,17 +444,397 @@ class Possession(models.Model):
         return self.has_paint_touch or self.has_kick_out or self.has_extra_pass
 
 
-# Signal handlers to update game score when possessions change
+class PossessionTag(models.Model):
+    """
+    One token of a possession sequence, e.g. "PnR" out of
+    "Set 3 / PnR / 2pt / Made". Sequences are tokenized on save so play-type
+    lookups are indexed joins instead of LIKE scans over the raw text.
+
+    Tags are free-form: every "/"-separated fragment is indexed, whether it
+    names a PlayDefinition, an outcome or a jersey number. Play types are
+    resolved to tags by keyword when queried (see ``matching``).
+    """
+
+    class SideChoices(models.TextChoices):
+        OFFENSE = "OFFENSE", _("Offense")
+        DEFENSE = "DEFENSE", _("Defense")
+
+    # Sequence field tokenized into each side
+    SEQUENCE_FIELDS = {
+        SideChoices.OFFENSE: "offensive_sequence",
+        SideChoices.DEFENSE: "defensive_sequence",
+    }
+    VOCABULARY_CACHE_KEY = "possessions:tag_vocabulary"
+
+    possession = models.ForeignKey(
+        Possession, on_delete=models.CASCADE, related_name="tags"
+    )
+    side = models.CharField(max_length=10, choices=SideChoices.choices)
+    # Normalized (case-folded) sequence token
+    tag = models.CharField(max_length=255)
+
+    class Meta:
+        unique_together = ["possession", "side", "tag"]
+        indexes = [
+            models.Index(fields=["tag", "side"]),
+        ]
+
+    def __str__(self):
+        return f"{self.get_side_display()}: {self.tag}"
+
+    @staticmethod
+    def tokenize(sequence):
+        """Split a " / " separated sequence into normalized tags"""
+        if not sequence:
+            return set()
+        return {
+            token.strip().casefold()[:255]
+            for token in sequence.split("/")
+            if token.strip()
+        }
+
+    @classmethod
+    def tags_for(cls, possession):
+        """Set of (side, tag) pairs a possession should be indexed under"""
+        return {
+            (side, tag)
+            for side, field in cls.SEQUENCE_FIELDS.items()
+            for tag in cls.tokenize(getattr(possession, field))
+        }
+
+    @classmethod
+    def sync(cls, possession):
+        """Bring the stored tags of a possession in line with its sequences"""
+        wanted = cls.tags_for(possession)
+        existing = set(
+            cls.objects.filter(possession=possession).values_list("side", "tag")
+        )
+        stale = existing - wanted
+        if stale:
+            stale_filter = models.Q()
+            for side, tag in stale:
+                stale_filter |= models.Q(side=side, tag=tag)
+            cls.objects.filter(stale_filter, possession=possession).delete()
+
+        new = wanted - existing
+        if new:
+            cls.objects.bulk_create(
+                cls(possession=possession, side=side, tag=tag) for side, tag in new
+            )
+            vocabulary = cache.get(cls.VOCABULARY_CACHE_KEY)
+            if vocabulary is not None and not {tag for _, tag in new} <= set(
+                vocabulary
+            ):
+                cache.delete(cls.VOCABULARY_CACHE_KEY)
+
+    @classmethod
+    def rebuild(cls, possessions=None):
+        """Re-tokenize the given possessions (all by default) in bulk"""
+        if possessions is None:
+            possessions = Possession.objects.all()
+        possessions = possessions.only(*cls.SEQUENCE_FIELDS.values())
+
+        with transaction.atomic():
+            cls.objects.filter(possession__in=possessions).delete()
+            created = cls.objects.bulk_create(
+                (
+                    cls(possession=possession, side=side, tag=tag)
+                    for possession in possessions.iterator()
+                    for side, tag in cls.tags_for(possession)
+                ),
+                batch_size=1000,
+            )
+        cache.delete(cls.VOCABULARY_CACHE_KEY)
+        return len(created)
+
+    @classmethod
+    def vocabulary(cls):
+        """Every distinct tag in use, cached until a new tag appears"""
+        vocabulary = cache.get(cls.VOCABULARY_CACHE_KEY)
+        if vocabulary is None:
+            vocabulary = sorted(
+                cls.objects.values_list("tag", flat=True).distinct().order_by()
+            )
+            cache.set(cls.VOCABULARY_CACHE_KEY, vocabulary, None)
+        return vocabulary
+
+    @classmethod
+    def matching(cls, keywords):
+        """Tags containing any of the keywords, case-insensitively"""
+        keywords = [keyword.casefold() for keyword in keywords]
+        return [
+            tag
+            for tag in cls.vocabulary()
+            if any(keyword in tag for keyword in keywords)
+        ]
+
+    @classmethod
+    def filter_possessions(cls, possessions, keywords, side=None):
+        """
+        Narrow ``possessions`` to those tagged with a tag containing any of
+        ``keywords`` (on ``side`` only, if given) via an indexed semi-join.
+        """
+        tags = cls.objects.filter(tag__in=cls.matching(keywords))
+        if side:
+            tags = tags.filter(side=side)
+        return possessions.filter(id__in=tags.values("possession_id"))
+
+
+@receiver(post_save, sender=Possession)
+def sync_possession_tags(sender, instance, **kwargs):
+    """Re-tokenize the offensive/defensive sequences of a saved possession"""
+    PossessionTag.sync(instance)
+
+
+# Signal handlers to keep game scores and team totals in step with possessions
+_score_updates = threading.local()
+
+
+@contextmanager
+def deferred_game_scores():
+    """
+    Suspend per-possession score and team total updates for bulk writes;
+    every game touched inside the block is recomputed once on exit.
+    """
+    if getattr(_score_updates, "pending", None) is not None:
+        # Nested block, the outermost one recomputes
+        yield
+        return
+
+    _score_updates.pending = set()
+    try:
+        yield
+        game_ids = _score_updates.pending
+    finally:
+        _score_updates.pending = None
+
+    recompute_game_totals(game_ids)
+
+
+def _defer_score_update(game_id):
+    pending = getattr(_score_updates, "pending", None)
+    if pending is None:
+        return False
+    pending.add(game_id)
+    return True
+
+
+def recompute_game_totals(game_ids):
+    """Rebuild score and team totals of the given games from their possessions"""
+    TeamGameStats.rebuild(game_ids)
+    for game in Game.objects.filter(id__in=game_ids):
+        transaction.on_commit(
+            partial(invalidate_team_splits, [game.home_team_id, game.away_team_id])
+        )
+        update_game_score(game)
+
+
+def apply_possession_deltas(game, contributions):
+    """
+    Apply ``(roster_id, sign, counters)`` contributions to the game score and
+    the per-team totals with atomic ``F()`` updates, instead of re-aggregating
+    every possession of the game.
+    """
+    roster_teams = dict(
+        GameRoster.objects.filter(
+            id__in={roster_id for roster_id, _, _ in contributions}
+        ).values_list("id", "team_id")
+    )
+
+    team_deltas = {}
+    for roster_id, sign, counters in contributions:
+        team_id = roster_teams.get(roster_id)
+        if team_id is None:
+            continue
+        deltas = team_deltas.setdefault(team_id, {})
+        for counter, value in counters.items():
+            deltas[counter] = deltas.get(counter, 0) + sign * value
+
+    score_deltas = {}
+    for team_id, deltas in team_deltas.items():
+        if team_id == game.home_team_id:
+            score_deltas["home_team_score"] = deltas.get("points", 0)
+        elif team_id == game.away_team_id:
+            score_deltas["away_team_score"] = deltas.get("points", 0)
+    score_deltas = {field: delta for field, delta in score_deltas.items() if delta}
+
+    with transaction.atomic():
+        for team_id, deltas in team_deltas.items():
+            if TeamGameStats.apply_deltas(game.pk, team_id, deltas):
+                # The game was rebuilt, remaining deltas are already counted
+                break
+        if score_deltas:
+            Game.objects.filter(pk=game.pk).update(
+                **{field: F(field) + delta for field, delta in score_deltas.items()}
+            )
+
+    for field, delta in score_deltas.items():
+        setattr(game, field, getattr(game, field) + delta)
+    # Analytics depend on every possession, not just the score
+    game.invalidate_caches(debounce=True)
+
+
+@receiver(pre_save, sender=Possession)
+@receiver(pre_delete, sender=Possession)
+def take_split_ticket(sender, instance, **kwargs):
+    """Order this write against split rebuilds before it reaches the database"""
+    if getattr(_score_updates, "pending", None) is None:
+        instance._split_ticket = next_ticket()
+
+
 @receiver(post_save, sender=Possession)
 def update_game_score_on_possession_save(sender, instance, created, **kwargs):
-    """Update game score when a possession is created or updated"""
-    update_game_score(instance.game)
+    """Update game score and team totals when a possession is created or updated"""
+    previous = None if created else getattr(instance, "_contribution", None)
+    previous_split = None if created else getattr(instance, "_split_contribution", None)
+    instance._remember_contribution()
+
+    if _defer_score_update(instance.game_id):
+        if previous and previous[0] != instance.game_id:
+            _defer_score_update(previous[0])
+        return
+
+    if not created and previous is None:
+        # Unknown prior state (instance not loaded from the database)
+        recompute_game_totals([instance.game_id])
+        return
+
+    contributions = [(instance.team_id, 1, TeamGameStats.counters_for(instance))]
+    if previous:
+        old_game_id, old_roster_id, old_counters = previous
+        if old_game_id != instance.game_id:
+            recompute_game_totals([old_game_id])
+        else:
+            contributions.append((old_roster_id, -1, old_counters))
+    apply_possession_deltas(instance.game, contributions)
+
+    # Cached splits only ever reflect committed possessions
+    split = instance._split_contribution
+    if split is None or (not created and previous_split is None):
+        invalidate_possession_splits(instance)
+    else:
+        transaction.on_commit(
+            partial(
+                apply_split_deltas,
+                [(*split, 1)] + ([(*previous_split, -1)] if previous_split else []),
+                getattr(instance, "_split_ticket", None),
+            )
+        )
+
+
+@receiver(post_delete, sender=Possession)
+def update_game_score_on_possession_delete(sender, instance, origin=None, **kwargs):
+    """Update game score and team totals when a possession is deleted"""
+    if isinstance(origin, Game) or getattr(origin, "model", None) is Game:
+        # The game itself is going away, there is no score left to maintain
+        return
+    if _defer_score_update(instance.game_id):
+        return
+
+    _, roster_id, counters = getattr(instance, "_contribution", None) or (
+        instance.game_id,
+        instance.team_id,
+        TeamGameStats.counters_for(instance),
+    )
+    apply_possession_deltas(instance.game, [(roster_id, -1, counters)])
+
+    split = getattr(instance, "_split_contribution", None) or contribution_of(instance)
+    if split is None:
+        invalidate_possession_splits(instance)
+    else:
+        transaction.on_commit(
+            partial(
+                apply_split_deltas,
+                [(*split, -1)],
+                getattr(instance, "_split_ticket", None),
+            )
+        )
+
+
+@receiver(post_delete, sender=Game)
+def invalidate_splits_on_game_delete(sender, instance, **kwargs):
+    """Drop the splits of both teams of a deleted game"""
+    transaction.on_commit(
+        partial(invalidate_team_splits, [instance.home_team_id, instance.away_team_id])
+    )
 
 
+def invalidate_possession_splits(possession):
+    """
+    Drop the splits of both teams in a possession whose prior state is
+    unknown, once the current transaction commits
+    """
+    roster_ids = {possession.team_id, possession.opponent_id} - {None}
+    transaction.on_commit(partial(_invalidate_roster_splits, roster_ids))
+
+
+def _invalidate_roster_splits(roster_ids):
+    rosters = dict(
+        GameRoster.objects.filter(id__in=roster_ids).values_list("id", "team_id")
+    )
+    if len(rosters) < len(roster_ids):
+        invalidate_all_splits()
+    else:
+        invalidate_team_splits(rosters.values())
+
+
+def invalidate_possession_snapshots(possession):
+    """Mark the stats snapshots of both teams in a possession as stale"""
+    from .snapshot import invalidate_all_snapshots, invalidate_team_snapshots
+
+    roster_ids = {possession.team_id, possession.opponent_id} - {None}
+    rosters = dict(
+        GameRoster.objects.filter(id__in=roster_ids).values_list("id", "team_id")
+    )
+    if len(rosters) < len(roster_ids):
+        # Rosters already gone (cascading delete), scope is unknown
+        invalidate_all_snapshots()
+    else:
+        invalidate_team_snapshots(rosters.values())
+
+
+@receiver(post_save, sender=Possession)
 @receiver(post_delete, sender=Possession)
-def update_game_score_on_possession_delete(sender, instance, **kwargs):
-    """Update game score when a possession is deleted"""
-    update_game_score(instance.game)
+def invalidate_snapshots_on_possession_change(sender, instance, **kwargs):
+    """Invalidate stats snapshots when a possession changes"""
+    invalidate_possession_snapshots(instance)
+
+
+@receiver(m2m_changed, sender=Possession.players_on_court.through)
+@receiver(m2m_changed, sender=Possession.offensive_rebound_players.through)
+def invalidate_snapshots_on_players_change(sender, instance, action, reverse, **kwargs):
+    """Invalidate stats snapshots when on-court or rebounding players change"""
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        invalidate_possession_snapshots(instance)
+        return
+
+    from .snapshot import invalidate_all_snapshots
+
+    # Changed from the user side; the affected possessions are not known here
+    invalidate_all_snapshots()
+
+
+@receiver(m2m_changed, sender=Possession.players_on_court.through)
+@receiver(m2m_changed, sender=Possession.defensive_players_on_court.through)
+def sync_lineups_on_players_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep the canonical lineup keys in sync with the players on court"""
+    if not reverse:
+        if action.startswith("post_"):
+            Possession.sync_lineups([instance.pk], instance=instance)
+        return
+
+    # Changed from the user side: pk_set holds possession ids, except on
+    # clear, where the affected possessions must be captured beforehand
+    if action == "pre_clear":
+        instance._lineup_possession_ids = list(
+            sender.objects.filter(user=instance).values_list("possession_id", flat=True)
+        )
+    elif action == "post_clear":
+        Possession.sync_lineups(getattr(instance, "_lineup_possession_ids", []))
+    elif action in ("post_add", "post_remove"):
+        Possession.sync_lineups(pk_set or [])
 
 
 def update_game_score(game):
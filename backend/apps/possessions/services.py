@@ -1,7 +1,63 @@
-from django.db.models import Count, Sum, Avg, Case, When, Value, F, Q, IntegerField
+from django.db import models
+from django.db.models import Case, F, Q, Value, When
 from django.db.models.functions import Coalesce
+from apps.core.spans import span
+from apps.games.models import Game, TeamGameStats
+from apps.users.models import User
 from .models import Possession
-from apps.games.models import Game
+from .snapshot import Avg, Count, CountIf, PercentIf, Sum, get_snapshot
+from .splits import get_splits, split_rows
+
+
+def _scoring(count="total_possessions", points="total_points", ppp="avg_ppp"):
+    """Offensive aggregates shared by most breakdowns"""
+    return {
+        count: Count(),
+        points: Sum("points_scored"),
+        ppp: Avg("points_scored"),
+    }
+
+
+def _stopping(count="total_possessions", points="points_allowed"):
+    """Defensive aggregates shared by most breakdowns"""
+    return {
+        count: Count(),
+        points: Sum("points_scored"),
+        "avg_points_allowed": Avg("points_scored"),
+        "stops": CountIf("stopped"),
+        "stop_rate": PercentIf("stopped"),
+    }
+
+
+def _per_possession(counter, scale=1.0):
+    return lambda c: c[counter] * scale / c["possessions"]
+
+
+# Quarter and set split columns, derived from the cached sums and counts
+SCORING_SPLIT = {
+    "total_possessions": lambda c: c["possessions"],
+    "total_points": lambda c: c["points"],
+    "avg_ppp": _per_possession("points"),
+    "successful_possessions": lambda c: c["scored"],
+    "success_rate": _per_possession("scored", 100.0),
+}
+OFFENSIVE_SET_SPLIT = {
+    **SCORING_SPLIT,
+    "pnr_possessions": lambda c: c["pnr"],
+    "paint_touch_possessions": lambda c: c["paint_touches"],
+    "kick_out_possessions": lambda c: c["kick_outs"],
+    "extra_pass_possessions": lambda c: c["extra_passes"],
+}
+DEFENSIVE_SET_SPLIT = {
+    "total_possessions": lambda c: c["possessions"],
+    "points_allowed": lambda c: c["points"],
+    "avg_points_allowed": _per_possession("points"),
+    "stops": lambda c: c["stopped"],
+    "stop_rate": _per_possession("stopped", 100.0),
+    "pnr_defense_possessions": lambda c: c["defensive_pnr"],
+    "offensive_rebounds_allowed": lambda c: c["offensive_rebounds_allowed"],
+    "box_outs": lambda c: c["box_outs"],
+}
 
 
 class StatsService:
@@ -9,523 +65,429 @@ class StatsService:
 
     def __init__(self, team):
         self.team = team
+        self._snapshot = None
+
+    @property
+    def snapshot(self):
+        """Columnar possession snapshot, loaded once per service instance"""
+        if self._snapshot is None:
+            with span("stats.snapshot"):
+                self._snapshot = get_snapshot(self.team)
+        return self._snapshot
 
     def _get_base_queryset(self, offensive=True, game_range=None):
-        """Get base queryset for the team's possessions"""
-        if offensive:
-            queryset = Possession.objects.filter(team__team=self.team)
-        else:
-            queryset = Possession.objects.filter(opponent__team=self.team)
-        
-        queryset = queryset.select_related("game", "team", "team__team", "opponent", "opponent__team")
+        """Get base row mask for the team's possessions"""
+        mask = self.snapshot.mask(offensive=offensive)
 
         if game_range:
             # Get recent games based on game_range
-            from django.db.models import Q
-            recent_games = Game.objects.filter(
-                Q(home_team=self.team) | Q(away_team=self.team)
-            ).order_by("-game_date")[:game_range]
-            queryset = queryset.filter(game__in=recent_games)
+            recent_games = (
+                Game.objects.filter(Q(home_team=self.team) | Q(away_team=self.team))
+                .order_by("-game_date")
+                .values_list("id", flat=True)[:game_range]
+            )
+            mask &= self.snapshot.in_games(recent_games)
 
-        return queryset
+        return mask
 
+    @span("stats.quarters")
     def get_quarter_stats(self, offensive=True):
         """Get stats broken down by quarter"""
-        queryset = self._get_base_queryset(offensive)
-
-        stats = (
-            queryset.values("quarter")
-            .annotate(
-                total_possessions=Count("id"),
-                total_points=Sum("points_scored"),
-                avg_ppp=Coalesce(Avg("points_scored"), 0.0),
-                successful_possessions=Count(
-                    Case(When(points_scored__gt=0, then=Value(1)))
-                ),
-                success_rate=Coalesce(
-                    Count(Case(When(points_scored__gt=0, then=Value(1))))
-                    * 100.0
-                    / Count("id"),
-                    0.0,
-                ),
-            )
-            .order_by("quarter")
+        splits = get_splits(self.team.id)["offense" if offensive else "defense"]
+        stats = split_rows(
+            splits["quarter"], "quarter", SCORING_SPLIT, order_by="quarter"
         )
 
         return {
             "team": self.team.name,
             "offensive": offensive,
-            "quarter_stats": list(stats),
+            "quarter_stats": stats,
         }
 
+    @span("stats.offensive_sets")
     def get_offensive_set_stats(self):
         """Get stats by offensive sets"""
-        queryset = self._get_base_queryset(offensive=True)
-
-        stats = (
-            queryset.values("offensive_set")
-            .annotate(
-                total_possessions=Count("id"),
-                total_points=Sum("points_scored"),
-                avg_ppp=Coalesce(Avg("points_scored"), 0.0),
-                successful_possessions=Count(
-                    Case(When(points_scored__gt=0, then=Value(1)))
-                ),
-                success_rate=Coalesce(
-                    Count(Case(When(points_scored__gt=0, then=Value(1))))
-                    * 100.0
-                    / Count("id"),
-                    0.0,
-                ),
-                pnr_possessions=Count(
-                    Case(When(pnr_type__isnull=False, then=Value(1)))
-                ),
-                paint_touch_possessions=Count(
-                    Case(When(has_paint_touch=True, then=Value(1)))
-                ),
-                kick_out_possessions=Count(
-                    Case(When(has_kick_out=True, then=Value(1)))
-                ),
-                extra_pass_possessions=Count(
-                    Case(When(has_extra_pass=True, then=Value(1)))
-                ),
-            )
-            .order_by("-total_possessions")
+        stats = split_rows(
+            get_splits(self.team.id)["offense"]["offensive_set"],
+            "offensive_set",
+            OFFENSIVE_SET_SPLIT,
+            order_by="-total_possessions",
         )
 
-        return {"team": self.team.name, "offensive_set_stats": list(stats)}
+        return {"team": self.team.name, "offensive_set_stats": stats}
 
+    @span("stats.defensive_sets")
     def get_defensive_set_stats(self):
         """Get stats by defensive sets"""
-        queryset = self._get_base_queryset(offensive=False)
-
-        stats = (
-            queryset.values("defensive_set")
-            .annotate(
-                total_possessions=Count("id"),
-                points_allowed=Sum("points_scored"),
-                avg_points_allowed=Coalesce(Avg("points_scored"), 0.0),
-                stops=Count(Case(When(points_scored=0, then=Value(1)))),
-                stop_rate=Coalesce(
-                    Count(Case(When(points_scored=0, then=Value(1))))
-                    * 100.0
-                    / Count("id"),
-                    0.0,
-                ),
-                pnr_defense_possessions=Count(
-                    Case(When(defensive_pnr__isnull=False, then=Value(1)))
-                ),
-                offensive_rebounds_allowed=Sum("offensive_rebounds_allowed"),
-                box_outs=Sum("box_out_count"),
-            )
-            .order_by("-total_possessions")
+        stats = split_rows(
+            get_splits(self.team.id)["defense"]["defensive_set"],
+            "defensive_set",
+            DEFENSIVE_SET_SPLIT,
+            order_by="-total_possessions",
         )
 
-        return {"team": self.team.name, "defensive_set_stats": list(stats)}
+        return {"team": self.team.name, "defensive_set_stats": stats}
 
+    @span("stats.pnr")
     def get_pnr_stats(self, offensive=True):
         """Get pick and roll statistics"""
-        queryset = self._get_base_queryset(offensive)
+        mask = self._get_base_queryset(offensive)
 
         if offensive:
-            stats = (
-                queryset.filter(pnr_type__isnull=False)
-                .values("pnr_type", "pnr_result")
-                .annotate(
-                    total_possessions=Count("id"),
-                    total_points=Sum("points_scored"),
-                    avg_ppp=Coalesce(Avg("points_scored"), 0.0),
-                    successful_possessions=Count(
-                        Case(When(points_scored__gt=0, then=Value(1)))
-                    ),
-                    success_rate=Coalesce(
-                        Count(Case(When(points_scored__gt=0, then=Value(1))))
-                        * 100.0
-                        / Count("id"),
-                        0.0,
-                    ),
-                )
-                .order_by("-total_possessions")
+            stats = self.snapshot.group_by(
+                ["pnr_type", "pnr_result"],
+                mask & self.snapshot.column("pnr_type_tagged"),
+                order_by="-total_possessions",
+                **_scoring(),
+                successful_possessions=CountIf("scored"),
+                success_rate=PercentIf("scored"),
             )
         else:
-            stats = (
-                queryset.filter(defensive_pnr__isnull=False)
-                .values("defensive_pnr")
-                .annotate(
-                    total_possessions=Count("id"),
-                    points_allowed=Sum("points_scored"),
-                    avg_points_allowed=Coalesce(Avg("points_scored"), 0.0),
-                    stops=Count(Case(When(points_scored=0, then=Value(1)))),
-                    stop_rate=Coalesce(
-                        Count(Case(When(points_scored=0, then=Value(1))))
-                        * 100.0
-                        / Count("id"),
-                        0.0,
-                    ),
-                )
-                .order_by("-total_possessions")
+            stats = self.snapshot.group_by(
+                ["defensive_pnr"],
+                mask & self.snapshot.column("defensive_pnr_tagged"),
+                order_by="-total_possessions",
+                **_stopping(),
             )
 
         return {
             "team": self.team.name,
             "offensive": offensive,
-            "pnr_stats": list(stats),
+            "pnr_stats": stats,
         }
 
+    @span("stats.outcomes")
     def get_outcome_stats(self, offensive=True):
         """Get statistics by outcomes"""
-        queryset = self._get_base_queryset(offensive)
+        mask = self._get_base_queryset(offensive)
 
-        stats = (
-            queryset.values("outcome")
-            .annotate(
-                total_possessions=Count("id"),
-                total_points=Sum("points_scored"),
-                avg_ppp=Coalesce(Avg("points_scored"), 0.0),
-            )
-            .order_by("-total_possessions")
+        stats = self.snapshot.group_by(
+            ["outcome"], mask, order_by="-total_possessions", **_scoring()
         )
 
         return {
             "team": self.team.name,
             "offensive": offensive,
-            "outcome_stats": list(stats),
+            "outcome_stats": stats,
         }
 
+    @span("stats.sequences")
     def get_sequence_stats(self):
         """Get sequence action statistics (paint touch, kick out, extra pass)"""
-        queryset = self._get_base_queryset(offensive=True)
-
-        # Paint touch stats
-        paint_touch_stats = queryset.filter(has_paint_touch=True).aggregate(
-            total_possessions=Count("id"),
-            total_points=Sum("points_scored"),
-            avg_ppp=Coalesce(Avg("points_scored"), 0.0),
-            success_rate=Coalesce(
-                Count(Case(When(points_scored__gt=0, then=Value(1))))
-                * 100.0
-                / Count("id"),
-                0.0,
-            ),
-        )
-
-        # Kick out stats
-        kick_out_stats = queryset.filter(has_kick_out=True).aggregate(
-            total_possessions=Count("id"),
-            total_points=Sum("points_scored"),
-            avg_ppp=Coalesce(Avg("points_scored"), 0.0),
-            success_rate=Coalesce(
-                Count(Case(When(points_scored__gt=0, then=Value(1))))
-                * 100.0
-                / Count("id"),
-                0.0,
-            ),
-        )
-
-        # Extra pass stats
-        extra_pass_stats = queryset.filter(has_extra_pass=True).aggregate(
-            total_possessions=Count("id"),
-            total_points=Sum("points_scored"),
-            avg_ppp=Coalesce(Avg("points_scored"), 0.0),
-            success_rate=Coalesce(
-                Count(Case(When(points_scored__gt=0, then=Value(1))))
-                * 100.0
-                / Count("id"),
-                0.0,
-            ),
-        )
+        snapshot = self.snapshot
+        mask = self._get_base_queryset(offensive=True)
+
+        def action_stats(flag):
+            return snapshot.aggregate(
+                mask & snapshot.column(flag),
+                **_scoring(),
+                success_rate=PercentIf("scored"),
+            )
 
         # Pass count distribution
-        pass_distribution = (
-            queryset.values("number_of_passes")
-            .annotate(
-                count=Count("id"),
-                total_points=Sum("points_scored"),
-                avg_ppp=Coalesce(Avg("points_scored"), 0.0),
-            )
-            .order_by("number_of_passes")
+        pass_distribution = snapshot.group_by(
+            ["number_of_passes"],
+            mask,
+            order_by="number_of_passes",
+            **_scoring(count="count"),
         )
 
         return {
             "team": self.team.name,
-            "paint_touch": paint_touch_stats,
-            "kick_out": kick_out_stats,
-            "extra_pass": extra_pass_stats,
-            "pass_distribution": list(pass_distribution),
+            "paint_touch": action_stats("has_paint_touch"),
+            "kick_out": action_stats("has_kick_out"),
+            "extra_pass": action_stats("has_extra_pass"),
+            "pass_distribution": pass_distribution,
         }
 
+    @span("stats.offensive_rebounds")
     def get_offensive_rebound_stats(self):
         """Get offensive rebound statistics"""
-        queryset = self._get_base_queryset(offensive=True)
+        snapshot = self.snapshot
+        mask = self._get_base_queryset(offensive=True)
+        oreb_mask = mask & snapshot.column("is_offensive_rebound")
 
         # Overall offensive rebound stats
-        overall_stats = queryset.filter(is_offensive_rebound=True).aggregate(
-            total_offensive_rebounds=Count("id"),
+        overall_stats = snapshot.aggregate(
+            oreb_mask,
+            total_offensive_rebounds=Count(),
             total_points_after_oreb=Sum("points_scored"),
-            avg_points_after_oreb=Coalesce(Avg("points_scored"), 0.0),
-            success_rate_after_oreb=Coalesce(
-                Count(Case(When(points_scored__gt=0, then=Value(1))))
-                * 100.0
-                / Count("id"),
-                0.0,
-            ),
+            avg_points_after_oreb=Avg("points_scored"),
+            success_rate_after_oreb=PercentIf("scored"),
         )
 
         # Offensive rebound count distribution
-        oreb_count_stats = (
-            queryset.values("offensive_rebound_count")
-            .annotate(
-                count=Count("id"),
-                total_points=Sum("points_scored"),
-                avg_ppp=Coalesce(Avg("points_scored"), 0.0),
-            )
-            .order_by("offensive_rebound_count")
+        oreb_count_stats = snapshot.group_by(
+            ["offensive_rebound_count"],
+            mask,
+            order_by="offensive_rebound_count",
+            **_scoring(count="count"),
         )
 
         # Players involved in offensive rebounds
-        player_oreb_stats = (
-            queryset.filter(is_offensive_rebound=True)
-            .values("offensive_rebound_players__username")
-            .annotate(
-                offensive_rebounds=Count("id"),
-                points_after_oreb=Sum("points_scored"),
-                avg_points_after_oreb=Coalesce(Avg("points_scored"), 0.0),
-            )
-            .order_by("-offensive_rebounds")
+        player_oreb_stats = snapshot.group_by_related(
+            "offensive_rebound_players",
+            "offensive_rebound_players__username",
+            oreb_mask,
+            order_by="-offensive_rebounds",
+            offensive_rebounds=Count(),
+            points_after_oreb=Sum("points_scored"),
+            avg_points_after_oreb=Avg("points_scored"),
         )
 
         return {
             "team": self.team.name,
             "overall_stats": overall_stats,
-            "oreb_count_distribution": list(oreb_count_stats),
-            "player_stats": list(player_oreb_stats),
+            "oreb_count_distribution": oreb_count_stats,
+            "player_stats": player_oreb_stats,
         }
 
+    @span("stats.box_outs")
     def get_box_out_stats(self):
         """Get box out and defensive rebound statistics"""
-        queryset = self._get_base_queryset(offensive=False)
+        mask = self._get_base_queryset(offensive=False)
 
         # Overall box out stats
-        overall_stats = queryset.aggregate(
-            total_possessions=Count("id"),
+        overall_stats = self.snapshot.aggregate(
+            mask,
+            total_possessions=Count(),
             total_box_outs=Sum("box_out_count"),
-            avg_box_outs_per_possession=Coalesce(Avg("box_out_count"), 0.0),
+            avg_box_outs_per_possession=Avg("box_out_count"),
             offensive_rebounds_allowed=Sum("offensive_rebounds_allowed"),
-            defensive_rebounds=Count(Case(When(points_scored=0, then=Value(1)))),
-            defensive_rebound_rate=Coalesce(
-                Count(Case(When(points_scored=0, then=Value(1)))) * 100.0 / Count("id"),
-                0.0,
-            ),
+            defensive_rebounds=CountIf("stopped"),
+            defensive_rebound_rate=PercentIf("stopped"),
         )
 
         # Box out effectiveness
-        box_out_effectiveness = (
-            queryset.values("box_out_count")
-            .annotate(
-                count=Count("id"),
-                offensive_rebounds_allowed=Sum("offensive_rebounds_allowed"),
-                defensive_rebounds=Count(Case(When(points_scored=0, then=Value(1)))),
-            )
-            .order_by("box_out_count")
+        box_out_effectiveness = self.snapshot.group_by(
+            ["box_out_count"],
+            mask,
+            order_by="box_out_count",
+            count=Count(),
+            offensive_rebounds_allowed=Sum("offensive_rebounds_allowed"),
+            defensive_rebounds=CountIf("stopped"),
         )
 
         return {
             "team": self.team.name,
             "overall_stats": overall_stats,
-            "box_out_effectiveness": list(box_out_effectiveness),
+            "box_out_effectiveness": box_out_effectiveness,
         }
 
+    @span("stats.shooting")
     def get_shooting_stats(self):
         """Get shooting quality and timing statistics"""
-        queryset = self._get_base_queryset(offensive=True)
-
-        # Shoot time distribution
-        shoot_time_stats = (
-            queryset.values("shoot_time")
-            .annotate(
-                count=Count("id"),
-                total_points=Sum("points_scored"),
-                avg_ppp=Coalesce(Avg("points_scored"), 0.0),
-                success_rate=Coalesce(
-                    Count(Case(When(points_scored__gt=0, then=Value(1))))
-                    * 100.0
-                    / Count("id"),
-                    0.0,
-                ),
-            )
-            .order_by("shoot_time")
-        )
-
-        # Shoot quality distribution
-        shoot_quality_stats = (
-            queryset.values("shoot_quality")
-            .annotate(
-                count=Count("id"),
-                total_points=Sum("points_scored"),
-                avg_ppp=Coalesce(Avg("points_scored"), 0.0),
-                success_rate=Coalesce(
-                    Count(Case(When(points_scored__gt=0, then=Value(1))))
-                    * 100.0
-                    / Count("id"),
-                    0.0,
-                ),
-            )
-            .order_by("shoot_quality")
-        )
-
-        # Time range distribution
-        time_range_stats = (
-            queryset.values("time_range")
-            .annotate(
-                count=Count("id"),
-                total_points=Sum("points_scored"),
-                avg_ppp=Coalesce(Avg("points_scored"), 0.0),
-                success_rate=Coalesce(
-                    Count(Case(When(points_scored__gt=0, then=Value(1))))
-                    * 100.0
-                    / Count("id"),
-                    0.0,
-                ),
+        mask = self._get_base_queryset(offensive=True)
+
+        def distribution(field):
+            return self.snapshot.group_by(
+                [field],
+                mask,
+                order_by=field,
+                **_scoring(count="count"),
+                success_rate=PercentIf("scored"),
             )
-            .order_by("time_range")
-        )
 
         return {
             "team": self.team.name,
-            "shoot_time_stats": list(shoot_time_stats),
-            "shoot_quality_stats": list(shoot_quality_stats),
-            "time_range_stats": list(time_range_stats),
+            "shoot_time_stats": distribution("shoot_time"),
+            "shoot_quality_stats": distribution("shoot_quality"),
+            "time_range_stats": distribution("time_range"),
         }
 
+    @span("stats.timeouts")
     def get_timeout_stats(self):
         """Get after timeout statistics"""
-        queryset = self._get_base_queryset(offensive=True)
-
-        # After timeout stats
-        after_timeout_stats = queryset.filter(after_timeout=True).aggregate(
-            total_possessions=Count("id"),
-            total_points=Sum("points_scored"),
-            avg_ppp=Coalesce(Avg("points_scored"), 0.0),
-            success_rate=Coalesce(
-                Count(Case(When(points_scored__gt=0, then=Value(1))))
-                * 100.0
-                / Count("id"),
-                0.0,
-            ),
-        )
+        snapshot = self.snapshot
+        mask = self._get_base_queryset(offensive=True)
+        after_timeout = snapshot.column("after_timeout")
 
-        # Regular possession stats (not after timeout)
-        regular_stats = queryset.filter(after_timeout=False).aggregate(
-            total_possessions=Count("id"),
-            total_points=Sum("points_scored"),
-            avg_ppp=Coalesce(Avg("points_scored"), 0.0),
-            success_rate=Coalesce(
-                Count(Case(When(points_scored__gt=0, then=Value(1))))
-                * 100.0
-                / Count("id"),
-                0.0,
-            ),
-        )
+        def timeout_stats(selected):
+            return snapshot.aggregate(
+                selected, **_scoring(), success_rate=PercentIf("scored")
+            )
 
         return {
             "team": self.team.name,
-            "after_timeout": after_timeout_stats,
-            "regular_possessions": regular_stats,
+            "after_timeout": timeout_stats(mask & after_timeout),
+            "regular_possessions": timeout_stats(mask & ~after_timeout),
         }
 
+    @span("stats.lineups")
     def get_lineup_stats(self, min_possessions=10):
         """Get lineup statistics with minimum possession threshold"""
-        queryset = self._get_base_queryset(offensive=True)
+        snapshot = self.snapshot
 
         # Get lineups that meet minimum possession threshold
-        lineup_stats = (
-            queryset.values("players_on_court__username")
-            .annotate(
-                possessions=Count("id"),
-                total_points=Sum("points_scored"),
-                avg_ppp=Coalesce(Avg("points_scored"), 0.0),
-                success_rate=Coalesce(
-                    Count(Case(When(points_scored__gt=0, then=Value(1))))
-                    * 100.0
-                    / Count("id"),
-                    0.0,
-                ),
-            )
-            .filter(possessions__gte=min_possessions)
-            .order_by("-avg_ppp")
+        lineup_stats = snapshot.group_by_related(
+            "players_on_court",
+            "players_on_court__username",
+            self._get_base_queryset(offensive=True),
+            order_by="-avg_ppp",
+            **_scoring(count="possessions"),
+            success_rate=PercentIf("scored"),
         )
 
         # Defensive lineup stats
-        defensive_queryset = self._get_base_queryset(offensive=False)
-        defensive_lineup_stats = (
-            defensive_queryset.values("players_on_court__username")
+        defensive_lineup_stats = snapshot.group_by_related(
+            "players_on_court",
+            "players_on_court__username",
+            self._get_base_queryset(offensive=False),
+            order_by="avg_points_allowed",
+            **_stopping(count="possessions"),
+        )
+
+        return {
+            "team": self.team.name,
+            "min_possessions": min_possessions,
+            "offensive_lineups": [
+                row for row in lineup_stats if row["possessions"] >= min_possessions
+            ],
+            "defensive_lineups": [
+                row
+                for row in defensive_lineup_stats
+                if row["possessions"] >= min_possessions
+            ],
+        }
+
+    @span("stats.five_man_lineups")
+    def get_five_man_lineup_stats(self, min_possessions=10):
+        """
+        Get offensive and defensive ratings per canonical lineup, from a single
+        GROUP BY over the lineup keys. Lineups need ``min_possessions`` played
+        on either end of the floor.
+        """
+        on_offense = Q(team__team_id=self.team.id)
+        on_defense = Q(opponent__team_id=self.team.id)
+
+        rows = (
+            Possession.objects.filter(on_offense | on_defense)
             .annotate(
-                possessions=Count("id"),
-                points_allowed=Sum("points_scored"),
-                avg_points_allowed=Coalesce(Avg("points_scored"), 0.0),
-                stops=Count(Case(When(points_scored=0, then=Value(1)))),
-                stop_rate=Coalesce(
-                    Count(Case(When(points_scored=0, then=Value(1))))
-                    * 100.0
-                    / Count("id"),
-                    0.0,
+                lineup=Case(
+                    When(on_offense, then=F("offensive_lineup")),
+                    default=F("defensive_lineup"),
+                )
+            )
+            .exclude(lineup="")
+            .values("lineup")
+            .annotate(
+                possessions=models.Count(Case(When(on_offense, then=Value(1)))),
+                points=Coalesce(
+                    models.Sum(Case(When(on_offense, then=F("points_scored")))), 0
+                ),
+                opponent_possessions=models.Count(
+                    Case(When(on_defense, then=Value(1)))
+                ),
+                opponent_points=Coalesce(
+                    models.Sum(Case(When(on_defense, then=F("points_scored")))), 0
                 ),
             )
-            .filter(possessions__gte=min_possessions)
-            .order_by("avg_points_allowed")
+            .order_by()
+        )
+        rows = [
+            row
+            for row in rows
+            if row["possessions"] + row["opponent_possessions"] >= min_possessions
+        ]
+
+        player_ids = {
+            player_id
+            for row in rows
+            for player_id in Possession.lineup_players(row["lineup"])
+        }
+        usernames = dict(
+            User.objects.filter(id__in=player_ids).values_list("id", "username")
         )
 
+        lineups = []
+        for row in rows:
+            ppp = row["points"] / row["possessions"] if row["possessions"] else 0.0
+            opponent_ppp = (
+                row["opponent_points"] / row["opponent_possessions"]
+                if row["opponent_possessions"]
+                else 0.0
+            )
+            lineups.append(
+                {
+                    "lineup": row["lineup"],
+                    "players": [
+                        usernames.get(player_id)
+                        for player_id in Possession.lineup_players(row["lineup"])
+                    ],
+                    "possessions": row["possessions"],
+                    "points": row["points"],
+                    "ppp": round(ppp, 2),
+                    "opponent_possessions": row["opponent_possessions"],
+                    "opponent_points": row["opponent_points"],
+                    "opponent_ppp": round(opponent_ppp, 2),
+                    # Net rating per 100 possessions
+                    "net_rating": round((ppp - opponent_ppp) * 100, 1),
+                }
+            )
+        lineups.sort(key=lambda lineup: lineup["net_rating"], reverse=True)
+
         return {
             "team": self.team.name,
             "min_possessions": min_possessions,
-            "offensive_lineups": list(lineup_stats),
-            "defensive_lineups": list(defensive_lineup_stats),
+            "lineups": lineups,
         }
 
+    @span("stats.game_range")
     def get_game_range_stats(self, game_count):
         """Get stats for specific number of recent games"""
-        queryset = self._get_base_queryset(offensive=True, game_range=game_count)
-
-        # Overall stats for the game range
-        overall_stats = queryset.aggregate(
-            total_possessions=Count("id"),
-            total_points=Sum("points_scored"),
-            avg_ppp=Coalesce(Avg("points_scored"), 0.0),
-            success_rate=Coalesce(
-                Count(Case(When(points_scored__gt=0, then=Value(1))))
-                * 100.0
-                / Count("id"),
-                0.0,
-            ),
-        )
-
-        # Stats by game
-        game_stats = (
-            queryset.values(
-                "game__id",
-                "game__game_date",
-                "game__home_team__name",
-                "game__away_team__name",
-            )
-            .annotate(
-                possessions=Count("id"),
-                points=Sum("points_scored"),
-                avg_ppp=Coalesce(Avg("points_scored"), 0.0),
-                success_rate=Coalesce(
-                    Count(Case(When(points_scored__gt=0, then=Value(1))))
-                    * 100.0
-                    / Count("id"),
-                    0.0,
-                ),
+        recent_games = Game.objects.filter(
+            Q(home_team=self.team) | Q(away_team=self.team)
+        ).order_by("-game_date")[:game_count]
+
+        # Per-game offensive totals come straight from the rollup rows
+        rows = (
+            TeamGameStats.objects.filter(
+                team=self.team, game__in=recent_games, possessions__gt=0
             )
+            .select_related("game__home_team", "game__away_team")
             .order_by("-game__game_date")
         )
 
+        def rates(possessions, points, scoring_possessions):
+            return {
+                "avg_ppp": points / possessions if possessions else 0.0,
+                "success_rate": (
+                    scoring_possessions * 100.0 / possessions if possessions else 0.0
+                ),
+            }
+
+        # Stats by game
+        game_stats = [
+            {
+                "game__id": row.game_id,
+                "game__game_date": row.game.game_date,
+                "game__home_team__name": row.game.home_team.name,
+                "game__away_team__name": row.game.away_team.name,
+                "possessions": row.possessions,
+                "points": row.points,
+                **rates(row.possessions, row.points, row.scoring_possessions),
+            }
+            for row in rows
+        ]
+
+        # Overall stats for the game range
+        total_possessions = sum(game["possessions"] for game in game_stats)
+        total_points = sum(game["points"] for game in game_stats)
+        overall_stats = {
+            "total_possessions": total_possessions,
+            "total_points": total_points if game_stats else None,
+            **rates(
+                total_possessions,
+                total_points,
+                sum(row.scoring_possessions for row in rows),
+            ),
+        }
+
         return {
             "team": self.team.name,
             "game_count": game_count,
             "overall_stats": overall_stats,
-            "game_stats": list(game_stats),
+            "game_stats": game_stats,
         }
 
     def get_comprehensive_report(self, game_range=None):
@@ -572,142 +534,96 @@ class PlayerStatsService:
     def __init__(self, player, team):
         self.player = player
         self.team = team
+        with span("stats.snapshot"):
+            self.snapshot = get_snapshot(team)
 
+    def _on_court(self, offensive):
+        """Row mask for the team's possessions with the player on the floor"""
+        return self.snapshot.mask(offensive=offensive) & self.snapshot.with_related(
+            "players_on_court", self.player.id
+        )
+
+    @span("player.offense")
     def get_player_offensive_stats(self):
         """Get player's offensive statistics"""
-        queryset = Possession.objects.filter(
-            team__team=self.team, players_on_court=self.player
-        ).select_related("game", "team", "team__team", "opponent", "opponent__team")
+        snapshot = self.snapshot
+        mask = self._on_court(offensive=True)
+        aggregates = {
+            **_scoring(count="possessions", points="points"),
+            "success_rate": PercentIf("scored"),
+        }
 
         # Overall offensive stats
-        overall_stats = queryset.aggregate(
-            total_possessions=Count("id"),
-            total_points=Sum("points_scored"),
-            avg_ppp=Coalesce(Avg("points_scored"), 0.0),
-            success_rate=Coalesce(
-                Count(Case(When(points_scored__gt=0, then=Value(1))))
-                * 100.0
-                / Count("id"),
-                0.0,
-            ),
+        overall_stats = snapshot.aggregate(
+            mask, **_scoring(), success_rate=PercentIf("scored")
         )
 
         # Stats by offensive set
-        set_stats = (
-            queryset.values("offensive_set")
-            .annotate(
-                possessions=Count("id"),
-                points=Sum("points_scored"),
-                avg_ppp=Coalesce(Avg("points_scored"), 0.0),
-                success_rate=Coalesce(
-                    Count(Case(When(points_scored__gt=0, then=Value(1))))
-                    * 100.0
-                    / Count("id"),
-                    0.0,
-                ),
-            )
-            .order_by("-possessions")
+        set_stats = snapshot.group_by(
+            ["offensive_set"], mask, order_by="-possessions", **aggregates
         )
 
         # PnR stats
-        pnr_stats = (
-            queryset.filter(pnr_type__isnull=False)
-            .values("pnr_type", "pnr_result")
-            .annotate(
-                possessions=Count("id"),
-                points=Sum("points_scored"),
-                avg_ppp=Coalesce(Avg("points_scored"), 0.0),
-                success_rate=Coalesce(
-                    Count(Case(When(points_scored__gt=0, then=Value(1))))
-                    * 100.0
-                    / Count("id"),
-                    0.0,
-                ),
-            )
-            .order_by("-possessions")
+        pnr_stats = snapshot.group_by(
+            ["pnr_type", "pnr_result"],
+            mask & snapshot.column("pnr_type_tagged"),
+            order_by="-possessions",
+            **aggregates,
         )
 
         # Offensive rebound stats
-        oreb_stats = queryset.filter(
-            is_offensive_rebound=True, offensive_rebound_players=self.player
-        ).aggregate(
-            offensive_rebounds=Count("id"),
+        oreb_stats = snapshot.aggregate(
+            mask
+            & snapshot.column("is_offensive_rebound")
+            & snapshot.with_related("offensive_rebound_players", self.player.id),
+            offensive_rebounds=Count(),
             points_after_oreb=Sum("points_scored"),
-            avg_points_after_oreb=Coalesce(Avg("points_scored"), 0.0),
+            avg_points_after_oreb=Avg("points_scored"),
         )
 
         return {
             "overall": overall_stats,
-            "by_set": list(set_stats),
-            "pnr": list(pnr_stats),
+            "by_set": set_stats,
+            "pnr": pnr_stats,
             "offensive_rebounds": oreb_stats,
         }
 
+    @span("player.defense")
     def get_player_defensive_stats(self):
         """Get player's defensive statistics"""
-        queryset = Possession.objects.filter(
-            opponent__team=self.team, players_on_court=self.player
-        ).select_related("game", "team", "team__team", "opponent", "opponent__team")
+        snapshot = self.snapshot
+        mask = self._on_court(offensive=False)
 
         # Overall defensive stats
-        overall_stats = queryset.aggregate(
-            total_possessions=Count("id"),
-            points_allowed=Sum("points_scored"),
-            avg_points_allowed=Coalesce(Avg("points_scored"), 0.0),
-            stops=Count(Case(When(points_scored=0, then=Value(1)))),
-            stop_rate=Coalesce(
-                Count(Case(When(points_scored=0, then=Value(1)))) * 100.0 / Count("id"),
-                0.0,
-            ),
-        )
+        overall_stats = snapshot.aggregate(mask, **_stopping())
 
         # Stats by defensive set
-        set_stats = (
-            queryset.values("defensive_set")
-            .annotate(
-                possessions=Count("id"),
-                points_allowed=Sum("points_scored"),
-                avg_points_allowed=Coalesce(Avg("points_scored"), 0.0),
-                stops=Count(Case(When(points_scored=0, then=Value(1)))),
-                stop_rate=Coalesce(
-                    Count(Case(When(points_scored=0, then=Value(1))))
-                    * 100.0
-                    / Count("id"),
-                    0.0,
-                ),
-            )
-            .order_by("-possessions")
+        set_stats = snapshot.group_by(
+            ["defensive_set"],
+            mask,
+            order_by="-possessions",
+            **_stopping(count="possessions"),
         )
 
         # PnR defense stats
-        pnr_defense_stats = (
-            queryset.filter(defensive_pnr__isnull=False)
-            .values("defensive_pnr")
-            .annotate(
-                possessions=Count("id"),
-                points_allowed=Sum("points_scored"),
-                avg_points_allowed=Coalesce(Avg("points_scored"), 0.0),
-                stops=Count(Case(When(points_scored=0, then=Value(1)))),
-                stop_rate=Coalesce(
-                    Count(Case(When(points_scored=0, then=Value(1))))
-                    * 100.0
-                    / Count("id"),
-                    0.0,
-                ),
-            )
-            .order_by("-possessions")
+        pnr_defense_stats = snapshot.group_by(
+            ["defensive_pnr"],
+            mask & snapshot.column("defensive_pnr_tagged"),
+            order_by="-possessions",
+            **_stopping(count="possessions"),
         )
 
         # Box out stats
-        box_out_stats = queryset.aggregate(
+        box_out_stats = snapshot.aggregate(
+            mask,
             total_box_outs=Sum("box_out_count"),
-            avg_box_outs_per_possession=Coalesce(Avg("box_out_count"), 0.0),
+            avg_box_outs_per_possession=Avg("box_out_count"),
             offensive_rebounds_allowed=Sum("offensive_rebounds_allowed"),
         )
 
         return {
             "overall": overall_stats,
-            "by_set": list(set_stats),
-            "pnr_defense": list(pnr_defense_stats),
+            "by_set": set_stats,
+            "pnr_defense": pnr_defense_stats,
             "box_outs": box_out_stats,
         }
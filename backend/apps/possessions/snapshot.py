@@ -0,0 +1,436 @@
+# apps/possessions/snapshot.py
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+
+# Scalar columns fetched for every possession, in ``values_list`` order.
+NUMERIC_FIELDS = (
+    "quarter",
+    "points_scored",
+    "number_of_passes",
+    "offensive_rebound_count",
+    "offensive_rebounds_allowed",
+    "box_out_count",
+    "duration_seconds",
+)
+BOOLEAN_FIELDS = (
+    "has_paint_touch",
+    "has_kick_out",
+    "has_extra_pass",
+    "is_offensive_rebound",
+    "after_timeout",
+)
+# Low-cardinality columns that are dictionary-encoded so they can be grouped on.
+CATEGORICAL_FIELDS = (
+    "quarter",
+    "outcome",
+    "offensive_set",
+    "defensive_set",
+    "pnr_type",
+    "pnr_result",
+    "defensive_pnr",
+    "shoot_quality",
+    "shoot_time",
+    "time_range",
+    "number_of_passes",
+    "offensive_rebound_count",
+    "box_out_count",
+    "game_id",
+)
+# Many-to-many relations exploded into (possession row, user) pairs.
+RELATED_FIELDS = ("players_on_court", "offensive_rebound_players")
+
+SNAPSHOT_CACHE_SIZE = 64
+VERSION_KEY = "possessions:snapshot_version:{scope}"
+
+
+class Aggregate:
+    """Vectorised counterpart of a Django aggregate, evaluated per group."""
+
+    def __init__(self, field: Optional[str] = None):
+        self.field = field
+
+    def compute(self, snapshot, rows, groups, size) -> np.ndarray:
+        raise NotImplementedError
+
+    def value(self, raw, count) -> Any:
+        return raw
+
+
+class Count(Aggregate):
+    def compute(self, snapshot, rows, groups, size):
+        return np.bincount(groups, minlength=size)
+
+    def value(self, raw, count):
+        return int(raw)
+
+
+class Sum(Aggregate):
+    def compute(self, snapshot, rows, groups, size):
+        return np.bincount(
+            groups, weights=snapshot.column(self.field)[rows], minlength=size
+        )
+
+    def value(self, raw, count):
+        # SUM() over no rows is NULL, matching the ORM aggregate
+        return int(raw) if count else None
+
+
+class Avg(Aggregate):
+    def compute(self, snapshot, rows, groups, size):
+        totals = np.bincount(
+            groups, weights=snapshot.column(self.field)[rows], minlength=size
+        )
+        counts = np.bincount(groups, minlength=size)
+        return np.divide(totals, counts, out=np.zeros(size), where=counts > 0)
+
+    def value(self, raw, count):
+        return float(raw)
+
+
+class CountIf(Aggregate):
+    """Number of rows in the group where a boolean column is set."""
+
+    def compute(self, snapshot, rows, groups, size):
+        flags = snapshot.column(self.field)[rows]
+        return np.bincount(groups, weights=flags.astype(np.float64), minlength=size)
+
+    def value(self, raw, count):
+        return int(raw)
+
+
+class PercentIf(CountIf):
+    """Share of rows in the group where a boolean column is set, as 0-100."""
+
+    def compute(self, snapshot, rows, groups, size):
+        hits = super().compute(snapshot, rows, groups, size)
+        counts = np.bincount(groups, minlength=size)
+        return np.divide(hits * 100.0, counts, out=np.zeros(size), where=counts > 0)
+
+    def value(self, raw, count):
+        return float(raw)
+
+
+def _sort_key(value):
+    # NULLs sort last, as PostgreSQL does for ascending ORDER BY
+    return (value is None, value)
+
+
+def _encode(values: Sequence[Any]):
+    """Dictionary-encode a column; labels are sorted so code order is value order."""
+    labels = sorted(set(values), key=_sort_key)
+    lookup = {label: code for code, label in enumerate(labels)}
+    dtype = np.int16 if len(labels) < np.iinfo(np.int16).max else np.int32
+    codes = np.fromiter((lookup[v] for v in values), dtype=dtype, count=len(values))
+    return codes, labels
+
+
+class PossessionSnapshot:
+    """
+    Columnar, read-only copy of every possession a team was involved in.
+
+    Each scalar field is held as a NumPy array and choice fields are
+    dictionary-encoded, so the breakdowns in ``StatsService`` become
+    ``bincount`` group-bys over in-memory arrays instead of one SQL
+    aggregate per statistic.
+    """
+
+    def __init__(self, team_id, rows, related):
+        self.team_id = team_id
+        self.size = len(rows)
+        columns = list(zip(*rows)) if rows else [()] * len(self._row_fields())
+        data = dict(zip(self._row_fields(), columns))
+
+        self.ids = np.asarray(data["id"], dtype=np.int64)
+        self._columns: Dict[str, np.ndarray] = {}
+        self._codes: Dict[str, np.ndarray] = {}
+        self._labels: Dict[str, List[Any]] = {}
+
+        for field in NUMERIC_FIELDS:
+            self._columns[field] = np.asarray(
+                [v or 0 for v in data[field]], dtype=np.int64
+            )
+        for field in BOOLEAN_FIELDS:
+            self._columns[field] = np.asarray(data[field], dtype=bool)
+        for field in CATEGORICAL_FIELDS:
+            self._codes[field], self._labels[field] = _encode(data[field])
+
+        self._columns["is_offense"] = np.asarray(
+            [v == team_id for v in data["team__team_id"]], dtype=bool
+        )
+        self._columns["is_defense"] = np.asarray(
+            [v == team_id for v in data["opponent__team_id"]], dtype=bool
+        )
+        points = self._columns["points_scored"]
+        self._columns["scored"] = points > 0
+        self._columns["stopped"] = points == 0
+        for field in ("pnr_type", "defensive_pnr"):
+            none_code = self._null_code(field)
+            self._columns[f"{field}_tagged"] = self._codes[field] != none_code
+
+        # Exploded many-to-many pairs: row index into the snapshot + user
+        position = {pk: row for row, pk in enumerate(data["id"])}
+        self._related = {}
+        for name, pairs in related.items():
+            # Ignore pairs for possessions created after the rows were read
+            pairs = [pair for pair in pairs if pair[0] in position]
+            pair_rows = np.fromiter(
+                (position[p] for p, _, _ in pairs), dtype=np.int64, count=len(pairs)
+            )
+            user_ids = np.fromiter(
+                (u for _, u, _ in pairs), dtype=np.int64, count=len(pairs)
+            )
+            codes, labels = _encode([username for _, _, username in pairs])
+            self._related[name] = (pair_rows, user_ids, codes, labels)
+
+    @staticmethod
+    def _row_fields():
+        return (
+            ("id", "game_id", "team__team_id", "opponent__team_id", "outcome")
+            + NUMERIC_FIELDS
+            + BOOLEAN_FIELDS
+            + (
+                "offensive_set",
+                "defensive_set",
+                "pnr_type",
+                "pnr_result",
+                "defensive_pnr",
+                "shoot_quality",
+                "shoot_time",
+                "time_range",
+            )
+        )
+
+    @classmethod
+    def build(cls, team) -> "PossessionSnapshot":
+        """Fetch every possession involving ``team`` in a constant number of queries."""
+        from .models import Possession
+
+        queryset = Possession.objects.filter(
+            Q(team__team=team) | Q(opponent__team=team)
+        ).order_by()
+        rows = list(queryset.values_list(*cls._row_fields()))
+
+        related = {}
+        for name in RELATED_FIELDS:
+            through = getattr(Possession, name).through
+            related[name] = list(
+                through.objects.filter(possession__in=queryset.values("id"))
+                .order_by()
+                .values_list("possession_id", "user_id", "user__username")
+            )
+
+        return cls(team.id, rows, related)
+
+    # Column access -----------------------------------------------------
+
+    def column(self, field: str) -> np.ndarray:
+        if field in self._columns:
+            return self._columns[field]
+        return self._codes[field]
+
+    def labels(self, field: str) -> List[Any]:
+        return self._labels[field]
+
+    def _null_code(self, field):
+        labels = self._labels[field]
+        return len(labels) - 1 if labels and labels[-1] is None else -1
+
+    def mask(self, offensive: bool = True, **conditions) -> np.ndarray:
+        """Boolean row mask for the team's offensive or defensive possessions."""
+        selected = self.column("is_offense" if offensive else "is_defense").copy()
+        for field, expected in conditions.items():
+            if field in self._codes:
+                values = self._labels[field]
+                code = values.index(expected) if expected in values else -1
+                selected &= self._codes[field] == code
+            else:
+                selected &= self._columns[field] == expected
+        return selected
+
+    def in_games(self, game_ids: Iterable[int]) -> np.ndarray:
+        game_ids = set(game_ids)
+        labels = self._labels["game_id"]
+        wanted = [code for code, gid in enumerate(labels) if gid in game_ids]
+        return np.isin(self._codes["game_id"], wanted)
+
+    def with_related(self, relation: str, user_id: int) -> np.ndarray:
+        """Rows where ``user_id`` appears in a many-to-many relation."""
+        pair_rows, user_ids, _, _ = self._related[relation]
+        selected = np.zeros(self.size, dtype=bool)
+        selected[pair_rows[user_ids == user_id]] = True
+        return selected
+
+    # Aggregation -------------------------------------------------------
+
+    def aggregate(self, mask: np.ndarray, **aggregates: Aggregate) -> Dict[str, Any]:
+        """Equivalent of ``queryset.aggregate(...)`` over the masked rows."""
+        rows = np.flatnonzero(mask)
+        groups = np.zeros(len(rows), dtype=np.int64)
+        count = len(rows)
+        return {
+            name: agg.value(agg.compute(self, rows, groups, 1)[0], count)
+            for name, agg in aggregates.items()
+        }
+
+    def group_by(
+        self,
+        fields: Sequence[str],
+        mask: np.ndarray,
+        order_by: Optional[str] = None,
+        **aggregates: Aggregate,
+    ) -> List[Dict[str, Any]]:
+        """Equivalent of ``queryset.values(*fields).annotate(...).order_by(...)``."""
+        rows = np.flatnonzero(mask)
+        keys = [(self._codes[f][rows], self._labels[f]) for f in fields]
+        return self._grouped(fields, rows, keys, order_by, aggregates)
+
+    def group_by_related(
+        self,
+        relation: str,
+        alias: str,
+        mask: np.ndarray,
+        order_by: Optional[str] = None,
+        **aggregates: Aggregate,
+    ) -> List[Dict[str, Any]]:
+        """
+        Group on a many-to-many username, like ``values("relation__username")``.
+
+        As with the SQL join, each possession counts once per related user and
+        possessions without any related user fall into a ``None`` group.
+        """
+        pair_rows, _, user_codes, labels = self._related[relation]
+        selected = mask[pair_rows]
+        has_pair = np.zeros(self.size, dtype=bool)
+        has_pair[pair_rows] = True
+        lonely = np.flatnonzero(mask & ~has_pair)
+
+        rows = np.concatenate([pair_rows[selected], lonely])
+        codes = np.concatenate(
+            [user_codes[selected], np.full(len(lonely), len(labels), dtype=np.int64)]
+        )
+        keys = [(codes, list(labels) + [None])]
+        return self._grouped([alias], rows, keys, order_by, aggregates)
+
+    def _grouped(self, fields, rows, keys, order_by, aggregates):
+        if not len(rows):
+            return []
+        combined = np.zeros(len(rows), dtype=np.int64)
+        for codes, labels in keys:
+            combined = combined * (len(labels) + 1) + codes
+        unique, groups = np.unique(combined, return_inverse=True)
+        size = len(unique)
+
+        counts = np.bincount(groups, minlength=size)
+        results = {
+            name: agg.compute(self, rows, groups, size)
+            for name, agg in aggregates.items()
+        }
+
+        decoded = []
+        remaining = unique
+        for codes, labels in reversed(keys):
+            remaining, code = np.divmod(remaining, len(labels) + 1)
+            decoded.append([labels[c] for c in code])
+        decoded.reverse()
+
+        output = []
+        for index in range(size):
+            item = {field: decoded[pos][index] for pos, field in enumerate(fields)}
+            for name, agg in aggregates.items():
+                item[name] = agg.value(results[name][index], counts[index])
+            output.append(item)
+
+        if order_by:
+            descending = order_by.startswith("-")
+            name = order_by.lstrip("-")
+            output.sort(key=lambda item: _sort_key(item[name]), reverse=descending)
+        return output
+
+
+# Snapshot registry ---------------------------------------------------------
+
+_snapshots: "OrderedDict[int, tuple]" = OrderedDict()
+_snapshots_lock = threading.Lock()
+
+
+def _seed_version(key):
+    # Seed from the clock so a flushed cache never resurrects an old version
+    cache.add(key, time.time_ns(), timeout=None)
+
+
+def _current_version(team_id):
+    keys = [VERSION_KEY.format(scope="all"), VERSION_KEY.format(scope=team_id)]
+    try:
+        versions = cache.get_many(keys)
+        if len(versions) < len(keys):
+            for key in keys:
+                if key not in versions:
+                    _seed_version(key)
+            versions = cache.get_many(keys)
+    except Exception as e:
+        logger.warning(f"Snapshot version lookup failed for team {team_id}: {e}")
+        return None
+    if len(versions) < len(keys):
+        return None
+    return tuple(versions[key] for key in keys)
+
+
+def get_snapshot(team) -> PossessionSnapshot:
+    """
+    Return the possession snapshot for ``team``, rebuilding it only when the
+    team's data version has moved since it was last built in this process.
+    """
+    version = _current_version(team.id)
+    if version is not None:
+        with _snapshots_lock:
+            cached = _snapshots.get(team.id)
+            if cached and cached[0] == version:
+                _snapshots.move_to_end(team.id)
+                return cached[1]
+
+    snapshot = PossessionSnapshot.build(team)
+
+    if version is not None:
+        with _snapshots_lock:
+            _snapshots[team.id] = (version, snapshot)
+            _snapshots.move_to_end(team.id)
+            while len(_snapshots) > SNAPSHOT_CACHE_SIZE:
+                _snapshots.popitem(last=False)
+    return snapshot
+
+
+def _bump(scope):
+    key = VERSION_KEY.format(scope=scope)
+    try:
+        _seed_version(key)
+        cache.incr(key)
+    except Exception as e:
+        logger.warning(f"Snapshot version bump failed for {key}: {e}")
+
+
+def invalidate_team_snapshots(team_ids: Iterable[int]) -> None:
+    """Mark the snapshots of the given teams as stale in every process."""
+    for team_id in set(team_ids):
+        if team_id is None:
+            continue
+        with _snapshots_lock:
+            _snapshots.pop(team_id, None)
+        _bump(team_id)
+
+
+def invalidate_all_snapshots() -> None:
+    """Mark every snapshot as stale, for changes that cannot be scoped to a team."""
+    with _snapshots_lock:
+        _snapshots.clear()
+    _bump("all")
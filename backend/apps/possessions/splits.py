@@ -0,0 +1,310 @@
+# apps/possessions/splits.py
+"""
+Quarter and set splits of a team kept in the cache as sums and counts.
+
+Rates are derived when a split is read, so a single possession write only
+adds or subtracts its own counters in place instead of invalidating the
+splits. The structure is rebuilt from the possessions only when missing.
+Per-game team totals are maintained the same way in ``TeamGameStats``.
+
+Deltas are applied once the writing transaction commits. Writes and
+rebuilds draw tickets from a shared counter: a write's ticket before it
+reaches the database, a rebuild's after its query. A delta meeting splits
+rebuilt after its own ticket may already be counted in them, so it drops
+them instead of applying.
+"""
+
+import json
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.core.cache import cache
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+SPLITS_KEY = "possessions:splits:v2:{version}:{team_id}"
+SPLITS_VERSION_KEY = "possessions:splits_version"
+SPLITS_LOCK_KEY = "possessions:splits_lock:{team_id}"
+SPLITS_TICKET_KEY = "possessions:splits_ticket"
+SPLITS_TIMEOUT = 60 * 60 * 24
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 1.0
+
+# Breakdowns kept for each side of the ball
+SPLITS = {
+    "offense": ("quarter", "offensive_set"),
+    "defense": ("quarter", "defensive_set"),
+}
+
+# Possession columns a contribution is computed from, in ``values_list`` order
+ROW_FIELDS = (
+    "quarter",
+    "offensive_set",
+    "defensive_set",
+    "points_scored",
+    "pnr_type",
+    "defensive_pnr",
+    "has_paint_touch",
+    "has_kick_out",
+    "has_extra_pass",
+    "offensive_rebounds_allowed",
+    "box_out_count",
+)
+
+
+def counters_for(row: Dict[str, Any]) -> Dict[str, int]:
+    """Sums and counts a single possession adds to each split it falls in"""
+    points = row["points_scored"] or 0
+    return {
+        "possessions": 1,
+        "points": points,
+        "scored": int(points > 0),
+        "stopped": int(points == 0),
+        "pnr": int(row["pnr_type"] is not None),
+        "paint_touches": int(bool(row["has_paint_touch"])),
+        "kick_outs": int(bool(row["has_kick_out"])),
+        "extra_passes": int(bool(row["has_extra_pass"])),
+        "defensive_pnr": int(row["defensive_pnr"] is not None),
+        "offensive_rebounds_allowed": row["offensive_rebounds_allowed"] or 0,
+        "box_outs": row["box_out_count"] or 0,
+    }
+
+
+def contribution_of(possession) -> Optional[Tuple[int, int, Dict[str, Any]]]:
+    """``(roster_id, opponent_roster_id, row)`` of a fully loaded possession"""
+    fields = ("team_id", "opponent_id") + ROW_FIELDS
+    if not all(name in possession.__dict__ for name in fields):
+        return None
+    return (
+        possession.team_id,
+        possession.opponent_id,
+        {field: getattr(possession, field) for field in ROW_FIELDS},
+    )
+
+
+def _label(value) -> str:
+    # JSON keys keep None and integer labels apart from strings
+    return json.dumps(value)
+
+
+def _add(splits, side, row, sign):
+    counters = counters_for(row)
+    for field in SPLITS[side]:
+        buckets = splits[side][field]
+        bucket = buckets.setdefault(_label(row[field]), dict.fromkeys(counters, 0))
+        for counter, value in counters.items():
+            bucket[counter] += sign * value
+        if bucket["possessions"] <= 0:
+            del buckets[_label(row[field])]
+
+
+def _empty():
+    return {side: {field: {} for field in fields} for side, fields in SPLITS.items()}
+
+
+def build_splits(team_id: int) -> Dict[str, Any]:
+    """Aggregate the splits of a team from all of its possessions"""
+    from .models import Possession
+
+    rows = Possession.objects.filter(
+        Q(team__team_id=team_id) | Q(opponent__team_id=team_id)
+    ).order_by()
+    splits = _empty()
+    for values in rows.values_list("team__team_id", "opponent__team_id", *ROW_FIELDS):
+        row = dict(zip(ROW_FIELDS, values[2:]))
+        if values[0] == team_id:
+            _add(splits, "offense", row, 1)
+        if values[1] == team_id:
+            _add(splits, "defense", row, 1)
+    return splits
+
+
+def _version():
+    try:
+        cache.add(SPLITS_VERSION_KEY, time.time_ns(), timeout=None)
+        return cache.get(SPLITS_VERSION_KEY)
+    except Exception as e:
+        logger.warning(f"Splits version lookup failed: {e}")
+        return None
+
+
+def next_ticket() -> Optional[int]:
+    """Next ticket of the counter ordering possession writes and rebuilds"""
+    try:
+        # Seeded from the clock so a flushed cache never reissues a ticket
+        cache.add(SPLITS_TICKET_KEY, time.time_ns(), timeout=None)
+        return cache.incr(SPLITS_TICKET_KEY)
+    except Exception as e:
+        logger.warning(f"Splits ticket failed: {e}")
+        return None
+
+
+def _key(team_id, version):
+    return SPLITS_KEY.format(version=version, team_id=team_id)
+
+
+def _lock(team_id) -> bool:
+    key = SPLITS_LOCK_KEY.format(team_id=team_id)
+    deadline = time.monotonic() + LOCK_WAIT
+    while True:
+        try:
+            if cache.add(key, 1, LOCK_TIMEOUT):
+                return True
+        except Exception as e:
+            logger.warning(f"Splits lock failed for team {team_id}: {e}")
+            return False
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+
+
+def _unlock(team_id):
+    try:
+        cache.delete(SPLITS_LOCK_KEY.format(team_id=team_id))
+    except Exception as e:
+        logger.warning(f"Splits lock failed for team {team_id}: {e}")
+
+
+def get_splits(team_id: int) -> Dict[str, Any]:
+    """Cached splits of a team, rebuilt from its possessions when missing"""
+    version = _version()
+    if version is None:
+        return build_splits(team_id)
+    try:
+        cached = cache.get(_key(team_id, version))
+    except Exception as e:
+        logger.warning(f"Splits lookup failed for team {team_id}: {e}")
+        return build_splits(team_id)
+    if cached is not None:
+        return cached[1]
+
+    # Deltas and invalidations wait for the lock, so they see these splits
+    # stored with their ticket or not at all
+    locked = _lock(team_id)
+    try:
+        splits = build_splits(team_id)
+        ticket = next_ticket() if locked else None
+        if ticket is not None:
+            cache.set(_key(team_id, version), (ticket, splits), SPLITS_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"Splits store failed for team {team_id}: {e}")
+    finally:
+        if locked:
+            _unlock(team_id)
+    return splits
+
+
+def apply_split_deltas(
+    contributions: Iterable[Tuple[int, int, Dict[str, Any], int]],
+    ticket: Optional[int],
+) -> None:
+    """
+    Add ``(roster_id, opponent_roster_id, row, sign)`` contributions of a
+    committed write, ticketed ``ticket``, to the cached splits of the teams
+    involved. Splits that are not cached are left to be built on the next
+    read.
+    """
+    from apps.games.models import GameRoster
+
+    contributions = list(contributions)
+    roster_ids = {roster for c in contributions for roster in c[:2]} - {None}
+    roster_teams = dict(
+        GameRoster.objects.filter(id__in=roster_ids).values_list("id", "team_id")
+    )
+    if len(roster_teams) < len(roster_ids):
+        # Rosters already gone (cascading delete), the teams are unknown
+        invalidate_all_splits()
+        return
+
+    changes: Dict[int, List[Tuple[str, Dict[str, Any], int]]] = {}
+    for roster_id, opponent_id, row, sign in contributions:
+        if roster_id is not None:
+            changes.setdefault(roster_teams[roster_id], []).append(
+                ("offense", row, sign)
+            )
+        if opponent_id is not None:
+            changes.setdefault(roster_teams[opponent_id], []).append(
+                ("defense", row, sign)
+            )
+
+    version = _version()
+    if version is None:
+        return
+    for team_id, team_changes in changes.items():
+        key = _key(team_id, version)
+        if not _lock(team_id):
+            # Somebody else is writing; let the next read rebuild instead
+            invalidate_all_splits()
+            continue
+        try:
+            cached = cache.get(key)
+            if cached is None:
+                continue
+            built, splits = cached
+            if ticket is None or built > ticket:
+                # Rebuilt while this write was in flight, it may be counted
+                cache.delete(key)
+                continue
+            for side, row, sign in team_changes:
+                _add(splits, side, row, sign)
+            cache.set(key, (built, splits), SPLITS_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Splits delta failed for team {team_id}: {e}")
+            invalidate_all_splits()
+        finally:
+            _unlock(team_id)
+
+
+def invalidate_team_splits(team_ids: Iterable[int]) -> None:
+    """Drop the cached splits of the given teams so they are rebuilt"""
+    version = _version()
+    if version is None:
+        return
+    for team_id in set(team_ids) - {None}:
+        if not _lock(team_id):
+            # A rebuild in progress may store what it read before this change
+            invalidate_all_splits()
+            return
+        try:
+            cache.delete(_key(team_id, version))
+        except Exception as e:
+            logger.warning(f"Splits invalidation failed: {e}")
+        finally:
+            _unlock(team_id)
+
+
+def invalidate_all_splits() -> None:
+    """Drop every team's cached splits, for changes that cannot be scoped to a team"""
+    try:
+        _version()
+        cache.incr(SPLITS_VERSION_KEY)
+    except Exception as e:
+        logger.warning(f"Splits invalidation failed: {e}")
+
+
+# Reading -------------------------------------------------------------------
+
+
+def _sort_key(value):
+    # NULLs sort last, as PostgreSQL does for ascending ORDER BY
+    return (value is None, value)
+
+
+def split_rows(buckets: Dict[str, Dict[str, int]], field: str, columns, order_by: str):
+    """Render split buckets as ``values(field).annotate(...)`` style rows"""
+    rows = []
+    for label, counters in sorted(
+        ((json.loads(label), counters) for label, counters in buckets.items()),
+        key=lambda item: _sort_key(item[0]),
+    ):
+        row = {field: label}
+        for name, column in columns.items():
+            row[name] = column(counters)
+        rows.append(row)
+
+    descending = order_by.startswith("-")
+    name = order_by.lstrip("-")
+    rows.sort(key=lambda row: _sort_key(row[name]), reverse=descending)
+    return rows
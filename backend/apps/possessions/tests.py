@@ -6,9 +6,11 @@ from rest_framework.test import APITestCase
 from django.contrib.auth import get_user_model
 from apps.teams.models import Team
 from apps.competitions.models import Competition
-from apps.games.models import Game, GameRoster
-from .models import Possession
+from django.core.management import call_command
+from apps.games.models import Game, GameRoster, TeamGameStats
+from .models import Possession, PossessionTag, deferred_game_scores
 import datetime
+from io import StringIO
 
 User = get_user_model()
 
@@ -98,3 +100,168 @@ class PossessionAPITests(APITestCase):
         self.assertEqual(
             new_possession.points_scored, 2
         )  # Auto-calculated from outcome
+
+
+class GameScoreTests(APITestCase):
+    def setUp(self):
+        self.coach = User.objects.create_user(
+            username="coach", password="password", role=User.Role.COACH
+        )
+        self.competition = Competition.objects.create(
+            name="L", season="S", created_by=self.coach
+        )
+        self.team1 = Team.objects.create(
+            name="Team A", competition=self.competition, created_by=self.coach
+        )
+        self.team2 = Team.objects.create(
+            name="Team B", competition=self.competition, created_by=self.coach
+        )
+        self.game = Game.objects.create(
+            competition=self.competition,
+            home_team=self.team1,
+            away_team=self.team2,
+            game_date=datetime.date.today(),
+        )
+        self.home_roster = GameRoster.objects.create(game=self.game, team=self.team1)
+        self.away_roster = GameRoster.objects.create(game=self.game, team=self.team2)
+
+    def create_possession(self, roster, opponent, outcome):
+        return Possession.objects.create(
+            game=self.game,
+            team=roster,
+            opponent=opponent,
+            quarter=1,
+            start_time_in_game="10:00",
+            outcome=outcome,
+            created_by=self.coach,
+        )
+
+    def assertScore(self, home, away):
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.home_team_score, home)
+        self.assertEqual(self.game.away_team_score, away)
+
+    def test_score_follows_possession_changes(self):
+        """
+        Ensure creating, editing and deleting possessions keeps the score in sync.
+        """
+        home = self.create_possession(self.home_roster, self.away_roster, "MADE_3PTS")
+        away = self.create_possession(self.away_roster, self.home_roster, "MADE_2PTS")
+        self.assertScore(3, 2)
+
+        home = Possession.objects.get(pk=home.pk)
+        home.outcome = "MADE_2PTS"
+        home.save()
+        self.assertScore(2, 2)
+
+        home.team, home.opponent = self.away_roster, self.home_roster
+        home.save()
+        self.assertScore(0, 4)
+
+        away.delete()
+        self.assertScore(0, 2)
+
+    def test_deferred_game_scores_recompute_once(self):
+        """
+        Ensure bulk writes skip per-possession updates and settle the score at the end.
+        """
+        with deferred_game_scores():
+            for _ in range(3):
+                self.create_possession(self.home_roster, self.away_roster, "MADE_2PTS")
+            self.create_possession(self.away_roster, self.home_roster, "MADE_FTS")
+            self.assertScore(0, 0)
+        self.assertScore(6, 1)
+
+    def test_team_game_stats_follow_possessions(self):
+        """
+        Ensure the per-game team rollup tracks writes and matches a full rebuild.
+        """
+        made = self.create_possession(self.home_roster, self.away_roster, "MADE_3PTS")
+        self.create_possession(self.home_roster, self.away_roster, "TURNOVER")
+        self.create_possession(self.away_roster, self.home_roster, "MISSED_2PTS")
+
+        made = Possession.objects.get(pk=made.pk)
+        made.outcome = "MADE_2PTS"
+        made.has_paint_touch = True
+        made.save()
+
+        home = TeamGameStats.objects.get(game=self.game, team=self.team1)
+        self.assertEqual(home.possessions, 2)
+        self.assertEqual(home.points, 2)
+        self.assertEqual(home.made_2pts, 1)
+        self.assertEqual(home.made_3pts, 0)
+        self.assertEqual(home.turnovers, 1)
+        self.assertEqual(home.paint_touches, 1)
+        away = TeamGameStats.objects.get(game=self.game, team=self.team2)
+        self.assertEqual(away.missed_2pts, 1)
+
+        maintained = list(
+            TeamGameStats.objects.order_by("team_id").values(*TeamGameStats.COUNTERS)
+        )
+        call_command("rebuild_team_game_stats", game=[self.game.id], stdout=StringIO())
+        rebuilt = list(
+            TeamGameStats.objects.order_by("team_id").values(*TeamGameStats.COUNTERS)
+        )
+        self.assertEqual(maintained, rebuilt)
+
+    def test_team_game_stats_rebuilt_when_rows_are_missing(self):
+        """
+        Ensure editing a possession of a game without rollup rows rebuilds them.
+        """
+        made = self.create_possession(self.home_roster, self.away_roster, "MADE_3PTS")
+        self.create_possession(self.home_roster, self.away_roster, "MADE_2PTS")
+        self.create_possession(self.away_roster, self.home_roster, "MISSED_2PTS")
+        TeamGameStats.objects.filter(game=self.game).delete()
+
+        made = Possession.objects.get(pk=made.pk)
+        made.outcome = "MISSED_3PTS"
+        made.save()
+
+        home = TeamGameStats.objects.get(game=self.game, team=self.team1)
+        self.assertEqual(home.possessions, 2)
+        self.assertEqual(home.points, 2)
+        self.assertEqual(home.missed_3pts, 1)
+        self.assertEqual(home.made_3pts, 0)
+
+        made.delete()
+        home.refresh_from_db()
+        self.assertEqual(home.possessions, 1)
+        self.assertEqual(home.points, 2)
+        away = TeamGameStats.objects.get(game=self.game, team=self.team2)
+        self.assertEqual(away.missed_2pts, 1)
+
+    def test_sequences_are_tokenized_into_tags(self):
+        """
+        Ensure saving a possession keeps its sequence tag index in sync.
+        """
+        possession = self.create_possession(
+            self.home_roster, self.away_roster, "MADE_2PTS"
+        )
+        possession.offensive_sequence = "Set 3 / PnR / 2pt / Made"
+        possession.defensive_sequence = "2-3 / SWITCH"
+        possession.save()
+
+        def tags():
+            return set(possession.tags.values_list("side", "tag"))
+
+        self.assertEqual(
+            tags(),
+            {
+                ("OFFENSE", "set 3"),
+                ("OFFENSE", "pnr"),
+                ("OFFENSE", "2pt"),
+                ("OFFENSE", "made"),
+                ("DEFENSE", "2-3"),
+                ("DEFENSE", "switch"),
+            },
+        )
+
+        possession.offensive_sequence = "Set 3 / Kick Out"
+        possession.defensive_sequence = ""
+        possession.save()
+        self.assertEqual(tags(), {("OFFENSE", "set 3"), ("OFFENSE", "kick out")})
+
+        matched = PossessionTag.filter_possessions(
+            Possession.objects.all(), ["kick"], side=PossessionTag.SideChoices.OFFENSE
+        )
+        self.assertEqual(list(matched), [possession])
@@ -3,6 +3,8 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
 from django.utils import timezone
 from datetime import timedelta
 
@@ -11,6 +13,7 @@ from apps.games.models import Game, GameRoster
 from apps.competitions.models import Competition
 from apps.possessions.models import Possession
 from apps.possessions.services import StatsService, PlayerStatsService
+from apps.possessions.splits import build_splits, get_splits
 
 User = get_user_model()
 
@@ -456,6 +459,47 @@ class StatsServiceTestCase(APITestCase):
         # Check defensive lineups
         self.assertEqual(len(stats["defensive_lineups"]), 2)
 
+    def test_five_man_lineup_stats(self):
+        """Test lineup keys follow players on court and feed lineup ratings"""
+        scored = Possession.objects.filter(team=self.game1_roster_a).first()
+        scored.players_on_court.set([self.player1, self.coach])
+        scored.players_on_court.add(self.player2)
+        scored.players_on_court.remove(self.player2)
+        self.assertEqual(
+            scored.offensive_lineup,
+            Possession.lineup_key([self.coach.id, self.player1.id]),
+        )
+
+        allowed = Possession.objects.filter(opponent=self.game1_roster_a).first()
+        self.player1.defensive_possessions_on_court.add(allowed)
+        self.coach.defensive_possessions_on_court.add(allowed)
+        allowed.refresh_from_db()
+        self.assertEqual(allowed.defensive_lineup, scored.offensive_lineup)
+
+        with self.assertNumQueries(2):
+            stats = StatsService(self.team_a).get_five_man_lineup_stats(
+                min_possessions=1
+            )
+
+        lineups = {lineup["lineup"]: lineup for lineup in stats["lineups"]}
+        lineup = lineups[scored.offensive_lineup]
+        self.assertEqual(lineup["players"], ["coach", "player1"])
+        self.assertEqual(lineup["possessions"], 1)
+        self.assertEqual(lineup["points"], scored.points_scored)
+        self.assertEqual(lineup["opponent_possessions"], 1)
+        self.assertEqual(lineup["opponent_ppp"], float(allowed.points_scored))
+        self.assertEqual(
+            lineup["net_rating"],
+            round((scored.points_scored - allowed.points_scored) * 100, 1),
+        )
+
+        scored.players_on_court.clear()
+        self.player1.defensive_possessions_on_court.clear()
+        scored.refresh_from_db()
+        allowed.refresh_from_db()
+        self.assertEqual(scored.offensive_lineup, "")
+        self.assertEqual(allowed.defensive_lineup, str(self.coach.id))
+
     def test_game_range_stats(self):
         """Test game range statistics"""
         service = StatsService(self.team_a)
@@ -504,6 +548,72 @@ class StatsServiceTestCase(APITestCase):
         self.assertEqual(report["game_range"], 1)
         self.assertIsNotNone(report["game_range_stats"])
 
+    def test_snapshot_reused_until_possessions_change(self):
+        """Test the possession snapshot is shared and rebuilt on changes"""
+        snapshot = StatsService(self.team_a).snapshot
+        with self.assertNumQueries(0):
+            self.assertIs(StatsService(self.team_a).snapshot, snapshot)
+
+        possession = Possession.objects.filter(team__team=self.team_a).first()
+        possession.outcome = Possession.OutcomeChoices.MADE_3PTS
+        possession.save()
+
+        service = StatsService(self.team_a)
+        self.assertIsNot(service.snapshot, snapshot)
+        quarter_stats = service.get_quarter_stats(offensive=True)["quarter_stats"]
+        self.assertEqual(sum(q["total_points"] for q in quarter_stats), 6)
+
+    def test_splits_updated_in_place_on_possession_edits(self):
+        """Test possession writes apply deltas to the cached splits"""
+        service = StatsService(self.team_a)
+        service.get_quarter_stats(offensive=True)
+
+        possession = Possession.objects.get(quarter=1, team=self.game1_roster_a)
+        with self.captureOnCommitCallbacks(execute=True):
+            possession.outcome = Possession.OutcomeChoices.MADE_3PTS
+            possession.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            Possession.objects.get(quarter=2, team=self.game1_roster_a).delete()
+
+        with self.assertNumQueries(0):
+            quarter_stats = service.get_quarter_stats(offensive=True)["quarter_stats"]
+            set_stats = service.get_offensive_set_stats()["offensive_set_stats"]
+        self.assertEqual(
+            [(q["quarter"], q["total_points"], q["avg_ppp"]) for q in quarter_stats],
+            [(1, 3, 3.0)],
+        )
+        self.assertEqual(len(set_stats), 1)
+        # Same result as rebuilding from the possessions
+        self.assertEqual(get_splits(self.team_a.id), build_splits(self.team_a.id))
+        self.assertEqual(get_splits(self.team_b.id), build_splits(self.team_b.id))
+
+    def test_rolled_back_writes_leave_splits_alone(self):
+        """Test split deltas wait for the writing transaction to commit"""
+        cached = get_splits(self.team_a.id)
+        possession = Possession.objects.get(quarter=1, team=self.game1_roster_a)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                possession.outcome = Possession.OutcomeChoices.MADE_3PTS
+                possession.save()
+                raise RuntimeError("rolled back")
+        self.assertEqual(callbacks, [])
+        self.assertEqual(get_splits(self.team_a.id), cached)
+
+    def test_splits_rebuilt_during_a_write_are_not_counted_twice(self):
+        """Test a delta skips splits rebuilt after its write reached the database"""
+        get_splits(self.team_a.id)
+        possession = Possession.objects.get(quarter=1, team=self.game1_roster_a)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            possession.outcome = Possession.OutcomeChoices.MADE_3PTS
+            possession.save()
+            # A reader rebuilding before the delta lands already sees the row
+            cache.clear()
+            get_splits(self.team_a.id)
+
+        self.assertEqual(get_splits(self.team_a.id), build_splits(self.team_a.id))
+
 
 class PlayerStatsServiceTestCase(APITestCase):
     """Test cases for PlayerStatsService"""
@@ -296,6 +296,31 @@ class PossessionViewSet(viewsets.ModelViewSet):
 
         return Response(stats)
 
+    @action(detail=False, methods=["get"])
+    def five_man_lineup_stats(self, request):
+        """Get net ratings of five-man lineups with minimum possession threshold"""
+        team_id = request.query_params.get("team_id")
+        min_possessions = int(request.query_params.get("min_possessions", 10))
+
+        if not team_id:
+            return Response(
+                {"error": "team_id parameter is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            team = request.user.teams.get(id=team_id)
+        except:
+            return Response(
+                {"error": "Team not found or access denied"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        stats_service = StatsService(team)
+        stats = stats_service.get_five_man_lineup_stats(min_possessions=min_possessions)
+
+        return Response(stats)
+
     @action(detail=False, methods=["get"])
     def game_range_stats(self, request):
         """Get stats for specific number of recent games"""
@@ -0,0 +1,207 @@
+# apps/scouting/chemistry.py
+
+from itertools import combinations
+from typing import Dict, List, Sequence
+
+import numpy as np
+from django.db.models import Q
+
+from apps.possessions.models import Possession
+from apps.users.models import User
+
+# An unsigned 64-bit mask holds up to 64 players; rosters are far smaller.
+MAX_PLAYERS = 64
+# Groups of players evaluated per vectorised pass, bounding the
+# (groups x possessions) intermediate arrays.
+GROUP_BATCH = 256
+
+# Columns of the per-group totals matrix.
+OFF_POSSESSIONS, POINTS_FOR, DEF_POSSESSIONS, POINTS_AGAINST, SECONDS = range(5)
+
+
+def _rating(points, possessions):
+    """Points per 100 possessions, zero where there were no possessions."""
+    return np.divide(
+        points * 100.0,
+        possessions,
+        out=np.zeros_like(points, dtype=np.float64),
+        where=possessions > 0,
+    )
+
+
+def synergy_label(net_rating: float) -> str:
+    """Qualitative label for a partnership's net rating."""
+    if net_rating >= 10:
+        return "Excellent"
+    if net_rating >= 3:
+        return "Good"
+    if net_rating >= -3:
+        return "Average"
+    return "Poor"
+
+
+class ChemistryEngine:
+    """
+    Encodes a team's possessions as bitmasks over its players so that the
+    on/off splits of every pair and trio come from bitwise NumPy operations.
+    """
+
+    def __init__(
+        self,
+        players: Sequence[Dict],
+        masks: np.ndarray,
+        offense: np.ndarray,
+        points: np.ndarray,
+        seconds: np.ndarray,
+    ):
+        self.players = list(players)
+        self.masks = masks
+        offense = offense.astype(np.float64)
+        defense = 1.0 - offense
+        # One row per possession, one column per tracked total.
+        self.stats = np.column_stack(
+            [offense, offense * points, defense, defense * points, seconds]
+        )
+        self.totals = self.stats.sum(axis=0)
+
+    @classmethod
+    def build(cls, team, possessions) -> "ChemistryEngine":
+        """Load the team's possessions and on-court players in four queries."""
+        rows = list(
+            possessions.filter(
+                Q(team__team_id=team.id) | Q(opponent__team_id=team.id)
+            ).values_list("id", "team__team_id", "points_scored", "duration_seconds")
+        )
+        offense_ids = [pid for pid, team_id, _, _ in rows if team_id == team.id]
+        defense_ids = [pid for pid, team_id, _, _ in rows if team_id != team.id]
+
+        on_court: Dict[int, List[int]] = {}
+        for through, ids in (
+            (Possession.players_on_court.through, offense_ids),
+            (Possession.defensive_players_on_court.through, defense_ids),
+        ):
+            links = through.objects.filter(possession_id__in=ids).values_list(
+                "possession_id", "user_id"
+            )
+            for possession_id, user_id in links:
+                on_court.setdefault(possession_id, []).append(user_id)
+
+        # Give bits to the players seen most often if the roster is oversized
+        appearances: Dict[int, int] = {}
+        for user_ids in on_court.values():
+            for user_id in user_ids:
+                appearances[user_id] = appearances.get(user_id, 0) + 1
+        ranked = sorted(appearances, key=lambda uid: (-appearances[uid], uid))
+        player_ids = sorted(ranked[:MAX_PLAYERS])
+        bits = {user_id: index for index, user_id in enumerate(player_ids)}
+
+        users = {
+            user["id"]: user
+            for user in User.objects.filter(id__in=player_ids).values(
+                "id", "username", "first_name", "last_name"
+            )
+        }
+        players = []
+        for user_id in player_ids:
+            user = users[user_id]
+            name = f"{user['first_name']} {user['last_name']}".strip()
+            players.append({"id": user_id, "name": name or user["username"]})
+
+        masks = np.zeros(len(rows), dtype=np.uint64)
+        for index, (possession_id, _, _, _) in enumerate(rows):
+            mask = 0
+            for user_id in on_court.get(possession_id, ()):
+                if user_id in bits:
+                    mask |= 1 << bits[user_id]
+            masks[index] = mask
+
+        return cls(
+            players,
+            masks,
+            offense=np.array([team_id == team.id for _, team_id, _, _ in rows]),
+            points=np.array(
+                [points or 0 for _, _, points, _ in rows], dtype=np.float64
+            ),
+            seconds=np.array([s or 0 for _, _, _, s in rows], dtype=np.float64),
+        )
+
+    def group_totals(self, group_masks: np.ndarray) -> np.ndarray:
+        """Totals over the possessions where every player of each group was on court."""
+        result = np.zeros((len(group_masks), self.stats.shape[1]))
+        for start in range(0, len(group_masks), GROUP_BATCH):
+            groups = group_masks[start : start + GROUP_BATCH, None]
+            together = (self.masks[None, :] & groups) == groups
+            result[start : start + GROUP_BATCH] = (
+                together.astype(np.float64) @ self.stats
+            )
+        return result
+
+    def splits(self, size: int, min_possessions: int = 0) -> List[Dict]:
+        """On/off splits of every group of ``size`` players, best net rating first."""
+        if len(self.players) < size:
+            return []
+        members = list(combinations(range(len(self.players)), size))
+        group_masks = np.array(
+            [sum(1 << bit for bit in group) for group in members], dtype=np.uint64
+        )
+        return self._describe(members, self.group_totals(group_masks), min_possessions)
+
+    def lineups(self, size: int = 5, min_possessions: int = 0) -> List[Dict]:
+        """Splits of the exact lineups of ``size`` players that took the floor."""
+        popcount = np.array([bin(int(mask)).count("1") for mask in self.masks])
+        full = self.masks[popcount == size]
+        if not len(full):
+            return []
+        lineup_masks, inverse = np.unique(full, return_inverse=True)
+        on = np.zeros((len(lineup_masks), self.stats.shape[1]))
+        np.add.at(on, inverse, self.stats[popcount == size])
+        members = [
+            tuple(bit for bit in range(len(self.players)) if int(mask) >> bit & 1)
+            for mask in lineup_masks
+        ]
+        return self._describe(members, on, min_possessions)
+
+    def _describe(self, members, on: np.ndarray, min_possessions: int) -> List[Dict]:
+        """Ratings of each group with the team's ratings while it sat."""
+        off = self.totals - on
+        offensive = _rating(on[:, POINTS_FOR], on[:, OFF_POSSESSIONS])
+        defensive = _rating(on[:, POINTS_AGAINST], on[:, DEF_POSSESSIONS])
+        on_net = offensive - defensive
+        off_net = _rating(off[:, POINTS_FOR], off[:, OFF_POSSESSIONS]) - _rating(
+            off[:, POINTS_AGAINST], off[:, DEF_POSSESSIONS]
+        )
+        possessions = on[:, OFF_POSSESSIONS] + on[:, DEF_POSSESSIONS]
+
+        results = []
+        for index in np.argsort(-on_net, kind="stable"):
+            if possessions[index] == 0 or possessions[index] < min_possessions:
+                continue
+            results.append(
+                {
+                    "players": [self.players[bit]["name"] for bit in members[index]],
+                    "possessions": int(possessions[index]),
+                    "minutes_played": round(float(on[index, SECONDS]) / 60.0, 1),
+                    "points_for": int(on[index, POINTS_FOR]),
+                    "points_against": int(on[index, POINTS_AGAINST]),
+                    "plus_minus": int(
+                        on[index, POINTS_FOR] - on[index, POINTS_AGAINST]
+                    ),
+                    "offensive_rating": round(float(offensive[index]), 1),
+                    "defensive_rating": round(float(defensive[index]), 1),
+                    "net_rating": round(float(on_net[index]), 1),
+                    "off_court_net_rating": round(float(off_net[index]), 1),
+                    "on_off": round(float(on_net[index] - off_net[index]), 1),
+                }
+            )
+        return results
+
+
+def partnership(split: Dict) -> Dict:
+    """Shape a two-man split like the chemistry report's partnership entries."""
+    player1, player2 = split["players"]
+    return {
+        "player1": player1,
+        "player2": player2,
+        **{key: value for key, value in split.items() if key != "players"},
+        "synergy": synergy_label(split["net_rating"]),
+    }
@@ -0,0 +1,316 @@
+# apps/scouting/distributions.py
+
+import logging
+from bisect import bisect_right
+from datetime import timedelta
+from functools import partial
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Count, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.competitions.models import MetricDistribution
+from apps.core.cache_utils import CacheManager
+from apps.games.models import TeamGameStats
+from apps.possessions.models import Possession
+from apps.users.models import User
+
+logger = logging.getLogger(__name__)
+
+FIELD_GOAL_OUTCOMES = [
+    Possession.OutcomeChoices.MADE_2PTS,
+    Possession.OutcomeChoices.MISSED_2PTS,
+    Possession.OutcomeChoices.MADE_3PTS,
+    Possession.OutcomeChoices.MISSED_3PTS,
+]
+FIELD_GOAL_MAKES = [
+    Possession.OutcomeChoices.MADE_2PTS,
+    Possession.OutcomeChoices.MADE_3PTS,
+]
+THREE_POINT_OUTCOMES = [
+    Possession.OutcomeChoices.MADE_3PTS,
+    Possession.OutcomeChoices.MISSED_3PTS,
+]
+
+# Season metrics with distributions, in display order.
+METRICS = {
+    "points_per_game": "Points Per Game",
+    "assists_per_game": "Assists Per Game",
+    "rebounds_per_game": "Rebounds Per Game",
+    "field_goal_percentage": "Field Goal %",
+    "three_point_percentage": "3-Point %",
+    "points_per_possession": "Points Per Possession",
+}
+
+# Distributions older than this are refreshed in the background on the next
+# lookup; the compute_league_distributions command normally does it nightly.
+MAX_AGE = timedelta(hours=24)
+# Held by the one worker recomputing a competition's distributions
+COMPUTE_LOCK_KEY = "scouting:distributions_lock:{competition_id}"
+COMPUTE_LOCK_TIMEOUT = 300
+
+DistributionKey = Tuple[str, str, str]
+
+
+def _ratio(numerator, denominator, scale=1.0) -> float:
+    return round(numerator * scale / denominator, 3) if denominator else 0.0
+
+
+def _season_metrics(games, points, assists, rebounds, shots, possessions) -> Dict:
+    """Season metrics from raw totals; ``shots`` is (fgm, fga, 3pm, 3pa)."""
+    fgm, fga, tpm, tpa = shots
+    return {
+        "points_per_game": _ratio(points, games),
+        "assists_per_game": _ratio(assists, games),
+        "rebounds_per_game": _ratio(rebounds, games),
+        "field_goal_percentage": _ratio(fgm, fga, 100),
+        "three_point_percentage": _ratio(tpm, tpa, 100),
+        "points_per_possession": _ratio(points, possessions),
+    }
+
+
+def player_season_metrics(
+    competition, users: Optional[Iterable] = None
+) -> Dict[int, Dict]:
+    """
+    Season metrics of every player who took the floor in the competition
+    (or only ``users``), from a fixed number of grouped queries. Scoring
+    and shooting are counted while the player was on court, as in the
+    self scouting profile.
+    """
+    in_competition = {"possession__game__competition": competition}
+    if users is not None:
+        in_competition["user__in"] = users
+
+    offense = (
+        Possession.players_on_court.through.objects.filter(**in_competition)
+        .values("user_id")
+        .annotate(
+            possessions=Count("id"),
+            points=Coalesce(Sum("possession__points_scored"), 0),
+            fga=Count(
+                Case(When(possession__outcome__in=FIELD_GOAL_OUTCOMES, then=Value(1)))
+            ),
+            fgm=Count(
+                Case(When(possession__outcome__in=FIELD_GOAL_MAKES, then=Value(1)))
+            ),
+            tpa=Count(
+                Case(When(possession__outcome__in=THREE_POINT_OUTCOMES, then=Value(1)))
+            ),
+            tpm=Count(
+                Case(
+                    When(
+                        possession__outcome=Possession.OutcomeChoices.MADE_3PTS,
+                        then=Value(1),
+                    )
+                )
+            ),
+        )
+        .order_by()
+    )
+    offense = {row["user_id"]: row for row in offense}
+
+    games: Dict[int, set] = {}
+    for through in (
+        Possession.players_on_court.through,
+        Possession.defensive_players_on_court.through,
+    ):
+        pairs = (
+            through.objects.filter(**in_competition)
+            .values_list("user_id", "possession__game_id")
+            .distinct()
+        )
+        for user_id, game_id in pairs:
+            games.setdefault(user_id, set()).add(game_id)
+
+    assist_filter = {"game__competition": competition, "assisted_by__isnull": False}
+    if users is not None:
+        assist_filter["assisted_by__in"] = users
+    assists = dict(
+        Possession.objects.filter(**assist_filter)
+        .values("assisted_by")
+        .annotate(count=Count("id"))
+        .values_list("assisted_by", "count")
+    )
+    rebounds = dict(
+        Possession.offensive_rebound_players.through.objects.filter(**in_competition)
+        .values("user_id")
+        .annotate(count=Count("id"))
+        .values_list("user_id", "count")
+    )
+    positions = dict(User.objects.filter(id__in=games).values_list("id", "position"))
+
+    players = {}
+    for user_id, played in games.items():
+        row = offense.get(user_id, {})
+        players[user_id] = {
+            "position": positions.get(user_id) or "",
+            **_season_metrics(
+                len(played),
+                row.get("points", 0),
+                assists.get(user_id, 0),
+                rebounds.get(user_id, 0),
+                (
+                    row.get("fgm", 0),
+                    row.get("fga", 0),
+                    row.get("tpm", 0),
+                    row.get("tpa", 0),
+                ),
+                row.get("possessions", 0),
+            ),
+        }
+    return players
+
+
+def team_season_metrics(competition) -> Dict[int, Dict]:
+    """Season metrics of every team in the competition, from TeamGameStats."""
+    rows = (
+        TeamGameStats.objects.filter(game__competition=competition)
+        .values("team_id")
+        .annotate(
+            games=Count("game", distinct=True),
+            **{field: Sum(field) for field in TeamGameStats.COUNTERS},
+        )
+        .order_by()
+    )
+    return {
+        row["team_id"]: _season_metrics(
+            row["games"],
+            row["points"],
+            row["assists"],
+            row["offensive_rebounds"],
+            (
+                row["made_2pts"] + row["made_3pts"],
+                row["made_2pts"]
+                + row["made_3pts"]
+                + row["missed_2pts"]
+                + row["missed_3pts"],
+                row["made_3pts"],
+                row["made_3pts"] + row["missed_3pts"],
+            ),
+            row["possessions"],
+        )
+        for row in rows
+    }
+
+
+def build_distributions(competition) -> List[MetricDistribution]:
+    """Every distribution of a competition, computed but not stored."""
+    players = player_season_metrics(competition).values()
+    teams = team_season_metrics(competition).values()
+
+    populations = [(MetricDistribution.Scope.PLAYER, "", list(players))]
+    for position in sorted({player["position"] for player in players} - {""}):
+        populations.append(
+            (
+                MetricDistribution.Scope.POSITION,
+                position,
+                [player for player in players if player["position"] == position],
+            )
+        )
+    populations.append((MetricDistribution.Scope.TEAM, "", list(teams)))
+
+    return [
+        MetricDistribution(
+            competition=competition,
+            scope=scope,
+            group=group,
+            metric=metric,
+            values=sorted(entry[metric] for entry in entries),
+        )
+        for scope, group, entries in populations
+        for metric in METRICS
+    ]
+
+
+def compute_distributions(competition) -> int:
+    """
+    Recompute and store every distribution of a competition. Rows are
+    upserted, so concurrent runs never collide on the unique key.
+    """
+    distributions = build_distributions(competition)
+    with transaction.atomic():
+        kept = []
+        for distribution in distributions:
+            row, _ = MetricDistribution.objects.update_or_create(
+                competition=competition,
+                scope=distribution.scope,
+                group=distribution.group,
+                metric=distribution.metric,
+                defaults={"values": distribution.values},
+            )
+            kept.append(row.pk)
+        # Positions nobody plays anymore
+        MetricDistribution.objects.filter(competition=competition).exclude(
+            pk__in=kept
+        ).delete()
+    return len(distributions)
+
+
+def _lock_compute(competition) -> bool:
+    key = COMPUTE_LOCK_KEY.format(competition_id=competition.pk)
+    try:
+        return cache.add(key, 1, COMPUTE_LOCK_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"Distributions lock failed for {competition.pk}: {e}")
+        return False
+
+
+def _unlock_compute(competition) -> None:
+    try:
+        cache.delete(COMPUTE_LOCK_KEY.format(competition_id=competition.pk))
+    except Exception as e:
+        logger.warning(f"Distributions lock failed for {competition.pk}: {e}")
+
+
+def _refresh_distributions(competition) -> None:
+    """Recompute stale distributions; the caller holds the compute lock."""
+    try:
+        compute_distributions(competition)
+    except Exception as e:
+        logger.warning(f"Distributions refresh failed for {competition.pk}: {e}")
+    finally:
+        _unlock_compute(competition)
+
+
+def get_distributions(competition) -> Dict[DistributionKey, List[float]]:
+    """
+    Stored distributions of a competition keyed by (scope, group, metric).
+    Stale ones are served while a single worker refreshes them in the
+    background; missing ones are computed on the spot.
+    """
+    stored = MetricDistribution.objects.filter(competition=competition).values_list(
+        "scope", "group", "metric", "values", "computed_at"
+    )
+    rows = list(stored)
+    if not rows:
+        if _lock_compute(competition):
+            try:
+                compute_distributions(competition)
+            finally:
+                _unlock_compute(competition)
+            rows = list(stored.all())
+        else:
+            # Another worker is storing them; compute this request's copy only
+            rows = [
+                (row.scope, row.group, row.metric, row.values, None)
+                for row in build_distributions(competition)
+            ]
+    elif min(row[4] for row in rows) < timezone.now() - MAX_AGE:
+        if _lock_compute(competition):
+            CacheManager._schedule_refresh(partial(_refresh_distributions, competition))
+    return {(scope, group, metric): values for scope, group, metric, values, _ in rows}
+
+
+def percentile(values: List[float], value: float) -> float:
+    """Share of the distribution at or below ``value``, by binary search."""
+    if not values:
+        return 0.0
+    return round(bisect_right(values, value) * 100.0 / len(values), 1)
+
+
+def average(values: List[float]) -> float:
+    return round(sum(values) / len(values), 3) if values else 0.0
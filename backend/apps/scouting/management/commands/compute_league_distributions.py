@@ -0,0 +1,33 @@
+"""
+Management command to precompute league metric distributions per competition.
+"""
+
+from django.core.management.base import BaseCommand
+from apps.competitions.models import Competition
+from apps.scouting.distributions import compute_distributions
+
+
+class Command(BaseCommand):
+    help = "Recompute player, position and team metric distributions (run nightly)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--competition",
+            type=int,
+            action="append",
+            dest="competitions",
+            help="Only recompute this competition (can be given several times)",
+        )
+
+    def handle(self, *args, **options):
+        competitions = Competition.objects.all()
+        if options["competitions"]:
+            competitions = competitions.filter(id__in=options["competitions"])
+
+        total = 0
+        for competition in competitions:
+            rows = compute_distributions(competition)
+            total += rows
+            self.stdout.write(f"{competition}: {rows} distribution(s)")
+
+        self.stdout.write(self.style.SUCCESS(f"Stored {total} distribution(s)"))
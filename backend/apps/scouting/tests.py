@@ -0,0 +1,242 @@
+from datetime import timedelta
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.competitions.models import Competition, MetricDistribution
+from apps.games.models import Game, GameRoster
+from apps.possessions.models import Possession
+from apps.scouting.chemistry import ChemistryEngine
+from apps.scouting.distributions import (
+    MAX_AGE,
+    average,
+    compute_distributions,
+    percentile,
+)
+from apps.teams.models import Team
+
+User = get_user_model()
+
+
+class ChemistryEngineTests(SimpleTestCase):
+    def setUp(self):
+        players = [{"id": i, "name": f"P{i}"} for i in range(4)]
+        # (players on court, team on offense, points, seconds)
+        possessions = [
+            ({0, 1, 2}, True, 3, 12),
+            ({0, 1}, True, 0, 18),
+            ({0, 1, 3}, False, 2, 20),
+            ({2, 3}, False, 0, 10),
+            ({1, 2, 3}, True, 2, 14),
+        ]
+        self.possessions = possessions
+        self.engine = ChemistryEngine(
+            players,
+            np.array(
+                [sum(1 << p for p in on) for on, _, _, _ in possessions],
+                dtype=np.uint64,
+            ),
+            offense=np.array([o for _, o, _, _ in possessions]),
+            points=np.array([p for _, _, p, _ in possessions], dtype=np.float64),
+            seconds=np.array([s for _, _, _, s in possessions], dtype=np.float64),
+        )
+
+    def test_pair_splits_match_brute_force(self):
+        splits = self.engine.splits(2)
+        self.assertEqual(len(splits), 6)
+
+        for split in splits:
+            group = {int(name[1:]) for name in split["players"]}
+            on = [p for p in self.possessions if group <= p[0]]
+            points_for = sum(pts for _, offense, pts, _ in on if offense)
+            points_against = sum(pts for _, offense, pts, _ in on if not offense)
+            self.assertEqual(split["possessions"], len(on))
+            self.assertEqual(split["plus_minus"], points_for - points_against)
+            self.assertEqual(
+                split["minutes_played"], round(sum(p[3] for p in on) / 60.0, 1)
+            )
+
+        best = splits[0]
+        self.assertEqual(best["players"], ["P0", "P2"])
+        self.assertEqual(best["net_rating"], 300.0)
+        self.assertEqual(best["off_court_net_rating"], 0.0)
+        self.assertEqual(best["on_off"], 300.0)
+
+    def test_lineups_group_exact_units(self):
+        lineups = self.engine.lineups(size=3)
+        self.assertEqual(
+            sorted(lineup["players"] for lineup in lineups),
+            [["P0", "P1", "P2"], ["P0", "P1", "P3"], ["P1", "P2", "P3"]],
+        )
+        self.assertEqual(self.engine.splits(3, min_possessions=2), [])
+
+
+class SelfScoutingTests(APITestCase):
+    def setUp(self):
+        self.coach = User.objects.create_user(
+            username="coach", password="password", role=User.Role.COACH
+        )
+        self.player = User.objects.create_user(
+            username="player",
+            password="password",
+            role=User.Role.PLAYER,
+            first_name="Star",
+            last_name="Guard",
+        )
+        competition = Competition.objects.create(
+            name="L", season="S", created_by=self.coach
+        )
+        self.team = Team.objects.create(
+            name="Team A", competition=competition, created_by=self.coach
+        )
+        self.opponent = Team.objects.create(
+            name="Team B", competition=competition, created_by=self.coach
+        )
+        self.team.players.add(self.player)
+        self.competition = competition
+
+    def add_game(self, possessions_per_side):
+        game = Game.objects.create(
+            competition=self.competition,
+            home_team=self.team,
+            away_team=self.opponent,
+            game_date=timezone.now(),
+        )
+        home = GameRoster.objects.create(game=game, team=self.team)
+        away = GameRoster.objects.create(game=game, team=self.opponent)
+        for _ in range(possessions_per_side):
+            scored = Possession.objects.create(
+                game=game,
+                team=home,
+                opponent=away,
+                quarter=1,
+                start_time_in_game="10:00",
+                duration_seconds=30,
+                outcome=Possession.OutcomeChoices.MADE_3PTS,
+                assisted_by=self.player,
+                created_by=self.coach,
+            )
+            scored.players_on_court.add(self.player)
+            stopped = Possession.objects.create(
+                game=game,
+                team=away,
+                opponent=home,
+                quarter=1,
+                start_time_in_game="09:30",
+                duration_seconds=30,
+                outcome=Possession.OutcomeChoices.TURNOVER,
+                stolen_by=self.player,
+                created_by=self.coach,
+            )
+            stopped.defensive_players_on_court.add(self.player)
+
+    def get_profile(self):
+        self.client.force_authenticate(user=self.player)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("scouting:self_scouting"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return response, len(queries.captured_queries)
+
+    def test_player_profile_cost_does_not_grow_with_possessions(self):
+        self.add_game(2)
+        self.get_profile()  # computes the league distributions
+        _, small_cost = self.get_profile()
+
+        self.add_game(6)
+        response, cost = self.get_profile()
+        self.assertEqual(cost, small_cost)
+
+        profile = response.data["player_profile"]
+        self.assertEqual(profile["team"], "Team A")
+        self.assertEqual(profile["games_played"], 2)
+        self.assertEqual(profile["total_points"], 24)
+        self.assertEqual(profile["total_assists"], 8)
+        self.assertEqual(profile["total_steals"], 8)
+        self.assertEqual(profile["minutes_per_game"], 4.0)
+        self.assertEqual(profile["field_goal_percentage"], 1.0)
+
+        recent = response.data["recent_games"]["last_five_games"]
+        self.assertEqual(len(recent), 2)
+        self.assertEqual(sorted(game["player_assists"] for game in recent), [2, 6])
+
+    def test_server_timing_lists_sections(self):
+        self.add_game(1)
+        response, _ = self.get_profile()
+        sections = [
+            entry.split(";")[0] for entry in response["Server-Timing"].split(", ")
+        ]
+        self.assertEqual(
+            sections,
+            [
+                "profile",
+                "team",
+                "season",
+                "recent",
+                "comparison",
+                "chemistry",
+                "storylines",
+            ],
+        )
+
+    def test_player_comparison_uses_league_distributions(self):
+        self.add_game(2)
+        bench = User.objects.create_user(
+            username="bench", password="password", role=User.Role.PLAYER, position="PG"
+        )
+        self.player.position = "PG"
+        self.player.save()
+        possession = Possession.objects.filter(team__team=self.team).first()
+        possession.players_on_court.set([bench])
+        compute_distributions(self.competition)
+
+        response, _ = self.get_profile()
+        comparison = response.data["player_comparison"]
+        ppg = comparison["metrics"][0]
+        self.assertEqual(ppg["metric"], "Points Per Game")
+        self.assertEqual(ppg["player_value"], 3.0)
+        self.assertEqual(ppg["league_average"], 3.0)
+        self.assertEqual(ppg["league_percentile"], 100.0)
+        self.assertEqual(ppg["position_percentile"], 100.0)
+        self.assertEqual(
+            [row["position"] for row in comparison["position_comparisons"]], ["PG"]
+        )
+        self.assertEqual(comparison["team_comparisons"][0]["points_per_game"], 6.0)
+        self.assertEqual(
+            comparison["team_comparisons"][0]["league_percentiles"]["points_per_game"],
+            100.0,
+        )
+
+    def test_stale_distributions_are_served_then_refreshed(self):
+        self.add_game(2)
+        compute_distributions(self.competition)
+        compute_distributions(self.competition)  # upserts in place
+        stale = timezone.now() - MAX_AGE - timedelta(minutes=1)
+        MetricDistribution.objects.update(computed_at=stale)
+        ppg_rows = MetricDistribution.objects.filter(
+            competition=self.competition,
+            scope=MetricDistribution.Scope.PLAYER,
+            metric="points_per_game",
+        )
+        before = ppg_rows.get().values
+        self.add_game(6)
+
+        response, _ = self.get_profile()
+        ppg = response.data["player_comparison"]["metrics"][0]
+        self.assertEqual(ppg["league_average"], average(before))
+
+        refreshed = ppg_rows.get()
+        self.assertGreater(refreshed.computed_at, stale)
+        self.assertNotEqual(refreshed.values, before)
+
+    def test_percentile_is_share_at_or_below(self):
+        values = [1.0, 2.0, 2.0, 4.0]
+        self.assertEqual(percentile(values, 2.0), 75.0)
+        self.assertEqual(percentile(values, 0.5), 0.0)
+        self.assertEqual(percentile([], 3.0), 0.0)
@@ -2,14 +2,29 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from django.db.models import Q, Avg, Count, Sum
+from django.db.models import Q, Avg, Case, Count, Exists, OuterRef, Sum, Value, When
 from apps.possessions.models import Possession
-from apps.games.models import Game, GameRoster
+from apps.games.models import Game, GameRoster, TeamGameStats
 from apps.teams.models import Team
 from apps.users.models import User
+from apps.competitions.models import MetricDistribution
+from apps.core.spans import span
+from .chemistry import ChemistryEngine, partnership
+from .distributions import (
+    FIELD_GOAL_OUTCOMES,
+    METRICS,
+    average,
+    get_distributions,
+    percentile,
+    player_season_metrics,
+    team_season_metrics,
+)
 from datetime import datetime, timedelta
 import math
 
+# Possessions together before a partnership or lineup counts as established
+CHEMISTRY_MIN_POSSESSIONS = 20
+
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
@@ -19,7 +34,7 @@ def self_scouting(request):
     """
     try:
         user = request.user
-        user_team = user.team
+        user_team = _get_user_team(user)
 
         if not user_team:
             return Response(
@@ -37,122 +52,118 @@ def self_scouting(request):
             game__in=team_games
         ).select_related("game", "team", "opponent")
 
-        # Calculate player profile
-        player_profile = _calculate_player_profile(user, team_possessions, team_games)
-
-        # Calculate team performance
-        team_performance = _calculate_team_performance(
-            user_team, team_games, team_possessions
+        # Each section is a span, reported in the Server-Timing header
+        return Response(
+            {
+                "player_profile": _calculate_player_profile(
+                    user, user_team, team_possessions
+                ),
+                "team_performance": _calculate_team_performance(
+                    user_team, team_games, team_possessions
+                ),
+                "season_stats": _calculate_season_stats(
+                    user_team, team_games, team_possessions
+                ),
+                "recent_games": _calculate_recent_games(user, user_team, team_games),
+                "player_comparison": _calculate_player_comparison(user, user_team),
+                "team_chemistry": _calculate_team_chemistry(
+                    user_team, team_possessions
+                ),
+                "season_storylines": _generate_season_storylines(
+                    user, user_team, team_games, team_possessions
+                ),
+            }
         )
 
-        # Calculate season stats
-        season_stats = _calculate_season_stats(user_team, team_games, team_possessions)
+    except Exception as e:
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        # Calculate recent games
-        recent_games = _calculate_recent_games(user, team_games, team_possessions)
 
-        # Calculate player comparison
-        player_comparison = _calculate_player_comparison(user, user_team)
+def _get_user_team(user):
+    """The team the user plays for, or coaches if they are not on a roster"""
+    return user.player_on_teams.first() or user.coach_on_teams.first()
 
-        # Calculate team chemistry
-        team_chemistry = _calculate_team_chemistry(user_team, team_possessions)
 
-        # Generate season storylines
-        season_storylines = _generate_season_storylines(
-            user, user_team, team_games, team_possessions
+def _on_court(user):
+    """Possessions where the user was on court at either end"""
+    return Exists(
+        Possession.players_on_court.through.objects.filter(
+            possession=OuterRef("pk"), user=user
         )
-
-        return Response(
-            {
-                "player_profile": player_profile,
-                "team_performance": team_performance,
-                "season_stats": season_stats,
-                "recent_games": recent_games,
-                "player_comparison": player_comparison,
-                "team_chemistry": team_chemistry,
-                "season_storylines": season_storylines,
-            }
+    ) | Exists(
+        Possession.defensive_players_on_court.through.objects.filter(
+            possession=OuterRef("pk"), user=user
         )
-
-    except Exception as e:
-        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    )
 
 
-def _calculate_player_profile(user, possessions, games):
+@span("profile")
+def _calculate_player_profile(user, team, possessions):
     """Calculate comprehensive player profile statistics"""
 
-    # Filter possessions where user was on court
-    user_possessions = []
-    for possession in possessions:
-        if (
-            possession.players_on_court.filter(id=user.id).exists()
-            or possession.defensive_players_on_court.filter(id=user.id).exists()
-        ):
-            user_possessions.append(possession)
+    def on_offense(**lookups):
+        return Count(Case(When(team__team=team, **lookups, then=Value(1))))
+
+    # One aggregate over the possessions where the user was on court
+    totals = (
+        possessions.order_by()
+        .filter(_on_court(user))
+        .aggregate(
+            games_played=Count("game", distinct=True),
+            seconds=Sum("duration_seconds"),
+            points=Sum(Case(When(team__team=team, then="points_scored"))),
+            assists=Count(Case(When(assisted_by=user, then=Value(1)))),
+            rebounds=Count(
+                Case(
+                    When(
+                        Exists(
+                            Possession.offensive_rebound_players.through.objects.filter(
+                                possession=OuterRef("pk"), user=user
+                            )
+                        ),
+                        then=Value(1),
+                    )
+                )
+            ),
+            steals=Count(Case(When(stolen_by=user, then=Value(1)))),
+            blocks=Count(Case(When(blocked_by=user, then=Value(1)))),
+            turnovers=on_offense(outcome=Possession.OutcomeChoices.TURNOVER),
+            field_goal_attempts=on_offense(outcome__in=FIELD_GOAL_OUTCOMES),
+            field_goal_makes=on_offense(
+                outcome__in=[
+                    Possession.OutcomeChoices.MADE_2PTS,
+                    Possession.OutcomeChoices.MADE_3PTS,
+                ]
+            ),
+            three_point_attempts=on_offense(
+                outcome__in=[
+                    Possession.OutcomeChoices.MADE_3PTS,
+                    Possession.OutcomeChoices.MISSED_3PTS,
+                ]
+            ),
+            three_point_makes=on_offense(outcome=Possession.OutcomeChoices.MADE_3PTS),
+        )
+    )
 
     # Calculate basic stats
-    total_points = sum(
-        p.points_scored for p in user_possessions if p.team and p.team.team == user.team
-    )
-    total_assists = len([p for p in user_possessions if p.assisted_by == user])
-    total_rebounds = len(
-        [
-            p
-            for p in user_possessions
-            if p.is_offensive_rebound or p.is_defensive_rebound
-        ]
-    )
-    total_steals = len([p for p in user_possessions if p.stolen_by == user])
-    total_blocks = len([p for p in user_possessions if p.blocked_by == user])
-    total_turnovers = len(
-        [
-            p
-            for p in user_possessions
-            if p.outcome == "TURNOVER" and p.team and p.team.team == user.team
-        ]
-    )
+    total_points = totals["points"] or 0
+    total_assists = totals["assists"]
+    total_rebounds = totals["rebounds"]
+    total_steals = totals["steals"]
+    total_blocks = totals["blocks"]
+    total_turnovers = totals["turnovers"]
 
     # Calculate minutes (simplified - sum of possession durations)
-    total_minutes = sum(p.duration_seconds for p in user_possessions) / 60.0
+    total_minutes = (totals["seconds"] or 0) / 60.0
 
-    games_played = len(set(p.game.id for p in user_possessions))
+    games_played = totals["games_played"]
     minutes_per_game = total_minutes / games_played if games_played > 0 else 0
 
     # Calculate shooting percentages (simplified)
-    field_goal_attempts = len(
-        [
-            p
-            for p in user_possessions
-            if p.outcome in ["MADE_2PTS", "MISSED_2PTS", "MADE_3PTS", "MISSED_3PTS"]
-            and p.team
-            and p.team.team == user.team
-        ]
-    )
-    field_goal_makes = len(
-        [
-            p
-            for p in user_possessions
-            if p.outcome in ["MADE_2PTS", "MADE_3PTS"]
-            and p.team
-            and p.team.team == user.team
-        ]
-    )
-    three_point_attempts = len(
-        [
-            p
-            for p in user_possessions
-            if p.outcome in ["MADE_3PTS", "MISSED_3PTS"]
-            and p.team
-            and p.team.team == user.team
-        ]
-    )
-    three_point_makes = len(
-        [
-            p
-            for p in user_possessions
-            if p.outcome == "MADE_3PTS" and p.team and p.team.team == user.team
-        ]
-    )
+    field_goal_attempts = totals["field_goal_attempts"]
+    field_goal_makes = totals["field_goal_makes"]
+    three_point_attempts = totals["three_point_attempts"]
+    three_point_makes = totals["three_point_makes"]
 
     field_goal_percentage = (
         field_goal_makes / field_goal_attempts if field_goal_attempts > 0 else 0
@@ -190,7 +201,7 @@ def _calculate_player_profile(user, possessions, games):
         "name": f"{user.first_name} {user.last_name}",
         "position": getattr(user, "position", "N/A"),
         "jersey_number": getattr(user, "jersey_number", 0),
-        "team": user.team.name if user.team else "N/A",
+        "team": team.name if team else "N/A",
         "games_played": games_played,
         "minutes_per_game": round(minutes_per_game, 1),
         "total_points": total_points,
@@ -226,21 +237,48 @@ def _calculate_player_profile(user, possessions, games):
     }
 
 
+def _per_game(total, games_played):
+    """Average a season total over the games played"""
+    return round(total / games_played, 1) if games_played > 0 else 0
+
+
+def _field_goal_percentage(totals):
+    """Field goal percentage from TeamGameStats totals"""
+    makes = totals["made_2pts"] + totals["made_3pts"]
+    attempts = makes + totals["missed_2pts"] + totals["missed_3pts"]
+    return makes / attempts if attempts > 0 else 0
+
+
+def _three_point_percentage(totals):
+    """Three point percentage from TeamGameStats totals"""
+    attempts = totals["made_3pts"] + totals["missed_3pts"]
+    return totals["made_3pts"] / attempts if attempts > 0 else 0
+
+
+def _free_throw_percentage(totals):
+    """Free throw percentage from TeamGameStats totals"""
+    attempts = totals["made_fts"] + totals["missed_fts"]
+    return totals["made_fts"] / attempts if attempts > 0 else 0
+
+
+@span("team")
 def _calculate_team_performance(team, games, possessions):
     """Calculate team performance statistics"""
 
-    team_games = [g for g in games if g.home_team == team or g.away_team == team]
+    team_games = [g for g in games if team.id in (g.home_team_id, g.away_team_id)]
     wins = 0
     total_points = 0
     total_points_allowed = 0
 
     for game in team_games:
-        if (game.home_team == team and game.home_team_score > game.away_team_score) or (
-            game.away_team == team and game.away_team_score > game.home_team_score
+        if (
+            game.home_team_id == team.id and game.home_team_score > game.away_team_score
+        ) or (
+            game.away_team_id == team.id and game.away_team_score > game.home_team_score
         ):
             wins += 1
 
-        if game.home_team == team:
+        if game.home_team_id == team.id:
             total_points += game.home_team_score
             total_points_allowed += game.away_team_score
         else:
@@ -250,43 +288,18 @@ def _calculate_team_performance(team, games, possessions):
     losses = len(team_games) - wins
     win_percentage = wins / len(team_games) if len(team_games) > 0 else 0
 
-    # Calculate other team stats from possessions
-    team_possessions = [p for p in possessions if p.team and p.team.team == team]
+    # Calculate other team stats from the per-game rollup
+    totals = TeamGameStats.totals(team=team, game__in=games)
 
-    total_rebounds = len(
-        [
-            p
-            for p in team_possessions
-            if p.is_offensive_rebound or p.is_defensive_rebound
-        ]
-    )
-    total_assists = len([p for p in team_possessions if p.assisted_by])
-    total_steals = len([p for p in team_possessions if p.stolen_by])
-    total_blocks = len([p for p in team_possessions if p.blocked_by])
-    total_turnovers = len([p for p in team_possessions if p.outcome == "TURNOVER"])
+    total_rebounds = totals["offensive_rebounds"]
+    total_assists = totals["assists"]
+    total_steals = totals["times_stolen"]
+    total_blocks = totals["times_blocked"]
+    total_turnovers = totals["turnovers"]
 
     # Calculate shooting percentages
-    field_goal_attempts = len(
-        [
-            p
-            for p in team_possessions
-            if p.outcome in ["MADE_2PTS", "MISSED_2PTS", "MADE_3PTS", "MISSED_3PTS"]
-        ]
-    )
-    field_goal_makes = len(
-        [p for p in team_possessions if p.outcome in ["MADE_2PTS", "MADE_3PTS"]]
-    )
-    three_point_attempts = len(
-        [p for p in team_possessions if p.outcome in ["MADE_3PTS", "MISSED_3PTS"]]
-    )
-    three_point_makes = len([p for p in team_possessions if p.outcome == "MADE_3PTS"])
-
-    field_goal_percentage = (
-        field_goal_makes / field_goal_attempts if field_goal_attempts > 0 else 0
-    )
-    three_point_percentage = (
-        three_point_makes / three_point_attempts if three_point_attempts > 0 else 0
-    )
+    field_goal_percentage = _field_goal_percentage(totals)
+    three_point_percentage = _three_point_percentage(totals)
 
     return {
         "team_name": team.name,
@@ -343,22 +356,25 @@ def _calculate_team_performance(team, games, possessions):
     }
 
 
+@span("season")
 def _calculate_season_stats(team, games, possessions):
     """Calculate season-wide statistics"""
 
     current_year = datetime.now().year
-    team_games = [g for g in games if g.home_team == team or g.away_team == team]
+    team_games = [g for g in games if team.id in (g.home_team_id, g.away_team_id)]
 
     total_wins = 0
     total_points = 0
 
     for game in team_games:
-        if (game.home_team == team and game.home_team_score > game.away_team_score) or (
-            game.away_team == team and game.away_team_score > game.home_team_score
+        if (
+            game.home_team_id == team.id and game.home_team_score > game.away_team_score
+        ) or (
+            game.away_team_id == team.id and game.away_team_score > game.home_team_score
         ):
             total_wins += 1
 
-        if game.home_team == team:
+        if game.home_team_id == team.id:
             total_points += game.home_team_score
         else:
             total_points += game.away_team_score
@@ -366,6 +382,8 @@ def _calculate_season_stats(team, games, possessions):
     total_losses = len(team_games) - total_wins
     overall_win_percentage = total_wins / len(team_games) if len(team_games) > 0 else 0
 
+    totals = TeamGameStats.totals(team=team, game__in=games)
+
     # Calculate monthly performance (simplified)
     monthly_performance = []
     months = ["October", "November", "December", "January", "February", "March"]
@@ -413,28 +431,30 @@ def _calculate_season_stats(team, games, possessions):
         "average_points_per_game": (
             round(total_points / len(team_games), 1) if len(team_games) > 0 else 0
         ),
-        "total_rebounds": 0,  # Placeholder
-        "average_rebounds_per_game": 0,  # Placeholder
-        "total_assists": 0,  # Placeholder
-        "average_assists_per_game": 0,  # Placeholder
-        "total_steals": 0,  # Placeholder
-        "average_steals_per_game": 0,  # Placeholder
-        "total_blocks": 0,  # Placeholder
-        "average_blocks_per_game": 0,  # Placeholder
-        "total_turnovers": 0,  # Placeholder
-        "average_turnovers_per_game": 0,  # Placeholder
-        "overall_field_goal_percentage": 0.45,  # Placeholder
-        "overall_three_point_percentage": 0.35,  # Placeholder
-        "overall_free_throw_percentage": 0.75,  # Placeholder
+        "total_rebounds": totals["offensive_rebounds"],
+        "average_rebounds_per_game": _per_game(
+            totals["offensive_rebounds"], len(team_games)
+        ),
+        "total_assists": totals["assists"],
+        "average_assists_per_game": _per_game(totals["assists"], len(team_games)),
+        "total_steals": totals["times_stolen"],
+        "average_steals_per_game": _per_game(totals["times_stolen"], len(team_games)),
+        "total_blocks": totals["times_blocked"],
+        "average_blocks_per_game": _per_game(totals["times_blocked"], len(team_games)),
+        "total_turnovers": totals["turnovers"],
+        "average_turnovers_per_game": _per_game(totals["turnovers"], len(team_games)),
+        "overall_field_goal_percentage": round(_field_goal_percentage(totals), 3),
+        "overall_three_point_percentage": round(_three_point_percentage(totals), 3),
+        "overall_free_throw_percentage": round(_free_throw_percentage(totals), 3),
         "monthly_performance": monthly_performance,
         "opponent_performance": opponent_performance,
     }
 
 
-def _calculate_recent_games(user, games, possessions):
+@span("recent")
+def _calculate_recent_games(user, team, games):
     """Calculate recent game results and upcoming games"""
 
-    team = user.team
     if not team:
         return {
             "last_five_games": [],
@@ -444,13 +464,41 @@ def _calculate_recent_games(user, games, possessions):
         }
 
     # Get team games sorted by date
-    team_games = [g for g in games if g.home_team == team or g.away_team == team]
-    team_games.sort(key=lambda x: x.game_date, reverse=True)
+    team_games = list(
+        games.filter(Q(home_team=team) | Q(away_team=team))
+        .select_related("home_team", "away_team")
+        .order_by("-game_date")[:5]
+    )
+
+    # Player stats for all of these games in one grouped query
+    player_games = {
+        row["game_id"]: row
+        for row in Possession.objects.filter(game__in=team_games)
+        .values("game_id")
+        .annotate(
+            points=Sum(Case(When(team__team=team, scorer=user, then="points_scored"))),
+            rebounds=Count(
+                Case(
+                    When(
+                        Exists(
+                            Possession.offensive_rebound_players.through.objects.filter(
+                                possession=OuterRef("pk"), user=user
+                            )
+                        ),
+                        then=Value(1),
+                    )
+                )
+            ),
+            assists=Count(Case(When(assisted_by=user, then=Value(1)))),
+            seconds=Sum(Case(When(_on_court(user), then="duration_seconds"))),
+        )
+        .order_by()
+    }
 
     # Calculate last 5 games
     last_five_games = []
-    for game in team_games[:5]:
-        is_home = game.home_team == team
+    for game in team_games:
+        is_home = game.home_team_id == team.id
         team_score = game.home_team_score if is_home else game.away_team_score
         opponent_score = game.away_team_score if is_home else game.home_team_score
         opponent = game.away_team.name if is_home else game.home_team.name
@@ -459,31 +507,11 @@ def _calculate_recent_games(user, games, possessions):
         result = "W" if team_score > opponent_score else "L"
 
         # Calculate player stats for this game
-        game_possessions = [p for p in possessions if p.game == game]
-        player_points = sum(
-            p.points_scored
-            for p in game_possessions
-            if p.team and p.team.team == team and p.scorer == user
-        )
-        player_rebounds = len(
-            [
-                p
-                for p in game_possessions
-                if p.team
-                and p.team.team == team
-                and (p.is_offensive_rebound or p.is_defensive_rebound)
-            ]
-        )
-        player_assists = len([p for p in game_possessions if p.assisted_by == user])
-        player_minutes = (
-            sum(
-                p.duration_seconds
-                for p in game_possessions
-                if p.players_on_court.filter(id=user.id).exists()
-                or p.defensive_players_on_court.filter(id=user.id).exists()
-            )
-            / 60
-        )
+        stats = player_games.get(game.id, {})
+        player_points = stats.get("points") or 0
+        player_rebounds = stats.get("rebounds", 0)
+        player_assists = stats.get("assists", 0)
+        player_minutes = (stats.get("seconds") or 0) / 60
 
         last_five_games.append(
             {
@@ -544,55 +572,70 @@ def _calculate_recent_games(user, games, possessions):
     }
 
 
+@span("comparison")
 def _calculate_player_comparison(user, team):
     """Calculate player comparison metrics"""
-
-    # Generate comparison metrics (placeholder)
-    metrics = [
-        {
-            "metric": "Points Per Game",
-            "player_value": 12.2,
-            "league_average": 10.8,
-            "league_percentile": 75.0,
-            "trend": "up",
-        },
-        {
-            "metric": "Assists Per Game",
-            "player_value": 5.6,
-            "league_average": 4.2,
-            "league_percentile": 85.0,
+    competition = team.competition
+    if not competition:
+        return {"metrics": [], "position_comparisons": [], "team_comparisons": []}
+
+    distributions = get_distributions(competition)
+    player = player_season_metrics(competition, users=[user]).get(user.id, {})
+    position = getattr(user, "position", None) or ""
+    Scope = MetricDistribution.Scope
+
+    metrics = []
+    for metric, label in METRICS.items():
+        league = distributions.get((Scope.PLAYER, "", metric), [])
+        value = player.get(metric, 0.0)
+        entry = {
+            "metric": label,
+            "player_value": value,
+            "league_average": average(league),
+            "league_percentile": percentile(league, value),
             "trend": "stable",
-        },
-        {
-            "metric": "Field Goal %",
-            "player_value": 45.6,
-            "league_average": 43.2,
-            "league_percentile": 70.0,
-            "trend": "up",
-        },
-    ]
-
-    # Generate position comparisons (placeholder)
+        }
+        if position:
+            peers = distributions.get((Scope.POSITION, position, metric), [])
+            entry["position_average"] = average(peers)
+            entry["position_percentile"] = percentile(peers, value)
+        metrics.append(entry)
+
+    # Average player of each position in the competition
+    positions = sorted(
+        {group for scope, group, _ in distributions if scope == Scope.POSITION}
+    )
     position_comparisons = [
         {
-            "position": "PG",
-            "points_per_game": 12.2,
-            "rebounds_per_game": 3.2,
-            "assists_per_game": 5.6,
-            "field_goal_percentage": 45.6,
-            "three_point_percentage": 37.8,
-        },
+            "position": group,
+            **{
+                metric: average(distributions[(Scope.POSITION, group, metric)])
+                for metric in METRICS
+            },
+        }
+        for group in positions
     ]
 
-    # Generate team comparisons (placeholder)
+    # The user's team against the rest of the competition
+    team_metrics = team_season_metrics(competition).get(team.id, {})
     team_comparisons = [
         {
             "team_name": team.name,
-            "points_per_game": 83.8,
-            "rebounds_per_game": 40.1,
-            "assists_per_game": 24.2,
-            "field_goal_percentage": 47.8,
-            "three_point_percentage": 36.5,
+            **{metric: team_metrics.get(metric, 0.0) for metric in METRICS},
+            "league_percentiles": {
+                metric: percentile(
+                    distributions.get((Scope.TEAM, "", metric), []),
+                    team_metrics.get(metric, 0.0),
+                )
+                for metric in METRICS
+            },
+        },
+        {
+            "team_name": "League Average",
+            **{
+                metric: average(distributions.get((Scope.TEAM, "", metric), []))
+                for metric in METRICS
+            },
         },
     ]
 
@@ -603,50 +646,34 @@ def _calculate_player_comparison(user, team):
     }
 
 
+@span("chemistry")
 def _calculate_team_chemistry(team, possessions):
     """Calculate team chemistry metrics"""
+    engine = ChemistryEngine.build(team, possessions)
 
-    # Generate best lineups (placeholder)
-    best_lineups = [
-        {
-            "players": ["Player 1", "Player 2", "Player 3", "Player 4", "Player 5"],
-            "minutes_played": 156,
-            "offensive_rating": 118.5,
-            "defensive_rating": 95.2,
-            "net_rating": 23.3,
-            "plus_minus": 89,
-        },
-    ]
+    # Best five-man lineups that actually took the floor
+    best_lineups = engine.lineups(5, min_possessions=CHEMISTRY_MIN_POSSESSIONS)[:5]
 
-    # Generate partnerships (placeholder)
+    # Established partnerships have a full sample, emerging ones a growing one
+    pairs = engine.splits(2)
     top_partnerships = [
-        {
-            "player1": "Player 1",
-            "player2": "Player 2",
-            "minutes_played": 234,
-            "plus_minus": 67,
-            "offensive_rating": 115.3,
-            "defensive_rating": 97.8,
-            "synergy": "Excellent",
-        },
-    ]
-
+        partnership(pair)
+        for pair in pairs
+        if pair["possessions"] >= CHEMISTRY_MIN_POSSESSIONS
+    ][:5]
     emerging_partnerships = [
-        {
-            "player1": "Player 1",
-            "player2": "Player 3",
-            "minutes_played": 189,
-            "plus_minus": 34,
-            "offensive_rating": 108.7,
-            "defensive_rating": 101.2,
-            "synergy": "Good",
-        },
-    ]
+        partnership(pair)
+        for pair in pairs
+        if pair["possessions"] < CHEMISTRY_MIN_POSSESSIONS and pair["net_rating"] > 0
+    ][:5]
+
+    top_trios = engine.splits(3, min_possessions=CHEMISTRY_MIN_POSSESSIONS)[:5]
 
     return {
         "best_lineups": best_lineups,
         "top_partnerships": top_partnerships,
         "emerging_partnerships": emerging_partnerships,
+        "top_trios": top_trios,
         "team_strengths": [
             "Excellent ball movement",
             "Strong pick-and-roll execution",
@@ -664,6 +691,7 @@ def _calculate_team_chemistry(team, possessions):
     }
 
 
+@span("storylines")
 def _generate_season_storylines(user, team, games, possessions):
     """Generate season storylines and narratives"""
 
@@ -1,7 +1,15 @@
 # apps/teams/models.py
 from django.db import models
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
 from django.conf import settings
 
+from apps.core.cache_utils import CacheManager
+
+# Cache namespaces of team names and of who belongs to which team
+TEAMS_NAMESPACE = "teams"
+MEMBERSHIPS_NAMESPACE = "memberships"
+
 
 class Team(models.Model):
     name = models.CharField(max_length=255, unique=True)
@@ -45,3 +53,25 @@ class Team(models.Model):
 
     def __str__(self):
         return self.name
+
+
+@receiver(post_save, sender=Team)
+def invalidate_team_lookups(sender, instance, **kwargs):
+    """Invalidate cached team lookups (e.g. by name) when a team is saved"""
+    CacheManager.bump_generation(TEAMS_NAMESPACE)
+
+
+@receiver(post_delete, sender=Team)
+def invalidate_team_lookups_on_delete(sender, instance, **kwargs):
+    """Invalidate cached team lookups and memberships when a team is deleted"""
+    CacheManager.bump_generation(TEAMS_NAMESPACE)
+    CacheManager.bump_generation(MEMBERSHIPS_NAMESPACE)
+
+
+@receiver(m2m_changed, sender=Team.players.through)
+@receiver(m2m_changed, sender=Team.coaches.through)
+@receiver(m2m_changed, sender=Team.staff.through)
+def invalidate_memberships(sender, action, **kwargs):
+    """Invalidate cached team memberships when a roster changes"""
+    if action in ("post_add", "post_remove", "post_clear"):
+        CacheManager.bump_generation(MEMBERSHIPS_NAMESPACE)
@@ -3,7 +3,7 @@ from django.contrib.auth import get_user_model
 from apps.teams.models import Team
 from apps.games.models import Game, GameRoster
 from apps.competitions.models import Competition
-from apps.possessions.models import Possession
+from apps.possessions.models import Possession, deferred_game_scores
 from apps.users.models import User
 from apps.plays.models import PlayCategory, PlayDefinition
 from datetime import date, time, timedelta, datetime
@@ -1210,12 +1210,13 @@ class Command(BaseCommand):
                 f"Generating possessions for {game.home_team.name} vs {game.away_team.name}"
             )
 
-            # Generate possessions for this game
-            possessions = self.generate_game_possessions(game, admin_user)
+            # Generate possessions for this game; score is written once below
+            with deferred_game_scores():
+                possessions = self.generate_game_possessions(game, admin_user)
 
-            # Simulate game flow and special scenarios
-            game_flow = self.simulate_game_flow(game, possessions)
-            special_scenarios = self.add_special_scenarios(game, possessions)
+                # Simulate game flow and special scenarios
+                game_flow = self.simulate_game_flow(game, possessions)
+                special_scenarios = self.add_special_scenarios(game, possessions)
 
             # Update game scores based on possessions
             self.update_game_scores(game, possessions)
@@ -25,6 +25,12 @@ class JsonFormatter(logging.Formatter):
             "request_id",
             "sql",
             "params",
+            "query_count",
+            "db_ms",
+            "alias",
+            "source",
+            "call_site",
+            "spans",
         ]:
             if hasattr(record, key):
                 data[key] = getattr(record, key)
@@ -1,3 +1,5 @@
+import os
+import re
 import time
 import logging
 import uuid
@@ -7,10 +9,13 @@ from django.http import (  # pyright: ignore[reportMissingImports]
     HttpResponse,
 )  # pyright: ignore[reportMissingImports]
 from django.conf import settings  # pyright: ignore[reportMissingImports]
-from django.db import connection  # pyright: ignore[reportMissingImports]
+
+from apps.core.db_monitor import track_queries
+from apps.core.metrics import request_metrics, track_timings
+from apps.core.profiling import StackSampler
+from apps.core.spans import track_spans
 
 request_logger = logging.getLogger("request")
-slow_logger = logging.getLogger("db.slow")
 error_logger = logging.getLogger("django.request")
 
 
@@ -21,6 +26,7 @@ class RequestLoggingMiddleware:
     def __call__(self, request: HttpRequest) -> HttpResponse:
         start = time.perf_counter()
         request_id = request.headers.get("X-Request-ID") or str(uuid.uuid4())
+        request.request_id = request_id
         response = None
         try:
             response = self.get_response(request)
@@ -52,6 +58,13 @@ class RequestLoggingMiddleware:
                 "origin": origin,
                 "request_id": request_id,
             }
+            queries = getattr(request, "query_stats", None)
+            if queries is not None:
+                extra["query_count"] = queries.count
+                extra["db_ms"] = int(queries.duration_ms)
+            spans = getattr(request, "spans", None)
+            if spans is not None and spans.spans:
+                extra["spans"] = spans.fields()
             if response is not None:
                 response["X-Request-ID"] = request_id
             request_logger.info("request completed", extra=extra)
@@ -63,19 +76,44 @@ class PerformanceMonitoringMiddleware:
 
     def __call__(self, request: HttpRequest) -> HttpResponse:
         # Performance monitoring settings
-        slow_query_threshold_ms = getattr(settings, "SLOW_QUERY_MS", 200)
         slow_request_threshold_ms = getattr(settings, "SLOW_REQUEST_MS", 1000)
         max_queries_per_request = getattr(settings, "MAX_QUERIES_PER_REQUEST", 50)
-        
-        # Track request performance
-        start_count = len(connection.queries)
+
+        # Track request performance; slow statements are logged as they run
         start_time = time.perf_counter()
-        
-        response = self.get_response(request)
-        
+        with (
+            track_queries(request.path) as queries,
+            track_timings() as timings,
+            track_spans() as spans,
+        ):
+            request.query_stats = queries
+            request.spans = spans
+            response = self.get_response(request)
+        if spans.spans:
+            server_timing = response.get("Server-Timing")
+            response["Server-Timing"] = (
+                f"{server_timing}, {spans.header()}"
+                if server_timing
+                else spans.header()
+            )
+
         # Calculate performance metrics
         total_time = (time.perf_counter() - start_time) * 1000
-        query_count = len(connection.queries) - start_count
+        query_count = queries.count
+        db_ms = int(queries.duration_ms)
+
+        # Latency histograms per URL name; unresolved paths share one route
+        match = getattr(request, "resolver_match", None)
+        request_metrics.observe(
+            match.view_name if match else "unmatched",
+            request.method,
+            {
+                "request": total_time,
+                "db": queries.duration_ms,
+                "cache": timings.get("cache", 0.0),
+                "serialize": timings.get("serialize", 0.0),
+            },
+        )
         
         # Log slow requests
         if total_time >= slow_request_threshold_ms:
@@ -86,6 +124,7 @@ class PerformanceMonitoringMiddleware:
                     "method": request.method,
                     "duration_ms": int(total_time),
                     "query_count": query_count,
+                    "db_ms": db_ms,
                     "user_id": getattr(request.user, 'id', None) if hasattr(request, 'user') else None,
                 },
             )
@@ -98,29 +137,70 @@ class PerformanceMonitoringMiddleware:
                     "path": request.path,
                     "method": request.method,
                     "query_count": query_count,
+                    "db_ms": db_ms,
                     "duration_ms": int(total_time),
                     "user_id": getattr(request.user, 'id', None) if hasattr(request, 'user') else None,
                 },
             )
-        
-        # Log slow individual queries
-        for q in connection.queries[start_count:]:
+
+        return response
+
+
+class ProfilerMiddleware:
+    """
+    Profiles requests sent by a superuser with ``X-Profile: 1`` and stores
+    the collapsed stacks in PROFILE_DIR as ``<request id>.collapsed``
+    """
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if request.META.get("HTTP_X_PROFILE") != "1" or not self._is_superuser(request):
+            return self.get_response(request)
+
+        request_id = getattr(request, "request_id", "")
+        if not re.fullmatch(r"[A-Za-z0-9_-]{1,64}", request_id):
+            # Client-supplied ids are only used as file names when harmless
+            request_id = str(uuid.uuid4())
+
+        sampler = StackSampler(interval=getattr(settings, "PROFILE_INTERVAL", 0.005))
+        sampler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop()
+
+        profile_dir = getattr(
+            settings, "PROFILE_DIR", settings.BASE_DIR / "logs" / "profiles"
+        )
+        os.makedirs(profile_dir, exist_ok=True)
+        with open(os.path.join(profile_dir, f"{request_id}.collapsed"), "w") as profile:
+            profile.write(sampler.collapsed())
+        request_logger.warning(
+            "request profiled",
+            extra={
+                "path": request.path,
+                "method": request.method,
+                "request_id": request_id,
+            },
+        )
+        response["X-Profile-Id"] = request_id
+        return response
+
+    @staticmethod
+    def _is_superuser(request: HttpRequest) -> bool:
+        user = getattr(request, "user", None)
+        if user is None or not user.is_authenticated:
+            # API clients authenticate with a JWT, which DRF only reads in the view
             try:
-                duration = float(q.get("time", 0)) * 1000  # seconds -> ms
+                from rest_framework_simplejwt.authentication import JWTAuthentication
+
+                authenticated = JWTAuthentication().authenticate(request)
             except Exception:
-                duration = 0
-            if duration >= slow_query_threshold_ms:
-                slow_logger.info(
-                    "slow query",
-                    extra={
-                        "duration_ms": int(duration),
-                        "sql": q.get("sql", ""),
-                        "params": q.get("params", ""),
-                        "path": request.path,
-                    },
-                )
-        
-        return response
+                return False
+            user = authenticated[0] if authenticated else None
+        return bool(user and user.is_superuser)
 
 
 class ExceptionLoggingMiddleware:
@@ -77,6 +77,7 @@ MIDDLEWARE = [
     "basketball_analytics.middleware.ExceptionLoggingMiddleware",
     "basketball_analytics.middleware.RequestLoggingMiddleware",
     "basketball_analytics.middleware.PerformanceMonitoringMiddleware",
+    "basketball_analytics.middleware.ProfilerMiddleware",
 ]
 
 ROOT_URLCONF = "basketball_analytics.urls"
@@ -223,6 +224,10 @@ REST_FRAMEWORK = {
     ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
+    "DEFAULT_RENDERER_CLASSES": [
+        "apps.core.metrics.TimedJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
     "EXCEPTION_HANDLER": "apps.core.exceptions.custom_exception_handler",
 }
 
@@ -323,6 +328,11 @@ LOGGING = {
             "level": "WARNING",  # Changed from INFO to WARNING
             "propagate": False,
         },
+        "db.nplusone": {
+            "handlers": ["slow_query_console", "slow_query_file"],
+            "level": "WARNING",
+            "propagate": False,
+        },
     },
 }
 
@@ -330,6 +340,19 @@ LOGGING = {
 SLOW_QUERY_MS = 100  # tuned threshold
 SLOW_REQUEST_MS = 1000  # Log requests taking more than 1 second
 MAX_QUERIES_PER_REQUEST = 50  # Log requests with more than 50 queries
+PROFILE_DIR = (
+    LOG_DIR / "profiles"
+)  # Collapsed stacks of requests sent with X-Profile: 1
+PROFILE_INTERVAL = 0.005  # seconds between stack samples
+REQUEST_METRICS_FLUSH_INTERVAL = (
+    10  # seconds between adds to the shared latency histograms
+)
+
+# N+1 detection for development and staging: report SELECTs repeated more than
+# this many times in one request (0 disables); NPLUSONE_RAISE=1 makes it an error,
+# e.g. NPLUSONE_THRESHOLD=10 NPLUSONE_RAISE=1 pytest
+NPLUSONE_THRESHOLD = int(os.environ.get("NPLUSONE_THRESHOLD", 0))
+NPLUSONE_RAISE = os.environ.get("NPLUSONE_RAISE") == "1"
 
 # Redis Cache Configuration
 # Use Redis for both development and production
@@ -343,8 +366,8 @@ CACHES = {
                 "max_connections": 50,
                 "retry_on_timeout": True,
             },
-            "COMPRESSOR": "django_redis.compressors.zlib.ZlibCompressor",
-            "SERIALIZER": "django_redis.serializers.json.JSONSerializer",
+            "COMPRESSOR": "apps.core.cache_codec.CacheCompressor",
+            "SERIALIZER": "apps.core.cache_codec.CacheSerializer",
         },
         "KEY_PREFIX": "basketball_analytics",
         "TIMEOUT": 300,  # 5 minutes default timeout
@@ -358,8 +381,8 @@ CACHES = {
                 "max_connections": 20,
                 "retry_on_timeout": True,
             },
-            "COMPRESSOR": "django_redis.compressors.zlib.ZlibCompressor",
-            "SERIALIZER": "django_redis.serializers.json.JSONSerializer",
+            "COMPRESSOR": "apps.core.cache_codec.CacheCompressor",
+            "SERIALIZER": "apps.core.cache_codec.CacheSerializer",
         },
         "KEY_PREFIX": "analytics",
         "TIMEOUT": 3600,  # 1 hour for analytics data
@@ -379,6 +402,30 @@ CACHES = {
     },
 }
 
+# Cache values are compressed only above this size, with zstd when it is
+# installed (see apps/core/cache_codec.py and benchmark_cache_codec)
+CACHE_COMPRESSOR = "zstd"
+CACHE_COMPRESS_MIN_BYTES = 1024
+
+# Stale-while-revalidate caches refresh expired entries on a background
+# thread pool of this size; when disabled the refresh runs inline
+CACHE_BACKGROUND_REFRESH = True
+CACHE_REFRESH_WORKERS = 2
+
+# Per-prefix cache counters are added to Redis at most this often (seconds)
+CACHE_STATS_FLUSH_INTERVAL = 10
+
+# Per-process LRU in front of Redis for hot, rarely-changing lookups
+CACHE_LOCAL_MAX_ENTRIES = 1024
+CACHE_LOCAL_TIMEOUT = 60  # seconds
+CACHE_LOCAL_VERSION_CHECK_INTERVAL = (
+    2  # seconds before other workers' invalidations apply
+)
+
+# Cache invalidations from live possession tracking are coalesced per game
+# and applied at most this often (seconds); 0 invalidates on every change
+CACHE_INVALIDATION_DEBOUNCE = 5
+
 # Session configuration
 SESSION_ENGINE = "django.contrib.sessions.backends.cache"
 SESSION_CACHE_ALIAS = "sessions"
@@ -85,8 +85,8 @@ CACHES = {
                 "max_connections": 50,
                 "retry_on_timeout": True,
             },
-            "COMPRESSOR": "django_redis.compressors.zlib.ZlibCompressor",
-            "SERIALIZER": "django_redis.serializers.json.JSONSerializer",
+            "COMPRESSOR": "apps.core.cache_codec.CacheCompressor",
+            "SERIALIZER": "apps.core.cache_codec.CacheSerializer",
         },
         "KEY_PREFIX": "basketball_analytics",
         "TIMEOUT": 300,
@@ -100,8 +100,8 @@ CACHES = {
                 "max_connections": 20,
                 "retry_on_timeout": True,
             },
-            "COMPRESSOR": "django_redis.compressors.zlib.ZlibCompressor",
-            "SERIALIZER": "django_redis.serializers.json.JSONSerializer",
+            "COMPRESSOR": "apps.core.cache_codec.CacheCompressor",
+            "SERIALIZER": "apps.core.cache_codec.CacheSerializer",
         },
         "KEY_PREFIX": "analytics",
         "TIMEOUT": 3600,
@@ -23,7 +23,13 @@ from apps.users.views import UserViewSet
 from apps.games.views import GameViewSet
 from apps.events.views import CalendarEventViewSet
 from apps.plays.views import PlayCategoryViewSet
-from apps.core.views import health_check, readiness_check, liveness_check
+from apps.core.views import (
+    health_check,
+    readiness_check,
+    liveness_check,
+    cache_metrics,
+    prometheus_metrics,
+)
 
 # Create a router and register our viewsets with it.
 router = DefaultRouter()
@@ -71,6 +77,8 @@ urlpatterns = [
     path("api/health/", health_check, name="health_check"),
     path("api/health/ready/", readiness_check, name="readiness_check"),
     path("api/health/live/", liveness_check, name="liveness_check"),
+    path("api/health/cache/", cache_metrics, name="cache_metrics"),
+    path("api/metrics/", prometheus_metrics, name="prometheus_metrics"),
     # Authentication test endpoint
     path("api/auth-test/", auth_test, name="auth_test"),
     # The Django admin site
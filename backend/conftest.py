@@ -0,0 +1,24 @@
+import pytest
+from django.core.cache import caches
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Start every test with empty caches so cached results never leak between tests"""
+    from apps.core.cache_utils import cache_stats, local_cache
+    from apps.core.metrics import request_metrics
+
+    # Flush pending counters and observations so they are cleared with the caches
+    cache_stats.flush()
+    request_metrics.flush()
+    for backend in caches.all():
+        backend.clear()
+    local_cache.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def inline_cache_refresh(settings):
+    """Run background refreshes and invalidations inline so tests can observe them"""
+    settings.CACHE_BACKGROUND_REFRESH = False
+    settings.CACHE_INVALIDATION_DEBOUNCE = 0